@@ -9,6 +9,8 @@ from kivy.config import Config
 import math
 import ctypes
 
+import frame_profiler
+
 # WM_TOUCH Configuration - same as other touchscreen games
 Config.set('input', 'mouse', 'mouse,multitouch_on_demand')
 Config.set('input', 'wm_touch', 'wm_touch')
@@ -337,6 +339,7 @@ class AirHockeyGame(Widget):
                 paddle.vx = 0
                 paddle.vy = 0
 
+    @frame_profiler.timed('update_game')
     def update_game(self, dt):
         """Main game update loop"""
         if not self.game_active or self.goal_pause:
@@ -445,6 +448,7 @@ class AirHockeyGame(Widget):
                 return i
         return None
 
+    @frame_profiler.timed('update_canvas')
     def update_canvas(self):
         """Draw all game elements"""
         self.canvas.clear()
@@ -725,6 +729,7 @@ class AirHockeyAppLayout(FloatLayout):
             # Red player score (right side)
             self.score_labels[1].center = (self.width * 0.75, self.height - margin)
 
+    @frame_profiler.timed('update_ui')
     def update_ui(self, dt):
         """Update UI state"""
         # Update scores
@@ -762,6 +767,7 @@ class AirHockeyAppLayout(FloatLayout):
 
 class AirHockey(App):
     def build(self):
+        frame_profiler.install('airhockey')
         return AirHockeyAppLayout()
 
 
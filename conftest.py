@@ -0,0 +1,11 @@
+# pytest setup for the IR-frame games: the rhythm game's modules are imported
+# flat from rythymgame/ (as rythym.py imports them), shared ones from here
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'rythymgame'))
+
+# A Kivy app for manual timing checks, not a test module
+collect_ignore = [os.path.join('rythymgame', 'timing_test.py')]
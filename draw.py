@@ -6,6 +6,8 @@ from kivy.clock import Clock
 import ctypes
 from ctypes import wintypes
 
+import frame_profiler
+
 # 1. FORCE MULTI-TOUCH CONFIGURATION
 # This tells Kivy to listen to the Windows native touch input provider (WM_TOUCH)
 # instead of just the mouse driver.
@@ -64,6 +66,7 @@ def disable_windows_touch_gestures():
         return False
 
 class TouchDraw(Widget):
+    @frame_profiler.timed('draw_touch_down')
     def on_touch_down(self, touch):
         # This function fires for EVERY new finger that touches the screen.
         # 'touch.ud' is a user-dictionary unique to that specific finger (ID).
@@ -76,6 +79,7 @@ class TouchDraw(Widget):
             # We store the line object in the touch's dictionary so we can add to it later
             touch.ud['line'] = Line(points=(touch.x, touch.y), width=2)
 
+    @frame_profiler.timed('draw_touch_move')
     def on_touch_move(self, touch):
         # This fires when a specific finger ID moves
         # We grab the specific line associated with THIS finger and add the new point
@@ -84,6 +88,7 @@ class TouchDraw(Widget):
 
 class MultiTouchApp(App):
     def build(self):
+        frame_profiler.install('draw')
         return TouchDraw()
 
 if __name__ == '__main__':
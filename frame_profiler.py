@@ -0,0 +1,256 @@
+# Opt-in frame profiler for the IR-frame games
+# Off unless FRAME_PROFILE=1 is set in the environment - then timed() wraps
+# the update callbacks and canvas rebuilds it decorates, every Kivy frame's
+# interval is recorded, an overlay shows p50/p99 frame times, dropped frames
+# and per-section costs, and a CSV trace plus JSON summary are written when the
+# app stops (or at interpreter exit, if it never got an on_stop).
+# When disabled, timed() returns the function untouched (zero overhead).
+#
+#     import frame_profiler
+#
+#     class Game(Widget):
+#         @frame_profiler.timed('update_game')
+#         def update_game(self, dt): ...
+#
+#     class GameApp(App):
+#         def build(self):
+#             frame_profiler.install('mygame')
+#             ...
+#
+#     FRAME_PROFILE=1 python mygame.py     (FRAME_PROFILE_DIR=... picks where traces go)
+
+import atexit
+import csv
+import json
+import logging
+import os
+import time
+from collections import deque
+from contextlib import nullcontext
+from functools import wraps
+
+import game_logging
+
+ENABLED = os.environ.get('FRAME_PROFILE', '') not in ('', '0')
+FRAME_BUDGET_MS = 1000.0 / 60  # 16.6 ms at 60 Hz
+DROPPED_FACTOR = 1.5  # A frame interval over 1.5 budgets means a missed vsync
+RING_SIZE = 3600  # Samples kept per section - one minute of frames at 60 Hz
+OVERLAY_INTERVAL = 0.25  # Seconds between overlay refreshes
+
+log = game_logging.get_logger('Profiler')
+if ENABLED:
+    log.setLevel(logging.INFO)  # Profiling is opt-in - always show where the traces go
+
+
+def percentile(sorted_values, q):
+    """q-th percentile (0-100) of an already sorted list, nearest rank"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class FrameProfiler:
+    """Per-section timings in ring buffers of (start offset s, duration ms)"""
+
+    def __init__(self, enabled=ENABLED, ring_size=RING_SIZE, budget_ms=FRAME_BUDGET_MS):
+        self.enabled = enabled
+        self.ring_size = ring_size
+        self.budget_ms = budget_ms
+        self.sections = {}  # {name: deque of (t, ms)} - 'frame' holds frame intervals
+        self.totals = {}  # {name: [calls, total ms, max ms]} over the whole session
+        self.dropped = 0
+        self.game = None
+        self.overlay = None
+        self.t0 = time.perf_counter()
+        self._last_frame = None
+        self._dumped = False
+
+    def record(self, name, start, ms):
+        ring = self.sections.get(name)
+        if ring is None:
+            ring = self.sections[name] = deque(maxlen=self.ring_size)
+            self.totals[name] = [0, 0.0, 0.0]
+        ring.append((start - self.t0, ms))
+        total = self.totals[name]
+        total[0] += 1
+        total[1] += ms
+        if ms > total[2]:
+            total[2] = ms
+
+    def timed(self, name=None):
+        """Decorator timing every call of a function under name (default: its __name__)"""
+        def decorate(func):
+            if not self.enabled:
+                return func
+            label = name or func.__name__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    end = time.perf_counter()
+                    self.record(label, start, (end - start) * 1000.0)
+            return wrapper
+        return decorate
+
+    def section(self, name):
+        """Context manager timing a block (a no-op context when disabled)"""
+        if not self.enabled:
+            return nullcontext()
+        return _Section(self, name)
+
+    # ========== KIVY ==========
+
+    def install(self, game, overlay=True):
+        """Start recording frame intervals for this game (no-op unless enabled)"""
+        if not self.enabled or self.game is not None:
+            return
+        from kivy.app import App
+        from kivy.clock import Clock
+
+        self.game = game
+        Clock.schedule_interval(self._on_frame, 0)
+        if overlay:
+            Clock.schedule_once(lambda dt: self._add_overlay(), 0)
+        # Write the trace while Kivy is still up; atexit only catches runs that never stop cleanly
+        app = App.get_running_app()
+        if app is not None:
+            app.bind(on_stop=lambda *args: self.dump_once())
+        atexit.register(self.dump_once)
+        log.info("Frame profiling enabled for %s", game)
+
+    def _on_frame(self, dt):
+        now = time.perf_counter()
+        if self._last_frame is not None:
+            ms = (now - self._last_frame) * 1000.0
+            self.record('frame', self._last_frame, ms)
+            if ms > self.budget_ms * DROPPED_FACTOR:
+                self.dropped += 1
+        self._last_frame = now
+
+    def _add_overlay(self):
+        from kivy.clock import Clock
+        from kivy.core.window import Window
+        from kivy.graphics import Color, Rectangle
+        from kivy.uix.label import Label
+
+        label = Label(text='', font_size=12, halign='left', valign='top',
+                      color=(0.8, 1, 0.8, 1), size_hint=(None, None), size=(330, 200))
+        label.bind(size=lambda inst, size: setattr(inst, 'text_size', size))
+        with label.canvas.before:
+            Color(0, 0, 0, 0.6)
+            background = Rectangle(pos=label.pos, size=label.size)
+        label.bind(pos=lambda inst, pos: setattr(background, 'pos', pos))
+
+        def place(*args):
+            label.pos = (5, Window.height - label.height - 5)
+        Window.bind(size=place)
+        place()
+        Window.add_widget(label)
+        self.overlay = label
+        Clock.schedule_interval(self._refresh_overlay, OVERLAY_INTERVAL)
+
+    def _refresh_overlay(self, dt):
+        self.overlay.text = self.overlay_text()
+
+    # ========== REPORTING ==========
+
+    def stats(self, name):
+        """p50/p99/max/mean (ms) over the ring buffer for one section"""
+        values = sorted(ms for _, ms in self.sections.get(name, ()))
+        if not values:
+            return {"count": 0, "p50": 0.0, "p99": 0.0, "max": 0.0, "mean": 0.0}
+        return {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p99": percentile(values, 99),
+            "max": values[-1],
+            "mean": sum(values) / len(values),
+        }
+
+    def overlay_text(self):
+        frame = self.stats('frame')
+        lines = [
+            f"{self.game or 'frames'}  budget {self.budget_ms:.1f}ms",
+            f"frame p50 {frame['p50']:.1f}ms  p99 {frame['p99']:.1f}ms  max {frame['max']:.1f}ms",
+            f"dropped {self.dropped} / {self.totals.get('frame', [0])[0]}",
+        ]
+        for name in sorted(self.sections):
+            if name == 'frame':
+                continue
+            s = self.stats(name)
+            lines.append(f"{name}: p50 {s['p50']:.2f}  p99 {s['p99']:.2f}  max {s['max']:.2f}ms")
+        return "\n".join(lines)
+
+    def summary(self):
+        sections = {}
+        for name, (calls, total_ms, max_ms) in self.totals.items():
+            sections[name] = dict(self.stats(name), calls=calls, total_ms=total_ms, session_max=max_ms)
+        return {
+            "game": self.game,
+            "budget_ms": self.budget_ms,
+            "dropped_frames": self.dropped,
+            "seconds": time.perf_counter() - self.t0,
+            "sections": sections,
+        }
+
+    def dump_once(self):
+        """dump() the session the first time this is called (on_stop and atexit both land here)"""
+        if self._dumped:
+            return None
+        self._dumped = True
+        return self.dump()
+
+    def dump(self, trace_dir=None):
+        """
+        Write <game>_profile_<stamp>_<pid>.csv (ring contents) and .json
+        (summary); returns the paths. A counter is appended rather than
+        overwrite an earlier dump from the same second.
+        """
+        if not self.sections:
+            return None
+        trace_dir = trace_dir or os.environ.get('FRAME_PROFILE_DIR') or os.getcwd()
+        name = f"{self.game or 'game'}_profile_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        base = os.path.join(trace_dir, name)
+        counter = 1
+        while os.path.exists(base + '.csv') or os.path.exists(base + '.json'):
+            base = os.path.join(trace_dir, f"{name}_{counter}")
+            counter += 1
+        with open(base + '.csv', 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['section', 'start_s', 'ms'])
+            rows = [(name, t, ms) for name, ring in self.sections.items() for t, ms in ring]
+            rows.sort(key=lambda row: row[1])
+            for name, t, ms in rows:
+                writer.writerow([name, f"{t:.6f}", f"{ms:.4f}"])
+        with open(base + '.json', 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+        log.info("Wrote %s.csv and %s.json", base, base)
+        return base + '.csv', base + '.json'
+
+
+class _Section:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.profiler.record(self.name, self.start, (end - self.start) * 1000.0)
+        return False
+
+
+# Shared instance - the games use these module-level shortcuts
+profiler = FrameProfiler()
+timed = profiler.timed
+section = profiler.section
+install = profiler.install
@@ -0,0 +1,89 @@
+# Centralized logging for the IR-frame games
+# Every game logs through per-subsystem loggers ("games.<Tag>") that share one
+# non-blocking QueueHandler: the calling thread only enqueues the record and a
+# background QueueListener thread does the console/file I/O, so a slow console
+# (Windows!) can never stall the render thread. Output keeps the familiar
+# "[Tag] message" look.
+#
+# Quiet by default - only warnings and errors - so gameplay builds do no
+# logging work in per-frame or per-input paths. Anything the player should
+# know about (a failed load, a fallback to cached charts only) is logged as a
+# warning; routine progress (cache hits, startup timings) is info. Opt-in
+# tools such as the frame profiler raise their own logger to INFO. Turn it up
+# when debugging:
+#     GAME_LOG_LEVEL=INFO python rythym.py      (or DEBUG for per-input detail)
+#     GAME_LOG_FILE=session.log                 also append to a file
+#
+#     log = game_logging.get_logger('Game')
+#     log.info("Song loaded! Notes: %d", count)
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+ROOT_LOGGER = 'games'
+DEFAULT_LEVEL = 'WARNING'
+
+_listener = None
+
+
+class _TagFormatter(logging.Formatter):
+    """[Tag] message - Tag is the last part of the logger name"""
+
+    def format(self, record):
+        tag = record.name.rsplit('.', 1)[-1]
+        message = record.getMessage()
+        if record.exc_info:
+            message += "\n" + self.formatException(record.exc_info)
+        if record.levelno >= logging.WARNING:
+            return f"[{tag}] {record.levelname}: {message}"
+        return f"[{tag}] {message}"
+
+
+def setup(level=None, stream=None, log_file=None):
+    """
+    Configure the shared queue-backed handler (idempotent - get_logger() calls
+    this). level/log_file default to GAME_LOG_LEVEL / GAME_LOG_FILE.
+    """
+    global _listener
+    root = logging.getLogger(ROOT_LOGGER)
+    if _listener is not None:
+        if level is not None:
+            root.setLevel(level.upper() if isinstance(level, str) else level)
+        return root
+
+    level = level or os.environ.get('GAME_LOG_LEVEL', DEFAULT_LEVEL)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    root.propagate = False
+
+    formatter = _TagFormatter()
+    handlers = [logging.StreamHandler(stream or sys.stderr)]
+    log_file = log_file or os.environ.get('GAME_LOG_FILE')
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    root.addHandler(logging.handlers.QueueHandler(records))
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown)
+    return root
+
+
+def shutdown():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(tag):
+    """Logger for one subsystem - messages print as "[tag] ..." """
+    setup()
+    return logging.getLogger(f"{ROOT_LOGGER}.{tag}")
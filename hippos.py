@@ -10,6 +10,8 @@ import random
 import math
 import ctypes
 
+import frame_profiler
+
 # WM_TOUCH Configuration - same as other touchscreen games
 Config.set('input', 'mouse', 'mouse,multitouch_on_demand')
 Config.set('input', 'wm_touch', 'wm_touch')
@@ -426,6 +428,7 @@ class HungryHipposGame(Widget):
 
         self.update_canvas()
 
+    @frame_profiler.timed('update_game')
     def update_game(self, dt):
         """Main game update loop"""
         if not self.game_active:
@@ -471,6 +474,7 @@ class HungryHipposGame(Widget):
         winners = [h for h in self.hippos if h.score == max_score]
         return winners
 
+    @frame_profiler.timed('update_canvas')
     def update_canvas(self):
         """Draw all game elements"""
         self.canvas.clear()
@@ -796,6 +800,7 @@ class HungryHipposApp(FloatLayout):
                 ly = cy + math.sin(angle_rad) * label_distance
                 self.score_labels[i].center = (lx, ly)
 
+    @frame_profiler.timed('update_scores')
     def update_scores(self, dt):
         """Update score display"""
         for i, hippo in enumerate(self.game.hippos):
@@ -839,6 +844,7 @@ class HungryHipposApp(FloatLayout):
 
 class HungryHippos(App):
     def build(self):
+        frame_profiler.install('hippos')
         return HungryHipposApp()
 
 
@@ -0,0 +1,144 @@
+# Timestamped input capture for the rhythm game
+# Touches and key presses are stamped with time.perf_counter() as early as Kivy
+# lets us see them and appended to a deque (appends and pops are atomic in
+# CPython, so no lock is needed). The game loop calls drain() once per frame
+# and handles everything that arrived since, using each event's timestamp
+# rather than the time the frame got around to it.
+#
+# There is no capture thread for Kivy input: touches carry the provider's own
+# time_start/time_end, which for providers polled on the main loop (mouse,
+# SDL touch) is when the event was dispatched, so stamps are only as early as
+# that provider makes them; keys are stamped on arrival. A raw device (e.g. an
+# IR frame read directly over HID) can feed the same queue from its own
+# thread with start_reader(), which stamps each event the moment it is read.
+#
+# Usage (rythym.py):
+#     capture = InputCapture()
+#     capture.attach(Window)
+#     ...every frame:
+#     for event in capture.drain():
+#         if event.kind == DOWN: ...event.x, event.y, event.time
+
+import threading
+import time
+from collections import deque, namedtuple
+
+DOWN = 'down'
+MOVE = 'move'
+UP = 'up'
+KEY_DOWN = 'key_down'
+KEY_UP = 'key_up'
+
+# kind: one of the constants above; id: touch uid or key name
+# x, y: window pixels (None for keys); time: perf_counter() seconds
+InputEvent = namedtuple('InputEvent', 'kind id x y time')
+
+_MOTION_KINDS = {'begin': DOWN, 'update': MOVE, 'end': UP}
+
+
+def wall_to_perf(wall_time):
+    """Convert a time.time() timestamp (Kivy touch times) to the perf_counter() clock"""
+    return time.perf_counter() - (time.time() - wall_time)
+
+
+class InputCapture:
+    """Queue of timestamped input events, filled by Kivy and/or reader threads"""
+
+    def __init__(self, max_events=1024):
+        # Oldest events are dropped if nobody drains for a long time
+        self.events = deque(maxlen=max_events)
+        self.window = None
+        self._key_names = {}
+        self._readers = []
+        self._stop = threading.Event()
+
+    def push(self, kind, event_id, x=None, y=None, timestamp=None):
+        """Queue an event - safe from any thread; timestamp defaults to now"""
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        self.events.append(InputEvent(kind, event_id, x, y, timestamp))
+
+    def drain(self):
+        """Every event queued since the last drain, oldest first"""
+        events = []
+        popleft = self.events.popleft
+        while True:
+            try:
+                events.append(popleft())
+            except IndexError:
+                return events
+
+    def clear(self):
+        self.events.clear()
+
+    # ========== KIVY ==========
+
+    def attach(self, window, keyboard=True):
+        """
+        Capture touches (and keys) from a Kivy window. Kivy still dispatches
+        the events to its widgets, but the queue is what the game acts on:
+        rythym.py's TargetButton.on_touch_down only claims touches on the
+        button and does nothing else, and the press itself is handled when
+        RhythmGame.process_input drains the queued, timestamped copy.
+        """
+        from kivy.core.window import Keyboard
+
+        self.window = window
+        window.bind(on_motion=self._on_motion)
+        if keyboard:
+            self._key_names = {code: name for name, code in Keyboard.keycodes.items()}
+            window.bind(on_key_down=self._on_key_down, on_key_up=self._on_key_up)
+
+    def detach(self):
+        if self.window is None:
+            return
+        self.window.unbind(on_motion=self._on_motion,
+                           on_key_down=self._on_key_down, on_key_up=self._on_key_up)
+        self.window = None
+
+    def _on_motion(self, window, etype, me):
+        if not getattr(me, 'is_touch', True) or 'pos' not in me.profile:
+            return
+        kind = _MOTION_KINDS.get(etype)
+        if kind is None:
+            return
+        # Provider timestamps are time.time() - taken when the device reported the touch
+        if kind == DOWN:
+            stamp = me.time_start
+        elif kind == UP and me.time_end > 0:
+            stamp = me.time_end
+        else:
+            stamp = me.time_update
+        # Window hasn't scaled the event yet - use the normalized position
+        self.push(kind, me.uid, me.sx * window.width, me.sy * window.height, wall_to_perf(stamp))
+
+    def _on_key_down(self, window, key, scancode=None, codepoint=None, *args):
+        # Kivy key events carry no timestamp - stamp them on arrival
+        self.push(KEY_DOWN, self._key_names.get(key, codepoint))
+
+    def _on_key_up(self, window, key, *args):
+        self.push(KEY_UP, self._key_names.get(key))
+
+    # ========== READER THREADS ==========
+
+    def start_reader(self, read_event, name='input-reader'):
+        """
+        Run read_event() in a daemon thread until stop(). It should block until
+        the device reports something and return (kind, event_id, x, y), or None
+        to skip; each result is stamped the moment it returns.
+        """
+        def run():
+            while not self._stop.is_set():
+                result = read_event()
+                if result is not None:
+                    self.push(*result)
+
+        thread = threading.Thread(target=run, name=name, daemon=True)
+        self._readers.append(thread)
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Stop reader threads and detach from the window"""
+        self._stop.set()
+        self.detach()
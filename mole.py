@@ -9,6 +9,8 @@ from kivy.clock import Clock
 from kivy.config import Config
 import random
 
+import frame_profiler
+
 # Configure for touchscreen
 Config.set('input', 'mouse', 'mouse,multitouch_on_demand')
 Config.set('graphics', 'fullscreen', '0')
@@ -31,6 +33,7 @@ class Mole(Widget):
         self.bind(size=self.update_canvas, pos=self.update_canvas)
         self.update_canvas()
     
+    @frame_profiler.timed('mole_canvas')
     def update_canvas(self, *args):
         self.canvas.clear()
         with self.canvas:
@@ -178,6 +181,7 @@ class Explosion(Widget):
                 'color_idx': i % 3
             })
     
+    @frame_profiler.timed('explosion_canvas')
     def update_canvas(self, *args):
         self.canvas.clear()
         # Convert absolute coordinates to relative coordinates (relative to this widget's position)
@@ -208,6 +212,7 @@ class Explosion(Widget):
                 Ellipse(pos=(rel_x - self.radius * 0.3, rel_y - self.radius * 0.3),
                        size=(self.radius * 0.6, self.radius * 0.6))
     
+    @frame_profiler.timed('explosion_animate')
     def animate(self, dt):
         """Animate explosion expanding"""
         expand_speed = self.max_radius * 0.25
@@ -487,6 +492,7 @@ class WhackAMoleGame(Widget):
         if mole.is_up:
             mole.pop_down()
     
+    @frame_profiler.timed('update_timer')
     def update_timer(self, dt):
         if not self.game_active:
             return
@@ -576,6 +582,7 @@ class WhackAMoleApp(FloatLayout):
         self.timer_label.pos = (self.width - 210, self.height - 60)
         self.start_button.pos = (self.width / 2 - 75, 10)
     
+    @frame_profiler.timed('update_ui')
     def update_ui(self, dt):
         if self.game.game_active:
             self.score_label.text = f'Score: {self.game.score}'
@@ -598,6 +605,7 @@ class WhackAMoleApp(FloatLayout):
 
 class WhackAMole(App):
     def build(self):
+        frame_profiler.install('mole')
         return WhackAMoleApp()
 
 
@@ -0,0 +1,276 @@
+# Content-addressed chart cache
+# Charts are keyed by a hash of the audio bytes plus every generator parameter
+# and the librosa version, so changing a setting never reuses a stale chart
+# and a copied/re-deployed audio file still hits the cache instantly.
+
+import hashlib
+import json
+import os
+import sys
+import threading
+
+# Logging is shared with the other games in the parent directory
+_GAMES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _GAMES_DIR not in sys.path:
+    sys.path.insert(0, _GAMES_DIR)
+import game_logging
+
+log = game_logging.get_logger('ChartCache')
+feature_log = game_logging.get_logger('FeatureStore')
+
+# Bump when the chart format or note generation logic changes
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.chart_cache')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MB
+DEFAULT_FEATURE_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB - waveforms are ~5 MB per minute
+
+# {(abs_path, size, mtime_ns): sha256} - avoids re-hashing the same file in one session
+_hash_memo = {}
+_librosa_version = None
+
+
+def audio_hash(audio_path):
+    """SHA-256 of the audio file contents (memoized per path/size/mtime)"""
+    stat = os.stat(audio_path)
+    memo_key = (os.path.abspath(audio_path), stat.st_size, stat.st_mtime_ns)
+    if memo_key in _hash_memo:
+        return _hash_memo[memo_key]
+
+    digest = hashlib.sha256()
+    with open(audio_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+
+    _hash_memo[memo_key] = digest.hexdigest()
+    return _hash_memo[memo_key]
+
+
+def librosa_version():
+    """Installed librosa version, looked up without importing librosa"""
+    global _librosa_version
+    if _librosa_version is None:
+        try:
+            from importlib.metadata import version
+            _librosa_version = version('librosa')
+        except Exception:
+            _librosa_version = 'none'
+    return _librosa_version
+
+
+def content_key(audio_path, params):
+    """Hash of the audio contents, parameters, librosa version and cache version"""
+    identity = {
+        "version": CACHE_VERSION,
+        "audio": audio_hash(audio_path),
+        "librosa": librosa_version(),
+        "params": params,
+    }
+    blob = json.dumps(identity, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(blob).hexdigest()
+
+
+def _evict_lru(entries, max_bytes, keep, remove, log):
+    """Remove the oldest (mtime, size, path) entries until the total fits in max_bytes"""
+    total = sum(size for mtime, size, path in entries)
+    for mtime, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        if remove(path):
+            total -= size
+            log.info(f"Evicted {os.path.basename(path)}")
+
+
+class ChartCache:
+    """Directory of <key>.json chart files with size-bounded LRU eviction"""
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        if cache_dir is None:
+            cache_dir = os.environ.get('CHART_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def key(self, audio_path, params):
+        """Build the cache key for an audio file and a dict of generator parameters"""
+        return content_key(audio_path, params)
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def get(self, key):
+        """Return the cached chart for a key, or None on a miss"""
+        path = self.path_for(key)
+        try:
+            with open(path, 'r') as f:
+                chart = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            log.warning(f"Dropping unreadable entry {path}: {e}")
+            self._remove(path)
+            return None
+
+        # Touch the entry so eviction treats it as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return chart
+
+    def put(self, key, chart):
+        """Store a chart under a key, then evict old entries past the size limit"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path_for(key)
+        # Write to a temp file and rename so concurrent readers/batch workers
+        # never see a half-written chart
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(chart, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            # Interrupted (disk full, unserializable chart, Ctrl+C) - leave no debris behind
+            self._remove(tmp_path)
+            raise
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep=None):
+        """Delete least-recently-used entries until the cache fits in max_bytes"""
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return
+
+        entries = []
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        _evict_lru(entries, self.max_bytes, keep, self._remove, log)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+
+class FeatureStore:
+    """
+    Persists the expensive analysis arrays (decoded waveform, onset envelope,
+    onset frames/times, spectral centroid, beat frames) per song as .npy files.
+
+    Arrays reload memory-mapped, so retuning thresholds, lane assignment or
+    difficulty filters skips decoding and re-analyzing the audio entirely.
+    Layout: <store_dir>/<key>/{<array>.npy, meta.json}
+    """
+
+    ARRAYS = ('y', 'onset_env', 'onset_frames', 'onset_times', 'spectral_centroid', 'beat_frames')
+
+    def __init__(self, store_dir=None, max_bytes=DEFAULT_FEATURE_MAX_BYTES):
+        if store_dir is None:
+            cache_dir = os.environ.get('CHART_CACHE_DIR', DEFAULT_CACHE_DIR)
+            store_dir = os.path.join(cache_dir, 'features')
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes
+
+    def key(self, audio_path, params):
+        return content_key(audio_path, params)
+
+    def path_for(self, key):
+        return os.path.join(self.store_dir, key)
+
+    def load(self, key):
+        """Return the stored feature dict (arrays memory-mapped), or None on a miss"""
+        import numpy as np
+
+        entry_dir = self.path_for(key)
+        meta_path = os.path.join(entry_dir, 'meta.json')
+        try:
+            with open(meta_path, 'r') as f:
+                features = json.load(f)
+            for name in self.ARRAYS:
+                array_path = os.path.join(entry_dir, name + '.npy')
+                try:
+                    features[name] = np.load(array_path, mmap_mode='r')
+                except ValueError:
+                    # Empty arrays can't be memory-mapped
+                    features[name] = np.load(array_path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            feature_log.warning(f"Dropping unreadable entry {entry_dir}: {e}")
+            self._remove(entry_dir)
+            return None
+
+        try:
+            os.utime(meta_path, None)
+        except OSError:
+            pass
+        return features
+
+    def save(self, key, features):
+        """Store a feature dict (arrays + JSON-able scalars) under a key"""
+        import numpy as np
+
+        os.makedirs(self.store_dir, exist_ok=True)
+        entry_dir = self.path_for(key)
+        tmp_dir = f"{entry_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        meta = {}
+        for name, value in features.items():
+            if name in self.ARRAYS:
+                np.save(os.path.join(tmp_dir, name + '.npy'), np.ascontiguousarray(value))
+            else:
+                meta[name] = value
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+        # Rename the finished directory into place so readers never see a partial entry
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # Another process stored the same song first
+            self._remove(tmp_dir)
+
+        self.evict(keep=entry_dir)
+        return entry_dir
+
+    def evict(self, keep=None):
+        """Delete least-recently-used songs until the store fits in max_bytes"""
+        try:
+            names = os.listdir(self.store_dir)
+        except FileNotFoundError:
+            return
+
+        entries = []
+        for name in names:
+            entry_dir = os.path.join(self.store_dir, name)
+            meta_path = os.path.join(entry_dir, 'meta.json')
+            try:
+                mtime = os.stat(meta_path).st_mtime
+                size = sum(entry.stat().st_size for entry in os.scandir(entry_dir))
+            except OSError:
+                continue
+            entries.append((mtime, size, entry_dir))
+
+        _evict_lru(entries, self.max_bytes, keep, self._remove, feature_log)
+
+    def _remove(self, entry_dir):
+        import shutil
+        try:
+            shutil.rmtree(entry_dir)
+            return True
+        except OSError:
+            return False
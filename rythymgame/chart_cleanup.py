@@ -0,0 +1,226 @@
+# Post-processing for recorded charts - onset snapping, tempo estimation and
+# beat-grid snapping
+# RhythmGame.cleanup_timing hands the notes of a recording session here:
+# presses are first pulled onto the onsets detected in the audio (when the
+# song's analysis is in the feature store), then the tempo is estimated from
+# every inter-onset interval at once, the remaining note starts and all hold
+# ends are snapped to a beat grid and duplicates dropped - all as whole-array
+# NumPy operations (no per-note Python loop), so even long sessions are
+# cleaned up instantly. Kivy-free.
+
+import numpy as np
+
+from rhythm_notes import NUM_LANES
+
+DEFAULT_BPM = 120.0  # Written when there are too few notes to detect a tempo (ChartGenerator's fallback too)
+MIN_BPM = 60.0
+MAX_BPM = 200.0
+BPM_STEP = 0.1  # Resolution of the tempo search
+START_BPM = 120.0  # Center of the log-normal tempo prior when no note spacing stands out
+STD_BPM = 1.0  # Prior width in octaves
+IOI_BEATS = 0.8  # Shortest common note spacing, in beats - between an eighth and a quarter, leaning quarter
+MAX_LAG = 4.0  # Longest inter-onset interval considered (seconds)
+NEIGHBOURS = 16  # Intervals from each note to the next this many notes
+LAG_BIN = 0.005  # Interval histogram resolution (seconds)
+LAG_SMOOTHING = 0.015  # Gaussian smoothing of the histogram - human timing jitter (seconds)
+PEAK_THRESHOLD = 0.3  # Histogram peaks this high (of the tallest) must sit on a candidate's grid
+MIN_STEP = 60.0 / MAX_BPM / 4  # Shorter spacings than a 16th at MAX_BPM are chords, not rhythm (seconds)
+GRID_TOLERANCE = 0.25  # A peak further than this many grid steps from the grid is off it
+OFF_GRID_PENALTY = 10.0  # Score lost by a tempo that leaves every strong peak off its grid
+FIT_WINDOW = 8.0  # Seconds of notes the grid fit starts from (see fit_grid)
+MIN_NOTES = 4  # Fewer notes than this aren't quantized
+SUBDIVISIONS = 4  # Grid steps per beat - 16th notes
+DEDUPE_RESOLUTION = 0.01  # Notes in one lane closer than this are duplicates (seconds)
+ONSET_TOLERANCE = 0.06  # Presses this close to a detected onset snap onto it (seconds)
+
+
+def interval_histogram(times):
+    """
+    Smoothed histogram of the intervals between every note and its next
+    NEIGHBOURS notes - the autocorrelation of the onset train, sampled every
+    LAG_BIN seconds up to MAX_LAG and normalized to a peak of 1
+    """
+    times = np.unique(np.asarray(times, dtype=float))  # Chords count once
+    n_bins = int(MAX_LAG / LAG_BIN) + 1
+    if len(times) < 2:
+        return np.zeros(n_bins)
+
+    # lags[i, k - 1] = times[i + k] - times[i]; inf past the end
+    padded = np.concatenate([times, np.full(NEIGHBOURS, np.inf)])
+    windows = np.lib.stride_tricks.sliding_window_view(padded, NEIGHBOURS + 1)[:len(times)]
+    lags = (windows[:, 1:] - windows[:, :1]).ravel()
+    lags = lags[lags <= MAX_LAG]
+
+    histogram = np.bincount(np.rint(lags / LAG_BIN).astype(int), minlength=n_bins)[:n_bins].astype(float)
+    radius = int(3 * LAG_SMOOTHING / LAG_BIN)
+    kernel = np.exp(-0.5 * (np.arange(-radius, radius + 1) * LAG_BIN / LAG_SMOOTHING) ** 2)
+    histogram = np.convolve(histogram, kernel, mode='same')
+    peak = histogram.max()
+    return histogram / peak if peak > 0 else histogram
+
+
+def strong_peaks(histogram, threshold=PEAK_THRESHOLD):
+    """
+    Lags (seconds) of the interval histogram's local maxima at least
+    threshold high, shortest first - the note spacings the player keeps
+    coming back to. Lags under MIN_STEP (chords, flams) are left out.
+    """
+    lags = np.arange(len(histogram)) * LAG_BIN
+    inner = histogram[1:-1]
+    is_peak = (inner >= histogram[:-2]) & (inner > histogram[2:]) & (inner >= threshold)
+    peaks = lags[1:-1][is_peak]
+    return peaks[peaks >= MIN_STEP]
+
+
+def estimate_bpm(times, subdivisions=SUBDIVISIONS):
+    """
+    Tempo (BPM) of a list of note times, or None with too few notes. Each
+    candidate tempo is scored by the mean of the interval histogram at every
+    multiple of its beat period (a comb filter). A tempo whose beat is a
+    multiple of the true one fills its comb as well (three eighth notes make
+    a beat at 2/3 the tempo), so candidates whose 1/subdivisions-beat grid
+    leaves strong histogram peaks between its steps are penalized. What is
+    left is a tempo and its double or half; a log-normal prior settles that,
+    centered so the shortest common note spacing is IOI_BEATS of a beat.
+    """
+    if len(times) < MIN_NOTES:
+        return None
+    histogram = interval_histogram(times)
+    if not histogram.any():
+        return None
+
+    bpms = np.arange(MIN_BPM, MAX_BPM + BPM_STEP / 2, BPM_STEP)
+    periods = 60.0 / bpms
+    multiples = np.arange(1, int(MAX_LAG / periods.min()) + 1)
+    comb_lags = periods[:, None] * multiples[None, :]
+    in_range = comb_lags <= MAX_LAG
+    lag_axis = np.arange(len(histogram)) * LAG_BIN
+    comb = np.where(in_range, np.interp(comb_lags, lag_axis, histogram), 0.0)
+    strength = comb.sum(axis=1) / in_range.sum(axis=1)
+
+    # Share of the strong peaks (by height) that fall between grid steps
+    peaks = strong_peaks(histogram)
+    if len(peaks):
+        heights = np.interp(peaks, lag_axis, histogram)
+        steps = peaks[None, :] / (periods[:, None] / subdivisions)
+        off_grid = np.abs(steps - np.rint(steps)) > GRID_TOLERANCE
+        off_grid_share = (off_grid * heights).sum(axis=1) / heights.sum()
+        center_bpm = 60.0 * IOI_BEATS / peaks[0]
+    else:
+        off_grid_share = np.zeros(len(bpms))
+        center_bpm = START_BPM
+
+    logprior = -0.5 * ((np.log2(bpms) - np.log2(center_bpm)) / STD_BPM) ** 2
+    score = np.log1p(1e6 * strength) + logprior - OFF_GRID_PENALTY * off_grid_share
+    return float(bpms[int(np.argmax(score))])
+
+
+def grid_phase(times, unit):
+    """Offset of the unit-spaced grid that best fits the note times (circular mean, seconds)"""
+    angles = 2 * np.pi * np.asarray(times, dtype=float) / unit
+    return float(np.angle(np.exp(1j * angles).sum()) / (2 * np.pi) * unit)
+
+
+def fit_grid(times, unit):
+    """
+    Refine a grid step by least squares over a growing window: give the
+    notes in the first FIT_WINDOW seconds their nearest grid index, fit
+    times = phase + unit * index, then extend the window by another
+    FIT_WINDOW and refit until it covers every note. The BPM_STEP search
+    alone would drift a whole grid step over a few minutes; growing the
+    window a little at a time keeps the drift well under half a step while
+    indices are assigned (doubling it let a noisy fit of the first few
+    seconds misnumber the next stretch and lock in its error). Returns
+    (unit, phase); a fit that moves the step by over 2% is ignored.
+    """
+    times = np.asarray(times, dtype=float)
+    window = FIT_WINDOW
+    part = times[times <= times[0] + window]
+    phase = grid_phase(part, unit)
+    while True:
+        index = np.rint((part - phase) / unit)
+        if np.ptp(index) > 0:
+            fitted_unit, fitted_phase = np.polyfit(index, part, 1)
+            if abs(fitted_unit - unit) <= 0.02 * unit:
+                unit, phase = float(fitted_unit), float(fitted_phase)
+        if len(part) == len(times):
+            return unit, phase
+        window += FIT_WINDOW
+        part = times[times <= times[0] + window]
+
+
+def snap_to_onsets(notes, onset_times, tolerance=ONSET_TOLERANCE):
+    """
+    Move each note's start onto the nearest detected onset within tolerance
+    - a sorted-array nearest-neighbour lookup (searchsorted), so thousands
+    of notes take microseconds. Hold notes keep their release time. Returns
+    (notes, corrections): new note lists in the input order, and each
+    note's correction in seconds (positive = moved later, NaN = no onset in
+    reach).
+    """
+    onsets = np.sort(np.asarray(onset_times, dtype=float))
+    times = np.array([note[0] for note in notes], dtype=float)
+    durations = np.array([note[2] if len(note) > 2 else 0 for note in notes], dtype=float)
+    corrections = np.full(len(times), np.nan)
+    if len(onsets) > 0 and len(times) > 0:
+        # Nearest onset: the one at or after each time, or the one before
+        after = np.minimum(np.searchsorted(onsets, times), len(onsets) - 1)
+        before = np.maximum(after - 1, 0)
+        nearest = np.where(np.abs(onsets[after] - times) < np.abs(times - onsets[before]),
+                           onsets[after], onsets[before])
+        offsets = nearest - times
+        snapped = np.abs(offsets) <= tolerance
+        corrections[snapped] = offsets[snapped]
+        times = np.where(snapped, np.round(nearest, 3), times)
+        durations = np.where(snapped, np.round(np.maximum(durations - offsets, 0), 3), durations)
+
+    moved = [[t, note[1], d] if len(note) > 2 else [t, note[1]]
+             for note, t, d in zip(notes, times.tolist(), durations.tolist())]
+    return moved, corrections
+
+
+def quantize_notes(notes, bpm=None, subdivisions=SUBDIVISIONS, fixed=None):
+    """
+    Clean up recorded notes ([time, lane] taps / [time, lane, duration]
+    holds): estimate the tempo (unless bpm is given), snap note starts and
+    hold ends to a 1/subdivisions-beat grid, and drop duplicates in a lane.
+    fixed marks notes whose start is already placed (e.g. by snap_to_onsets)
+    and must not move.
+    Returns a dict with "notes" (time-sorted lists, times rounded to the ms),
+    "bpm" (refined by the grid fit; None if too few notes to quantize),
+    "unit" and "phase" of the grid,
+    and "adjusted" (notes moved by more than 10ms).
+    """
+    times = np.array([note[0] for note in notes], dtype=float)
+    lanes = np.array([note[1] for note in notes], dtype=int)
+    durations = np.array([note[2] if len(note) > 2 else 0 for note in notes], dtype=float)
+    fixed = np.zeros(len(times), dtype=bool) if fixed is None else np.asarray(fixed, dtype=bool)
+    order = np.argsort(times, kind='stable')
+    times, lanes, durations, fixed = times[order], lanes[order], durations[order], fixed[order]
+
+    if bpm is None:
+        bpm = estimate_bpm(times, subdivisions)
+    unit = phase = None
+    adjusted = 0
+    if bpm:
+        unit, phase = fit_grid(times, 60.0 / bpm / subdivisions)
+        bpm = round(60.0 / (unit * subdivisions), 2)
+        holds = durations > 0
+        ends = times + durations
+        snapped = np.where(fixed, times, np.maximum(phase + np.rint((times - phase) / unit) * unit, 0))
+        snapped_ends = phase + np.rint((ends - phase) / unit) * unit
+        # A hold never collapses to less than one grid step
+        durations = np.where(holds, np.maximum(snapped_ends - snapped, unit), 0)
+        adjusted = int(np.count_nonzero(np.abs(snapped - times) > 0.01))
+        times = snapped
+    times = np.round(times, 3)
+    durations = np.round(durations, 3)
+
+    # Drop repeats of a (time, lane) pair, keeping the first
+    keys = np.rint(times / DEDUPE_RESOLUTION).astype(np.int64) * NUM_LANES + lanes
+    _, first = np.unique(keys, return_index=True)
+    keep = np.sort(first)
+
+    cleaned = [[t, lane, d] if d > 0 else [t, lane]
+               for t, lane, d in zip(times[keep].tolist(), lanes[keep].tolist(), durations[keep].tolist())]
+    return {"notes": cleaned, "bpm": bpm, "unit": unit, "phase": phase, "adjusted": adjusted}
@@ -0,0 +1,232 @@
+# Compact binary chart format
+# Notes are stored as one packed, time-sorted structured array
+# (float32 time, uint8 lane, float32 duration) behind a small header, so a
+# chart loads zero-copy with np.memmap instead of parsing a JSON list per note.
+# JSON stays the import/export format (recorded charts, songs.py, hand edits).
+#
+# Layout (little-endian):
+#   header   b'RCHT', version u2, reserved u2, meta_len u4, n_notes u4
+#   meta     UTF-8 JSON (name, file, bpm, ... plus note ranges), padded to 16 bytes
+#   notes    n_notes packed NOTE_DTYPE records, every tier back to back
+
+import itertools
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+_GAMES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _GAMES_DIR not in sys.path:
+    sys.path.insert(0, _GAMES_DIR)  # for game_logging
+import game_logging
+
+log = game_logging.get_logger('ChartFormat')
+
+MAGIC = b'RCHT'
+FORMAT_VERSION = 1
+BINARY_SUFFIX = '.bin'
+NOTE_DTYPE = np.dtype([('time', '<f4'), ('lane', 'u1'), ('duration', '<f4')])
+
+_HEADER = struct.Struct('<4sHHII')
+_ALIGN = 16
+
+
+def notes_to_array(notes):
+    """[time, lane] / [time, lane, duration] lists (or an array) to a time-sorted NOTE_DTYPE array"""
+    if isinstance(notes, np.ndarray) and notes.dtype == NOTE_DTYPE:
+        array = np.array(notes)
+    else:
+        table = _note_table(notes)
+        array = np.zeros(len(table), dtype=NOTE_DTYPE)
+        array['time'] = table[:, 0]
+        array['lane'] = table[:, 1]
+        if table.shape[1] > 2:
+            array['duration'] = table[:, 2]
+    # Stable sort keeps the chart's order for simultaneous notes
+    return array[np.argsort(array['time'], kind='stable')]
+
+
+def _note_table(notes):
+    """Notes as an (n, 2) or (n, 3) float array, converted column-wise instead of per record"""
+    try:
+        # All taps or all holds (or already an array): one conversion in C
+        table = np.asarray(notes, dtype=np.float64)
+    except ValueError:
+        # Taps and holds mixed - flatten to time, lane, duration triples
+        flat = itertools.chain.from_iterable(
+            (note[0], note[1], note[2] if len(note) > 2 else 0) for note in notes)
+        return np.fromiter(flat, dtype=np.float64, count=3 * len(notes)).reshape(-1, 3)
+    return table.reshape(len(table), -1) if table.size else np.zeros((0, 2))
+
+
+def notes_to_list(array):
+    """NOTE_DTYPE array back to JSON-style lists (duration only for hold notes)"""
+    notes = []
+    for time, lane, duration in zip(array['time'].tolist(), array['lane'].tolist(), array['duration'].tolist()):
+        if duration > 0:
+            notes.append([round(time, 4), lane, round(duration, 4)])
+        else:
+            notes.append([round(time, 4), lane])
+    return notes
+
+
+def save_chart(path, chart):
+    """Write a chart dict (JSON layout, optionally with "difficulties") as a binary chart"""
+    tiers = chart.get("difficulties") or {}
+    meta = {key: value for key, value in chart.items() if key not in ("notes", "difficulties")}
+
+    blocks = []
+    offset = 0
+    ranges = {}
+    for name, tier_notes in tiers.items():
+        array = notes_to_array(tier_notes)
+        ranges[name] = [offset, len(array)]
+        blocks.append(array)
+        offset += len(array)
+
+    # Top-level notes usually repeat one of the tiers - store them once
+    default = chart.get("difficulty")
+    array = notes_to_array(chart.get("notes", []))
+    if default in ranges and np.array_equal(array, blocks[list(ranges).index(default)]):
+        meta["notes_range"] = ranges[default]
+    else:
+        meta["notes_range"] = [offset, len(array)]
+        blocks.append(array)
+        offset += len(array)
+    if ranges:
+        meta["tier_ranges"] = ranges
+
+    meta_bytes = json.dumps(meta).encode('utf-8')
+    meta_bytes += b' ' * (-(_HEADER.size + len(meta_bytes)) % _ALIGN)
+    notes = np.concatenate(blocks) if blocks else np.zeros(0, dtype=NOTE_DTYPE)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(meta_bytes), len(notes)))
+        f.write(meta_bytes)
+        f.write(notes.tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_chart(path, mmap=True):
+    """
+    Read a binary chart into the same dict layout as a JSON chart, with
+    "notes" (and each "difficulties" tier) as NOTE_DTYPE arrays - views into
+    one memory-mapped block when mmap is True.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"Not a binary chart (truncated header): {path}")
+        magic, version, _, meta_len, n_notes = _HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"Not a binary chart: {path}")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"Binary chart version {version} is newer than supported ({FORMAT_VERSION}): {path}")
+        data_offset = _HEADER.size + meta_len
+        if os.fstat(f.fileno()).st_size < data_offset + n_notes * NOTE_DTYPE.itemsize:
+            raise ValueError(f"Not a binary chart (truncated): {path}")
+        meta = json.loads(f.read(meta_len).decode('utf-8'))
+
+    if n_notes == 0:
+        notes = np.zeros(0, dtype=NOTE_DTYPE)
+    elif mmap:
+        notes = np.memmap(path, dtype=NOTE_DTYPE, mode='r', offset=data_offset, shape=(n_notes,))
+    else:
+        notes = np.fromfile(path, dtype=NOTE_DTYPE, count=n_notes, offset=data_offset)
+
+    def section(start_count):
+        start, count = start_count
+        return notes[start:start + count]
+
+    chart = {key: value for key, value in meta.items() if key not in ("notes_range", "tier_ranges")}
+    chart["notes"] = section(meta["notes_range"])
+    if "tier_ranges" in meta:
+        chart["difficulties"] = {name: section(r) for name, r in meta["tier_ranges"].items()}
+    return chart
+
+
+def chart_to_json(chart):
+    """A loaded binary chart (or any chart with note arrays) as a JSON-serializable dict"""
+    result = {key: value for key, value in chart.items() if key not in ("notes", "difficulties")}
+    result["notes"] = _as_list(chart.get("notes", []))
+    if chart.get("difficulties"):
+        result["difficulties"] = {name: _as_list(notes) for name, notes in chart["difficulties"].items()}
+    return result
+
+
+def _as_list(notes):
+    if isinstance(notes, np.ndarray):
+        return notes_to_list(notes)
+    return list(notes)
+
+
+def import_json(json_path, bin_path=None):
+    """Convert a JSON chart file to the binary format (default: same name, .bin)"""
+    if bin_path is None:
+        bin_path = os.path.splitext(json_path)[0] + BINARY_SUFFIX
+    with open(json_path, 'r') as f:
+        chart = json.load(f)
+    return save_chart(bin_path, chart)
+
+
+def export_json(bin_path, json_path=None):
+    """Convert a binary chart back to pretty-printed JSON (default: same name, .json)"""
+    if json_path is None:
+        json_path = os.path.splitext(bin_path)[0] + '.json'
+    chart = chart_to_json(load_chart(bin_path, mmap=False))
+    with open(json_path, 'w') as f:
+        json.dump(chart, f, indent=2)
+    return json_path
+
+
+def chart_paths(audio_path):
+    """(binary, json) paths of the chart stored next to an audio file"""
+    base = os.path.splitext(audio_path)[0]
+    return base + "_chart" + BINARY_SUFFIX, base + "_chart.json"
+
+
+def load_song_chart(audio_path):
+    """
+    Load the chart next to an audio file: the binary chart when present and
+    not older than the JSON one, otherwise the JSON chart (notes as arrays
+    either way). Returns None when neither exists.
+    """
+    bin_path, json_path = chart_paths(audio_path)
+    has_bin = os.path.exists(bin_path)
+    has_json = os.path.exists(json_path)
+
+    if has_bin and (not has_json or os.path.getmtime(bin_path) >= os.path.getmtime(json_path)):
+        try:
+            return load_chart(bin_path)
+        except (OSError, ValueError) as e:
+            log.warning(f"Unreadable binary chart {bin_path}: {e}")
+            if not has_json:
+                raise
+
+    if not has_json:
+        return None
+    with open(json_path, 'r') as f:
+        chart = json.load(f)
+    chart["notes"] = notes_to_array(chart.get("notes", []))
+    if chart.get("difficulties"):
+        chart["difficulties"] = {name: notes_to_array(notes) for name, notes in chart["difficulties"].items()}
+    return chart
+
+
+# Command-line usage: convert between formats
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python chart_format.py <chart.json|chart.bin> [output]")
+        print("Converts JSON charts to the binary format and back")
+        sys.exit(1)
+
+    source = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) > 2 else None
+    if source.endswith(BINARY_SUFFIX):
+        print(f"[ChartFormat] Wrote {export_json(source, target)}")
+    else:
+        print(f"[ChartFormat] Wrote {import_json(source, target)}")
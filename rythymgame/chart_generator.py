@@ -1,5 +1,6 @@
 # Automatic Chart Generator for Rhythm Game
 # Uses librosa for audio analysis and onset detection
+# (or the NumPy-only engine in onset_analysis.py - see ChartGenerator(engine=...))
 
 # IMPORTANT: Suppress numba debug output BEFORE importing anything else
 import os
@@ -15,36 +16,137 @@ os.environ['NUMBA_LOG_LEVEL'] = 'ERROR'
 warnings.filterwarnings('ignore', category=FutureWarning)
 warnings.filterwarnings('ignore', category=UserWarning)
 
+import importlib.util
 import json
+import logging
+import sys
+import threading
+import time
 
-print("[ChartGen] Importing numpy...")
 import numpy as np
-print("[ChartGen] Numpy imported successfully")
 
-try:
-    print("[ChartGen] Importing librosa (first time may take 30-60 seconds)...")
-    # Suppress librosa/numba logging
-    import logging
-    logging.getLogger('numba').setLevel(logging.ERROR)
-    logging.getLogger('librosa').setLevel(logging.ERROR)
+import chart_format
+from chart_cache import ChartCache, FeatureStore
+
+# game_logging is shared with the other IR-frame games one level up
+_GAMES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _GAMES_DIR not in sys.path:
+    sys.path.insert(0, _GAMES_DIR)
+import game_logging
+
+log = game_logging.get_logger('ChartGen')
+batch_log = game_logging.get_logger('Batch')
+
+DIFFICULTIES = ('easy', 'medium', 'hard', 'expert')
+ENGINES = ('librosa', 'numpy')
+SAMPLE_RATE = 22050  # Standard sample rate for analysis
+HOP_LENGTH = 512  # librosa's default analysis hop (samples per frame)
+STREAM_BLOCK_SECONDS = 30.0  # audio decoded per block in streaming mode
+STREAM_WARMUP_ONSETS = 16  # onsets held back before the running mean strength is trusted
+
+# librosa (and numba behind it) is imported lazily - the import alone takes
+# 30-60 seconds on first run, and playing a cached chart never needs it.
+# Call warm_up_librosa() to load it on a background thread and poll
+# librosa_status() to find out when it is ready.
+LIBROSA_AVAILABLE = importlib.util.find_spec('librosa') is not None
+if not LIBROSA_AVAILABLE:
+    log.warning("librosa not installed - only the NumPy engine is available. Run: pip install librosa")
+
+librosa = None
+_librosa_lock = threading.Lock()
+_librosa_error = None
+_warmup_thread = None
+_warmup_done = threading.Event()
+
+
+def load_librosa():
+    """Import librosa on first use (thread-safe) and return the module"""
+    global librosa, _librosa_error
+    with _librosa_lock:
+        if librosa is None:
+            if not LIBROSA_AVAILABLE:
+                raise ImportError("librosa is required. Install with: pip install librosa")
+            log.info("Importing librosa (first time may take 30-60 seconds)...")
+            start = time.perf_counter()
+            # Suppress librosa/numba logging
+            logging.getLogger('numba').setLevel(logging.ERROR)
+            logging.getLogger('librosa').setLevel(logging.ERROR)
+            try:
+                import librosa as librosa_module
+            except ImportError as e:
+                _librosa_error = e
+                log.error(f"Import error: {e}")
+                raise
+            librosa = librosa_module
+            log.info(f"Librosa imported successfully ({time.perf_counter() - start:.1f}s)")
+    return librosa
+
+
+def warm_up_librosa():
+    """
+    Import librosa and JIT-compile its numba kernels on a background thread,
+    so the first real chart generation doesn't pay for it.
+    Safe to call more than once.
+    """
+    global _warmup_thread
+    if not LIBROSA_AVAILABLE or _warmup_thread is not None:
+        return _warmup_thread
+
+    def warm_up():
+        global _librosa_error
+        try:
+            start = time.perf_counter()
+            lib = load_librosa()
+            # A second of clicks exercises the onset/beat/centroid kernels
+            y = np.zeros(SAMPLE_RATE, dtype=np.float32)
+            y[::SAMPLE_RATE // 4] = 1.0
+            onset_env = lib.onset.onset_strength(y=y, sr=SAMPLE_RATE)
+            lib.onset.onset_detect(onset_envelope=onset_env, sr=SAMPLE_RATE)
+            lib.beat.beat_track(onset_envelope=onset_env, sr=SAMPLE_RATE)
+            lib.feature.spectral_centroid(y=y, sr=SAMPLE_RATE)
+            log.info(f"Librosa warm-up finished in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            _librosa_error = e
+            log.warning(f"Librosa warm-up failed: {e}")
+        finally:
+            _warmup_done.set()
+
+    _warmup_thread = threading.Thread(target=warm_up, name='librosa-warmup', daemon=True)
+    _warmup_thread.start()
+    return _warmup_thread
 
-    import librosa
-    LIBROSA_AVAILABLE = True
-    print("[ChartGen] Librosa imported successfully")
-except ImportError as e:
-    LIBROSA_AVAILABLE = False
-    print(f"Warning: librosa not installed. Run: pip install librosa")
-    print(f"Import error: {e}")
+
+def librosa_status():
+    """'unavailable', 'idle', 'loading', 'ready' or 'error' - cheap enough to poll every frame"""
+    if not LIBROSA_AVAILABLE:
+        return 'unavailable'
+    if _librosa_error is not None:
+        return 'error'
+    if _warmup_thread is not None:
+        return 'ready' if _warmup_done.is_set() else 'loading'
+    return 'ready' if librosa is not None else 'idle'
 
 
 class ChartGenerator:
     """Generates note charts from audio files using beat/onset detection"""
 
-    def __init__(self):
+    def __init__(self, cache_dir=None, engine=None):
+        # Analysis backend: 'librosa' or 'numpy' (onset_analysis.py, no
+        # numba/JIT start-up cost). Defaults to librosa when it is installed.
+        if engine is None:
+            engine = 'librosa' if LIBROSA_AVAILABLE else 'numpy'
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown analysis engine: {engine} (expected one of {ENGINES})")
+        self.engine = engine
         # Minimum gap between notes (seconds) - prevents note spam
         self.min_note_gap = 0.15
         # Onset detection sensitivity (lower = more notes)
         self.onset_threshold = 0.5
+        # Content-addressed chart cache (audio hash + parameters)
+        self.cache = ChartCache(cache_dir)
+        # Memory-mappable analysis arrays per song, reused when retuning
+        features_dir = os.path.join(cache_dir, 'features') if cache_dir else None
+        self.features = FeatureStore(features_dir)
 
     def generate(self, audio_path, song_name=None, difficulty='medium'):
         """
@@ -58,28 +160,111 @@ class ChartGenerator:
         Returns:
             dict with song data including generated notes
         """
-        if not LIBROSA_AVAILABLE:
-            raise ImportError("librosa is required. Install with: pip install librosa")
+        charts = self.generate_all(audio_path, song_name, difficulties=(difficulty,))
+        return charts[difficulty]
 
-        if not os.path.exists(audio_path):
-            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+    def generate_all(self, audio_path, song_name=None, difficulties=DIFFICULTIES, progress=None):
+        """
+        Generate charts for several difficulties from a single analysis pass.
+
+        The audio is decoded and analyzed once - only the difficulty filter
+        runs per tier.
+
+        Args:
+            progress: optional callback(stage, fraction) - see generate_and_cache
+
+        Returns:
+            dict of {difficulty: chart dict}
+        """
+        analysis = self.load_features(audio_path, progress)
+        _report_progress(progress, "Building charts", 0.9)
+        notes = self._notes_from_analysis(analysis)
 
         if song_name is None:
             song_name = os.path.splitext(os.path.basename(audio_path))[0]
 
-        print(f"[ChartGen] Loading audio: {audio_path}")
-        print(f"[ChartGen] This may take 10-30 seconds for the first load...")
+        charts = {}
+        for difficulty in difficulties:
+            tier_notes = self._apply_difficulty(notes, difficulty, analysis["tempo"])
+            log.info(f"Final note count: {len(tier_notes)} ({difficulty})")
+            charts[difficulty] = {
+                "name": song_name,
+                "file": os.path.basename(audio_path),
+                "bpm": int(analysis["tempo"]),
+                "duration": round(analysis["duration"], 2),
+                "difficulty": difficulty,
+                "notes": tier_notes
+            }
+        log.info("Chart generation complete")
+
+        return charts
+
+    def feature_params(self, engine=None):
+        """Settings the analysis arrays depend on - part of the feature store key"""
+        return {"sr": SAMPLE_RATE, "engine": engine or self.engine}
+
+    def stored_features(self, audio_path):
+        """
+        The stored analysis arrays for a song from either engine (this
+        generator's first), or None - never analyzes the audio, so it is safe
+        where a 30-60 second analysis can't be waited for
+        """
+        if not os.path.exists(audio_path):
+            return None
+        engines = (self.engine,) + tuple(engine for engine in ENGINES if engine != self.engine)
+        for engine in engines:
+            analysis = self.features.load(self.features.key(audio_path, self.feature_params(engine)))
+            if analysis is not None:
+                return analysis
+        return None
+
+    def load_features(self, audio_path, progress=None):
+        """
+        Return the analysis arrays for a song, from the feature store when
+        available (memory-mapped, milliseconds) or by analyzing the audio.
+        """
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+
+        key = self.features.key(audio_path, self.feature_params())
+        analysis = self.features.load(key)
+        if analysis is not None:
+            log.info(f"Loaded stored features: {self.features.path_for(key)}")
+            return analysis
+
+        if self.engine == 'numpy':
+            analysis = self._analyze_numpy(audio_path, progress)
+        else:
+            analysis = self._analyze(audio_path, progress)
+        try:
+            self.features.save(key, analysis)
+        except OSError as e:
+            log.warning(f"Could not store features: {e}")
+        return analysis
+
+    def _analyze(self, audio_path, progress=None):
+        """Decode the audio and run the librosa analysis shared by every difficulty"""
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+
+        _report_progress(progress, "Loading analyzer", 0.05)
+        librosa = load_librosa()
+
+        _report_progress(progress, "Decoding audio", 0.1)
+        log.info(f"Loading audio: {audio_path}")
+        log.info("This may take 10-30 seconds for the first load...")
         try:
-            y, sr = librosa.load(audio_path, sr=22050)  # Standard sample rate
-            print(f"[ChartGen] Audio loaded into memory")
+            y, sr = librosa.load(audio_path, sr=SAMPLE_RATE)
+            log.info("Audio loaded into memory")
             duration = librosa.get_duration(y=y, sr=sr)
-            print(f"[ChartGen] Duration: {duration:.1f}s, Sample rate: {sr}")
+            log.info(f"Duration: {duration:.1f}s, Sample rate: {sr}")
         except Exception as e:
-            print(f"[ChartGen] ERROR loading audio: {e}")
+            log.error(f"Could not load audio: {e}")
             raise
 
         # Detect tempo (BPM)
-        print("[ChartGen] Analyzing tempo (this takes a moment)...")
+        _report_progress(progress, "Detecting tempo", 0.3)
+        log.info("Analyzing tempo (this takes a moment)...")
         try:
             tempo, beat_frames = librosa.beat.beat_track(y=y, sr=sr)
             # Handle both old and new librosa versions
@@ -87,16 +272,18 @@ class ChartGenerator:
                 tempo = float(tempo[0]) if len(tempo) > 0 else 120.0
             else:
                 tempo = float(tempo)
-            print(f"[ChartGen] Detected BPM: {tempo:.1f}")
+            log.info(f"Detected BPM: {tempo:.1f}")
         except Exception as e:
-            print(f"[ChartGen] ERROR in tempo detection: {e}")
+            log.warning(f"Tempo detection failed, assuming 120 BPM: {e}")
             tempo = 120.0
+            beat_frames = np.array([], dtype=int)
 
         # Detect onsets (when sounds begin)
-        print("[ChartGen] Detecting onsets...")
+        _report_progress(progress, "Detecting onsets", 0.55)
+        log.info("Detecting onsets...")
         try:
             onset_env = librosa.onset.onset_strength(y=y, sr=sr)
-            print("[ChartGen] Onset strength computed")
+            log.info("Onset strength computed")
             onset_frames = librosa.onset.onset_detect(
                 onset_envelope=onset_env,
                 sr=sr,
@@ -104,90 +291,200 @@ class ChartGenerator:
                 units='frames'
             )
             onset_times = librosa.frames_to_time(onset_frames, sr=sr)
-            print(f"[ChartGen] Found {len(onset_times)} raw onsets")
+            log.info(f"Found {len(onset_times)} raw onsets")
         except Exception as e:
-            print(f"[ChartGen] ERROR in onset detection: {e}")
-            onset_times = []
+            log.warning(f"Onset detection failed: {e}")
+            onset_times = np.array([])
             onset_env = np.array([])
             onset_frames = np.array([])
 
         # Compute spectral centroid for pitch-based lane assignment
         # Spectral centroid = "center of mass" of frequencies = perceived pitch
-        print("[ChartGen] Computing spectral centroid for lane assignment...")
+        _report_progress(progress, "Assigning lanes", 0.75)
+        log.info("Computing spectral centroid for lane assignment...")
         try:
             spectral_centroid = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-            print(f"[ChartGen] Spectral centroid computed, range: {np.min(spectral_centroid):.0f} - {np.max(spectral_centroid):.0f} Hz")
+            log.info(f"Spectral centroid computed, range: {np.min(spectral_centroid):.0f} - {np.max(spectral_centroid):.0f} Hz")
         except Exception as e:
-            print(f"[ChartGen] ERROR computing spectral centroid: {e}")
+            log.warning(f"Spectral centroid failed, every note goes in the left lane: {e}")
             spectral_centroid = np.zeros(1000)
 
+        return {
+            "sr": sr,
+            "duration": float(duration),
+            "tempo": tempo,
+            "y": y,
+            "beat_frames": beat_frames,
+            "onset_env": onset_env,
+            "onset_frames": onset_frames,
+            "onset_times": onset_times,
+            "spectral_centroid": spectral_centroid,
+        }
+
+    def _analyze_numpy(self, audio_path, progress=None):
+        """Same analysis as _analyze using the NumPy-only engine (no librosa import)"""
+        import onset_analysis
+
+        _report_progress(progress, "Decoding audio", 0.1)
+        log.info(f"Loading audio (numpy engine): {audio_path}")
+        start = time.perf_counter()
+        y, sr = onset_analysis.load_audio(audio_path, SAMPLE_RATE)
+        log.info(f"Duration: {len(y) / sr:.1f}s, Sample rate: {sr}")
+
+        _report_progress(progress, "Detecting onsets", 0.4)
+        analysis = onset_analysis.analyze(y, sr, hop_length=HOP_LENGTH)
+        log.info(f"Detected BPM: {analysis['tempo']:.1f}")
+        log.info(f"Found {len(analysis['onset_times'])} raw onsets")
+        log.info(f"Numpy analysis finished in {time.perf_counter() - start:.1f}s")
+        return analysis
+
+    def _notes_from_analysis(self, analysis):
+        """Turn detected onsets into (time, lane) notes before any difficulty filter
+
+        Runs as one NumPy pipeline: strength mask, frame lookup and lane
+        digitization are array ops, and only the greedy min-gap pass walks
+        the kept notes (via searchsorted jumps).
+        """
+        sr = analysis["sr"]
+        onset_env = np.asarray(analysis["onset_env"])
+        onset_frames = np.asarray(analysis["onset_frames"], dtype=int)
+        onset_times = np.asarray(analysis["onset_times"], dtype=float)
+        spectral_centroid = np.asarray(analysis["spectral_centroid"])
+
         # Calculate percentiles for lane thresholds
         # This ensures roughly equal distribution across lanes
-        centroid_33 = np.percentile(spectral_centroid, 33)
-        centroid_66 = np.percentile(spectral_centroid, 66)
-        print(f"[ChartGen] Lane thresholds: <{centroid_33:.0f}Hz=Left, <{centroid_66:.0f}Hz=Center, >={centroid_66:.0f}Hz=Right")
+        centroid_33, centroid_66 = np.percentile(spectral_centroid, [33, 66])
+        log.info(f"Lane thresholds: <{centroid_33:.0f}Hz=Left, <{centroid_66:.0f}Hz=Center, >={centroid_66:.0f}Hz=Right")
 
         # Generate notes from onsets
-        print("[ChartGen] Generating notes from onsets...")
-        notes = []
-        last_note_time = -1
+        log.info("Generating notes from onsets...")
+
+        # Onset strength per onset - indexed by each onset's own frame so
+        # strengths can never drift out of alignment with onset_times
+        in_env = onset_frames < len(onset_env)
+        onset_strengths = np.zeros(len(onset_frames))
+        onset_strengths[in_env] = onset_env[onset_frames[in_env]]
+
+        mean_strength = np.mean(onset_strengths[in_env]) if np.any(in_env) else 0
+        log.info(f"Processing {len(onset_times)} onsets, mean strength: {mean_strength:.2f}")
 
-        # Get onset strengths for filtering
-        if len(onset_frames) > 0 and len(onset_env) > 0:
-            valid_frames = onset_frames[onset_frames < len(onset_env)]
-            onset_strengths = onset_env[valid_frames] if len(valid_frames) > 0 else np.array([])
+        # Skip very weak onsets
+        if mean_strength > 0:
+            keep = in_env & (onset_strengths >= mean_strength * self.onset_threshold)
         else:
-            onset_strengths = np.array([])
+            keep = np.ones(len(onset_times), dtype=bool)
 
-        mean_strength = np.mean(onset_strengths) if len(onset_strengths) > 0 else 0
-        print(f"[ChartGen] Processing {len(onset_times)} onsets, mean strength: {mean_strength:.2f}")
+        # Frame index for each onset (same math as librosa.time_to_frames)
+        frames = (onset_times * sr).astype(int) // HOP_LENGTH
+        keep &= frames < len(spectral_centroid)
 
-        # Track lane distribution for debugging
-        lane_counts = [0, 0, 0]
+        # Skip onsets too close to the last kept note
+        candidates = np.flatnonzero(keep)
+        kept = candidates[_min_gap_mask(onset_times[candidates], self.min_note_gap)]
 
-        for i, onset_time in enumerate(onset_times):
-            # Skip if too close to last note
-            if onset_time - last_note_time < self.min_note_gap:
-                continue
+        # Determine lane based on spectral centroid (perceived pitch)
+        # Low pitch = Left (0), Mid pitch = Center (1), High pitch = Right (2)
+        lanes = np.digitize(spectral_centroid[frames[kept]], [centroid_33, centroid_66])
 
-            # Skip very weak onsets
-            if i < len(onset_strengths) and mean_strength > 0:
-                if onset_strengths[i] < mean_strength * self.onset_threshold:
-                    continue
+        lane_counts = np.bincount(lanes, minlength=3)
+        log.info(f"Lane distribution: Left={lane_counts[0]}, Center={lane_counts[1]}, Right={lane_counts[2]}")
 
-            # Get the frame index for this onset
-            frame = librosa.time_to_frames(onset_time, sr=sr)
-            if frame >= len(spectral_centroid):
-                continue
+        notes = list(zip(np.round(onset_times[kept], 3).tolist(), lanes.tolist()))
+        log.info(f"Generated {len(notes)} notes before difficulty filter")
+        return notes
 
-            # Determine lane based on spectral centroid (perceived pitch)
-            centroid_val = spectral_centroid[frame]
+    def stream_notes(self, audio_path, block_seconds=STREAM_BLOCK_SECONDS, progress=None):
+        """
+        Streaming analysis for long tracks: decode and analyze the audio in
+        fixed-size blocks and yield (time, lane) notes as soon as each block
+        confirms them. Memory stays constant regardless of track length.
 
-            if centroid_val < centroid_33:
-                lane = 0  # Low pitch = Left
-            elif centroid_val < centroid_66:
-                lane = 1  # Mid pitch = Center
-            else:
-                lane = 2  # High pitch = Right
+        Uses the NumPy engine (onset_analysis.StreamingAnalyzer). Strength and
+        lane thresholds are running statistics - the mean onset strength and
+        the spectral centroid percentiles of the audio seen so far. The first
+        STREAM_WARMUP_ONSETS onsets are held back and judged against their
+        own mean, so a weak onset at the very start isn't kept just because
+        nothing stronger has been heard yet.
 
-            lane_counts[lane] += 1
-            notes.append((round(onset_time, 3), lane))
-            last_note_time = onset_time
+        Args:
+            progress: optional callback(seconds_decoded, total_seconds) per block
 
-        print(f"[ChartGen] Lane distribution: Left={lane_counts[0]}, Center={lane_counts[1]}, Right={lane_counts[2]}")
+        Returns (as the generator's StopIteration value):
+            dict with "tempo" and "duration"
+        """
+        import onset_analysis
 
-        print(f"[ChartGen] Generated {len(notes)} notes before difficulty filter")
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
 
-        # Apply difficulty filter
-        notes = self._apply_difficulty(notes, difficulty, tempo)
-        print(f"[ChartGen] Final note count: {len(notes)} ({difficulty})")
-        print(f"[ChartGen] ===== CHART GENERATION COMPLETE =====")
+        log.info(f"Streaming analysis: {audio_path} ({block_seconds:.0f}s blocks)")
+        analyzer = onset_analysis.StreamingAnalyzer(SAMPLE_RATE, HOP_LENGTH)
+        state = {"strength_sum": 0.0, "strength_count": 0, "last_time": -1, "warmup": []}
+
+        for block, position, total in onset_analysis.stream_audio(audio_path, SAMPLE_RATE, block_seconds):
+            yield from self._stream_notes_from_onsets(analyzer, analyzer.feed(block), state)
+            if progress is not None:
+                progress(position, total)
+        yield from self._stream_notes_from_onsets(analyzer, analyzer.finish(), state, final=True)
+
+        tempo = analyzer.tempo()
+        log.info(f"Streaming analysis done: {analyzer.duration:.1f}s, BPM: {tempo:.1f}")
+        return {"tempo": tempo, "duration": analyzer.duration}
+
+    def _stream_notes_from_onsets(self, analyzer, onsets, state, final=False):
+        """_notes_from_analysis for one block of onsets, carrying running state between blocks"""
+        frames, strengths, centroids = onsets
+        warmup = state["warmup"] is not None
+        if warmup:
+            # Hold the first onsets back until there are enough to average
+            state["warmup"].append(onsets)
+            frames, strengths, centroids = (np.concatenate(parts) for parts in zip(*state["warmup"]))
+            if len(frames) < STREAM_WARMUP_ONSETS and not final:
+                return []
+            state["warmup"] = None
+        if len(frames) == 0:
+            return []
+
+        # Skip weak onsets, against the running mean strength up to each onset
+        if warmup:
+            running_mean = np.full(len(frames), np.mean(strengths))
+        else:
+            counts = state["strength_count"] + np.arange(1, len(frames) + 1)
+            running_mean = (state["strength_sum"] + np.cumsum(strengths)) / counts
+        state["strength_sum"] += float(np.sum(strengths))
+        state["strength_count"] += len(frames)
+        keep = strengths >= running_mean * self.onset_threshold
+
+        times = frames[keep] * HOP_LENGTH / float(SAMPLE_RATE)
+        gap_keep = _min_gap_mask(times, self.min_note_gap, state["last_time"])
+        if np.any(gap_keep):
+            state["last_time"] = times[gap_keep][-1]
+
+        centroid_33, centroid_66 = analyzer.centroid_percentiles([33, 66])
+        lanes = np.digitize(centroids[keep][gap_keep], [centroid_33, centroid_66])
+        return list(zip(np.round(times[gap_keep], 3).tolist(), lanes.tolist()))
+
+    def generate_streaming(self, audio_path, song_name=None, difficulty='medium',
+                           block_seconds=STREAM_BLOCK_SECONDS, progress=None):
+        """Build a chart with stream_notes() - for tracks too long to decode in one go"""
+        stream = self.stream_notes(audio_path, block_seconds, progress)
+        notes = []
+        while True:
+            try:
+                notes.append(next(stream))
+            except StopIteration as done:
+                summary = done.value
+                break
 
+        if song_name is None:
+            song_name = os.path.splitext(os.path.basename(audio_path))[0]
+        notes = self._apply_difficulty(notes, difficulty, summary["tempo"])
+        log.info(f"Final note count: {len(notes)} ({difficulty})")
         return {
             "name": song_name,
             "file": os.path.basename(audio_path),
-            "bpm": int(tempo),
-            "duration": round(duration, 2),
+            "bpm": int(summary["tempo"]),
+            "duration": round(summary["duration"], 2),
             "difficulty": difficulty,
             "notes": notes
         }
@@ -199,25 +496,15 @@ class ChartGenerator:
 
         if difficulty == 'easy':
             # Keep only ~30% of notes, increase min gap
-            filtered = []
-            last_time = -1
             min_gap = 0.5  # Larger gap for easy
-            for time, lane in notes:
-                if time - last_time >= min_gap:
-                    filtered.append((time, lane))
-                    last_time = time
-            return filtered
+            keep = _min_gap_mask([note_time for note_time, lane in notes], min_gap)
+            return [note for note, kept in zip(notes, keep) if kept]
 
         elif difficulty == 'medium':
             # Keep ~50% of notes
-            filtered = []
-            last_time = -1
             min_gap = 0.25
-            for time, lane in notes:
-                if time - last_time >= min_gap:
-                    filtered.append((time, lane))
-                    last_time = time
-            return filtered
+            keep = _min_gap_mask([note_time for note_time, lane in notes], min_gap)
+            return [note for note, kept in zip(notes, keep) if kept]
 
         elif difficulty == 'hard':
             # Keep most notes
@@ -228,79 +515,290 @@ class ChartGenerator:
             enhanced = list(notes)
             additions = []
 
-            for i, (time, lane) in enumerate(notes):
+            for i, (note_time, lane) in enumerate(notes):
                 # 25% chance to add a simultaneous note in different lane
                 if np.random.random() < 0.25:
-                    other_lane = (lane + np.random.choice([1, 2])) % 3
-                    additions.append((time, other_lane))
+                    other_lane = int((lane + np.random.choice([1, 2])) % 3)
+                    additions.append((note_time, other_lane))
 
             enhanced.extend(additions)
             return sorted(enhanced, key=lambda x: (x[0], x[1]))
 
         return notes
 
-    def generate_and_cache(self, audio_path, cache_path=None, **kwargs):
-        """Generate chart and save to cache file"""
-        if cache_path is None:
-            base = os.path.splitext(audio_path)[0]
-            cache_path = base + "_chart.json"
-
-        # Check if cache exists and is newer than audio file
-        if os.path.exists(cache_path):
-            audio_mtime = os.path.getmtime(audio_path)
-            cache_mtime = os.path.getmtime(cache_path)
-            if cache_mtime > audio_mtime:
-                print(f"[ChartGen] Loading from cache: {cache_path}")
-                with open(cache_path, 'r') as f:
-                    return json.load(f)
-
-        # Generate new chart
-        chart = self.generate(audio_path, **kwargs)
-
-        # Save to cache
-        print(f"[ChartGen] Saving to cache: {cache_path}")
-        with open(cache_path, 'w') as f:
-            json.dump(chart, f, indent=2)
+    def cache_params(self):
+        """Every setting that changes the generated notes - part of the cache key"""
+        return {
+            "sr": SAMPLE_RATE,
+            "engine": self.engine,
+            "min_note_gap": self.min_note_gap,
+            "onset_threshold": self.onset_threshold,
+            "difficulties": list(DIFFICULTIES),
+        }
 
-        return chart
+    def generate_and_cache(self, audio_path, cache_path=None, difficulty='medium', song_name=None,
+                           progress=None):
+        """Generate charts for every difficulty and store them together in the chart cache.
 
-    def load_or_generate(self, audio_path, **kwargs):
-        """Load from cache if available, otherwise generate"""
-        base = os.path.splitext(audio_path)[0]
-        cache_path = base + "_chart.json"
+        The cache is keyed by the audio content and generator parameters
+        (see chart_cache.py). Pass cache_path to also export the chart to
+        that file - JSON, or the binary chart format for a .bin path.
 
-        if os.path.exists(cache_path):
-            print(f"[ChartGen] Loading cached chart: {cache_path}")
-            with open(cache_path, 'r') as f:
-                return json.load(f)
+        progress, if given, is called as progress(stage, fraction) with a short
+        stage name and 0.0-1.0 as the work advances. It runs on the calling
+        thread, so a UI should hand it over to its main loop.
 
-        return self.generate_and_cache(audio_path, cache_path, **kwargs)
+        Returns the chart for the requested difficulty.
+        """
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
 
+        _report_progress(progress, "Checking cache", 0.0)
+        key = self.cache.key(audio_path, self.cache_params())
+        chart = self.cache.get(key)
 
-def generate_chart_for_song(audio_path, difficulty='medium'):
+        if chart is not None:
+            log.info(f"Loading from cache: {self.cache.path_for(key)}")
+        else:
+            # Generate all tiers from one analysis pass
+            charts = self.generate_all(audio_path, song_name, progress=progress)
+            chart = combine_difficulties(charts, default=difficulty)
+            log.info(f"Saving to cache: {self.cache.path_for(key)}")
+            self.cache.put(key, chart)
+
+        if cache_path is not None:
+            log.info(f"Exporting chart: {cache_path}")
+            if cache_path.endswith(chart_format.BINARY_SUFFIX):
+                chart_format.save_chart(cache_path, chart)
+            else:
+                with open(cache_path, 'w') as f:
+                    json.dump(chart, f, indent=2)
+
+        # The same audio may be cached under another filename - report this one
+        if song_name is None:
+            song_name = os.path.splitext(os.path.basename(audio_path))[0]
+        selected = dict(select_difficulty(chart, difficulty))
+        selected["name"] = song_name
+        selected["file"] = os.path.basename(audio_path)
+        _report_progress(progress, "Ready", 1.0)
+        return selected
+
+    def load_or_generate(self, audio_path, difficulty='medium', song_name=None):
+        """Load from the chart cache if available, otherwise generate"""
+        return self.generate_and_cache(audio_path, difficulty=difficulty, song_name=song_name)
+
+
+def _report_progress(progress, stage, fraction):
+    if progress is not None:
+        progress(stage, fraction)
+
+
+def _min_gap_mask(times, min_gap, last_time=-1):
+    """
+    Greedy gap filter over sorted times: keep a time only if it is at least
+    min_gap after the previously kept one. Returns a boolean mask.
+
+    Each step jumps straight to the next keepable time with searchsorted,
+    so the Python-level work is per kept note rather than per candidate.
+    """
+    times = np.asarray(times, dtype=float)
+    n = len(times)
+    keep = np.zeros(n, dtype=bool)
+
+    # Fast path: nothing is too close together
+    if n == 0 or (times[0] - last_time >= min_gap and np.all(np.diff(times) >= min_gap)):
+        keep[:] = True
+        return keep
+
+    i = 0
+    while i < n:
+        j = i + int(np.searchsorted(times[i:], last_time + min_gap, side='left'))
+        # searchsorted works on last_time + min_gap - nudge j so the exact
+        # "time - last_time >= min_gap" comparison decides, as the loop did
+        while j < n and times[j] - last_time < min_gap:
+            j += 1
+        while j > i and times[j - 1] - last_time >= min_gap:
+            j -= 1
+        if j >= n:
+            break
+        keep[j] = True
+        last_time = times[j]
+        i = j + 1
+    return keep
+
+
+def combine_difficulties(charts, default='medium'):
+    """Merge per-difficulty charts into one chart dict holding every tier.
+
+    The top-level "notes" stay the default tier so older loaders keep working.
+    """
+    if default not in charts:
+        default = next(iter(charts))
+    combined = dict(charts[default])
+    combined["difficulties"] = {name: chart["notes"] for name, chart in charts.items()}
+    return combined
+
+
+def select_difficulty(chart, difficulty):
+    """Return a single-difficulty view of a chart (no-op for single-tier charts)"""
+    tiers = chart.get("difficulties")
+    if not tiers or difficulty not in tiers:
+        return chart
+    selected = {key: value for key, value in chart.items() if key != "difficulties"}
+    selected["difficulty"] = difficulty
+    selected["notes"] = tiers[difficulty]
+    return selected
+
+
+def generate_chart_for_song(audio_path, difficulty='medium', engine=None):
     """Convenience function to generate a chart"""
-    generator = ChartGenerator()
+    generator = ChartGenerator(engine=engine)
     return generator.generate(audio_path, difficulty=difficulty)
 
 
+# ========== BATCH GENERATION ==========
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.flac')
+
+
+def find_audio_files(song_dir):
+    """Walk a song directory and return every audio file in it (sorted)"""
+    audio_files = []
+    for root, dirs, files in os.walk(song_dir):
+        for filename in files:
+            # Skip generated temp sounds like _calibration_tick.wav
+            if filename.startswith('_'):
+                continue
+            if filename.lower().endswith(AUDIO_EXTENSIONS):
+                audio_files.append(os.path.join(root, filename))
+    return sorted(audio_files)
+
+
+def _batch_worker(audio_path, difficulty, engine=None):
+    """Process pool entry point - builds one chart and never raises,
+    so a bad file only fails its own job"""
+    start = time.perf_counter()
+    try:
+        generator = ChartGenerator(engine=engine)
+        chart = generator.generate_and_cache(audio_path, difficulty=difficulty)
+        return {"file": audio_path, "notes": len(chart["notes"]),
+                "seconds": time.perf_counter() - start, "error": None}
+    except Exception as e:
+        return {"file": audio_path, "notes": 0,
+                "seconds": time.perf_counter() - start,
+                "error": f"{type(e).__name__}: {e}"}
+
+
+def generate_batch(song_dir, difficulty='medium', workers=None, engine=None):
+    """
+    Generate (and cache) charts for every audio file in a song directory,
+    spreading the files across a process pool.
+
+    Args:
+        song_dir: Directory to walk for audio files
+        difficulty: 'easy', 'medium', 'hard', or 'expert'
+        workers: Number of worker processes (default: all cores but one)
+        engine: 'librosa' or 'numpy' (default: librosa if installed)
+
+    Returns:
+        list of result dicts (file, notes, seconds, error) in completion order
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from concurrent.futures.process import BrokenProcessPool
+
+    audio_files = find_audio_files(song_dir)
+    if not audio_files:
+        batch_log.warning(f"No audio files found in {song_dir}")
+        return []
+
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 2) - 1)
+    workers = min(workers, len(audio_files))
+
+    batch_log.info(f"Generating {len(audio_files)} charts with {workers} worker(s)...")
+    results = []
+    pending = list(audio_files)
+    retried = False
+
+    while pending:
+        crashed = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_batch_worker, path, difficulty, engine): path for path in pending}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    # A worker died hard (e.g. decoder segfault) and took the pool down
+                    crashed.append(path)
+                    continue
+                results.append(result)
+                status = "FAILED" if result["error"] else "ok"
+                detail = result["error"] or f"{result['notes']} notes"
+                (batch_log.warning if result["error"] else batch_log.info)(
+                    f"({len(results)}/{len(audio_files)}) {status} "
+                    f"{os.path.basename(path)} - {detail} ({result['seconds']:.1f}s)")
+
+        if crashed and not retried:
+            # Give the unfinished jobs one more chance in a fresh pool
+            batch_log.warning(f"Worker pool crashed, retrying {len(crashed)} unfinished file(s)...")
+            pending = crashed
+            retried = True
+        else:
+            for path in crashed:
+                results.append({"file": path, "notes": 0, "seconds": 0.0,
+                                "error": "worker process crashed"})
+                batch_log.warning(f"({len(results)}/{len(audio_files)}) FAILED "
+                                  f"{os.path.basename(path)} - worker process crashed")
+            pending = []
+
+    failed = [r for r in results if r["error"]]
+    batch_log.info(f"Done: {len(results) - len(failed)} ok, {len(failed)} failed")
+    return results
+
+
 # Command-line usage
 if __name__ == "__main__":
     import sys
 
-    if len(sys.argv) < 2:
-        print("Usage: python chart_generator.py <audio_file> [difficulty]")
+    # --numpy selects the NumPy-only engine (no librosa/numba needed)
+    # --stream analyzes block by block in constant memory (NumPy engine, no cache)
+    stream = '--stream' in sys.argv
+    engine = 'numpy' if '--numpy' in sys.argv or stream else None
+    args = [arg for arg in sys.argv[1:] if arg not in ('--numpy', '--stream')]
+
+    if len(args) < 1:
+        print("Usage: python chart_generator.py <audio_file|song_dir> [difficulty] [workers] [--numpy] [--stream]")
         print("Difficulties: easy, medium, hard, expert")
+        print("Pass a directory to generate charts for every song in it in parallel")
+        print("--numpy analyzes with onset_analysis.py instead of librosa")
+        print("--stream analyzes long tracks block by block in constant memory")
         sys.exit(1)
 
-    audio_file = sys.argv[1]
-    difficulty = sys.argv[2] if len(sys.argv) > 2 else 'medium'
+    audio_file = args[0]
+    difficulty = args[1] if len(args) > 1 else 'medium'
 
-    if not LIBROSA_AVAILABLE:
-        print("Error: librosa is required. Install with: pip install librosa")
+    # Show progress on the command line (batch workers inherit it through the environment)
+    os.environ.setdefault('GAME_LOG_LEVEL', 'INFO')
+    game_logging.setup(os.environ['GAME_LOG_LEVEL'])
+
+    if engine is None and not LIBROSA_AVAILABLE:
+        print("Error: librosa is required. Install with: pip install librosa (or pass --numpy)")
         sys.exit(1)
 
-    generator = ChartGenerator()
-    chart = generator.generate_and_cache(audio_file, difficulty=difficulty)
+    # Batch mode - whole song library across a process pool
+    if os.path.isdir(audio_file):
+        workers = int(args[2]) if len(args) > 2 else None
+        results = generate_batch(audio_file, difficulty=difficulty, workers=workers, engine=engine)
+        sys.exit(1 if any(r["error"] for r in results) else 0)
+
+    generator = ChartGenerator(engine=engine)
+    if stream:
+        chart = generator.generate_streaming(
+            audio_file, difficulty=difficulty,
+            progress=lambda done, total: print(f"[ChartGen] Analyzed {done:.0f}/{total:.0f}s"))
+    else:
+        chart = generator.generate_and_cache(audio_file, difficulty=difficulty)
 
     print("\n" + "="*50)
     print(f"Song: {chart['name']}")
@@ -311,6 +809,7 @@ if __name__ == "__main__":
 
     # Print first 10 notes as preview
     print("\nFirst 10 notes:")
-    for time, lane in chart['notes'][:10]:
+    for note in chart['notes'][:10]:
+        note_time, lane = note[0], note[1]
         lane_names = ['LEFT', 'CENTER', 'RIGHT']
-        print(f"  {time:6.2f}s - {lane_names[lane]}")
+        print(f"  {note_time:6.2f}s - {lane_names[lane]}")
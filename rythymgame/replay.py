@@ -0,0 +1,295 @@
+# Replay recording and playback for rhythm sessions
+# RhythmGame records every song it plays: the chart it played (song, difficulty
+# and a hash of the notes), the calibration in effect (audio_offset,
+# audio_latency), the window height and note speed, and - in the order the
+# game handled them - every frame's song time and dt and every press/release
+# with its song clock timestamp. ReplayPlayer feeds that log back through the
+# same NoteField, SpawnSchedule and Referee the game uses, without Kivy or
+# audio, so it reproduces the session's scores and judgements exactly and
+# runs far faster than real time.
+#
+#   python replay.py replays/kevin-macleod-hall-of-the-mountain-king_20260101_120000.replay.json.gz
+#   python replay.py replays/*.replay.json.gz              (bulk check - exit status 1 on any mismatch)
+#   python replay.py session.replay.json.gz --chart chart.bin --timeline
+
+import gzip
+import hashlib
+import json
+import os
+import time
+
+import chart_format
+from rhythm_engine import NoteField, Referee, fall_time, field_time, load_chart_notes
+from rhythm_notes import SpawnSchedule
+
+REPLAY_VERSION = 3  # 2: hold releases judged by their timestamp; 3: inputs judged at clock_time - audio_offset
+REPLAY_SUFFIX = '.replay.json.gz'
+DEFAULT_REPLAY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'replays')
+
+# Event log entries - short lists, in the order the game handled them
+FRAME = 'f'    # [FRAME, song_time, dt] - one update_game() call
+PRESS = 'd'    # [PRESS, player, lane, clock_time] - check_hit(); judged at clock_time - audio_offset
+RELEASE = 'u'  # [RELEASE, player, lane, clock_time] - release_hold(); judged at clock_time - audio_offset
+OFFSET = 'o'   # [OFFSET, audio_offset] - offset slider moved (applies from the next frame or input)
+HEIGHT = 'h'   # [HEIGHT, height] - window resized (changes the note fall time)
+
+
+def chart_hash(notes):
+    """Short fingerprint of a chart's notes - a replay only reproduces on the chart it was played on"""
+    return hashlib.sha1(chart_format.notes_to_array(notes).tobytes()).hexdigest()[:16]
+
+
+class ReplayRecorder:
+    """Builds a replay log while a song is played (cheap: one list append per event)"""
+
+    def __init__(self):
+        self.replay = None
+
+    @property
+    def recording(self):
+        return self.replay is not None
+
+    def start(self, song, difficulty, notes, num_players, note_speed, height, audio_offset, audio_latency):
+        self.replay = {
+            "version": REPLAY_VERSION,
+            "chart": {"song": song, "difficulty": difficulty, "hash": chart_hash(notes), "notes": len(notes)},
+            "recorded": time.strftime('%Y-%m-%d %H:%M:%S'),
+            "num_players": num_players,
+            "note_speed": note_speed,
+            "height": height,
+            "audio_offset": audio_offset,
+            "audio_latency": audio_latency,
+            "events": [],
+            "result": None,
+        }
+        self._height = height
+        self._offset = audio_offset
+
+    def frame(self, song_time, dt, height, audio_offset):
+        if not self.recording:
+            return
+        events = self.replay["events"]
+        if height != self._height:
+            self._height = height
+            events.append([HEIGHT, height])
+        self._offset_changed(audio_offset)
+        events.append([FRAME, song_time, dt])
+
+    def press(self, player, lane, clock_time, audio_offset):
+        self._input(PRESS, player, lane, clock_time, audio_offset)
+
+    def release(self, player, lane, clock_time, audio_offset):
+        self._input(RELEASE, player, lane, clock_time, audio_offset)
+
+    def _offset_changed(self, audio_offset):
+        if audio_offset != self._offset:
+            self._offset = audio_offset
+            self.replay["events"].append([OFFSET, audio_offset])
+
+    def _input(self, kind, player, lane, clock_time, audio_offset):
+        if not self.recording:
+            return
+        self._offset_changed(audio_offset)
+        self.replay["events"].append([kind, player, lane, clock_time])
+
+    def finish(self, referee, completed=True):
+        """Attach the outcome the game arrived at and hand back the replay (None if not recording)"""
+        replay, self.replay = self.replay, None
+        if replay is not None:
+            replay["result"] = {
+                "completed": completed,
+                "scores": list(referee.scores),
+                "max_combos": list(referee.max_combos),
+                "judgements": [dict(counts) for counts in referee.judgements],
+            }
+        return replay
+
+
+def replay_path(replay, replay_dir=None):
+    """replays/<song>_<stamp>.replay.json.gz (REPLAY_DIR overrides the directory)"""
+    replay_dir = replay_dir or os.environ.get('REPLAY_DIR') or DEFAULT_REPLAY_DIR
+    song = os.path.splitext(os.path.basename(replay["chart"]["song"]))[0]
+    stamp = time.strftime('%Y%m%d_%H%M%S')
+    return os.path.join(replay_dir, f"{song}_{stamp}{REPLAY_SUFFIX}")
+
+
+def save_replay(replay, path=None):
+    """Write a replay as gzipped JSON (floats round-trip exactly); returns the path"""
+    path = path or replay_path(replay)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(replay, f, separators=(',', ':'))
+    return path
+
+
+def load_replay(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        replay = json.load(f)
+    if replay.get("version") != REPLAY_VERSION:
+        raise ValueError(f"Unsupported replay version {replay.get('version')} in {path}")
+    return replay
+
+
+def load_replay_notes(replay, chart_path=None, song_dir=None):
+    """
+    The notes a replay was played on: from chart_path, or else the chart next
+    to the song's audio or in the chart cache, just as the game loads it.
+    Raises ValueError if the notes don't match the recorded chart hash.
+    """
+    chart = replay["chart"]
+    if chart_path is not None:
+        notes = load_chart_notes(chart_path, chart["difficulty"])
+    else:
+        from chart_generator import ChartGenerator, select_difficulty
+
+        song_dir = song_dir or os.path.dirname(os.path.abspath(__file__))
+        audio_path = os.path.join(song_dir, chart["song"])
+        song_chart = chart_format.load_song_chart(audio_path)
+        if song_chart is None:
+            song_chart = ChartGenerator().generate_and_cache(audio_path, difficulty=chart["difficulty"])
+        notes = select_difficulty(song_chart, chart["difficulty"])["notes"]
+
+    notes = chart_format.notes_to_array(notes)
+    if chart_hash(notes) != chart["hash"]:
+        raise ValueError(f"Chart for {chart['song']} ({chart['difficulty']}) has changed since the replay was recorded")
+    return notes
+
+
+class ReplayPlayer:
+    """
+    Re-drives a recorded session headless: every frame spawns, holds,
+    positions and expires notes exactly as RhythmGame.update_game did, and
+    every press/release goes through the Referee like check_hit/release_hold.
+    """
+
+    def __init__(self, replay, notes):
+        self.replay = replay
+        self.schedule = SpawnSchedule(notes)
+        self.field = NoteField()
+        self.field.pool.prewarm(replay["num_players"])
+        self.referee = Referee(self.field, replay["num_players"])
+
+    def run(self, timeline=False):
+        """
+        Play the log to the end and return a report dict. With timeline, the
+        report also lists every judgement as (song_time, player, lane, rating).
+        """
+        replay = self.replay
+        note_speed = replay["note_speed"]
+        height = replay["height"]
+        audio_offset = replay["audio_offset"]
+        schedule = self.schedule
+        schedule.rewind()
+        field = self.field
+        field.clear()
+        referee = self.referee
+        referee.reset()
+        judged = [] if timeline else None
+
+        wall_start = time.perf_counter()
+        frames = 0
+        first_time = last_time = None
+        for event in replay["events"]:
+            kind = event[0]
+            if kind == FRAME:
+                _, song_time, dt = event
+                if first_time is None:
+                    first_time = song_time
+                last_time = song_time
+                frames += 1
+                schedule.set_fall_time(fall_time(height, note_speed))
+                for note_time, lane, duration in schedule.due(song_time):
+                    for player in range(referee.num_players):
+                        field.spawn(player, lane, note_time, note_speed, duration)
+                referee.hold(field_time(song_time, audio_offset))
+                field.position(field_time(song_time, audio_offset), note_speed)
+                missed = referee.expire(0)
+                if judged is not None:
+                    judged.extend((song_time, player, None, "MISS") for player in missed)
+            elif kind == PRESS:
+                _, player, lane, clock_time = event
+                hit_time = field_time(clock_time, audio_offset)
+                result = referee.press(player, lane, hit_time)
+                if judged is not None and result is not None:
+                    judged.append((hit_time, player, lane, result[0]))
+            elif kind == RELEASE:
+                _, player, lane, clock_time = event
+                release_time = field_time(clock_time, audio_offset)
+                result = referee.release(player, lane, release_time)
+                if judged is not None and result is not None:
+                    judged.append((release_time, player, lane, result[0]))
+            elif kind == OFFSET:
+                audio_offset = event[1]
+            elif kind == HEIGHT:
+                height = event[1]
+
+        wall = time.perf_counter() - wall_start
+        song_seconds = (last_time - first_time) if frames else 0.0
+        report = {
+            "song": replay["chart"]["song"],
+            "frames": frames,
+            "song_seconds": song_seconds,
+            "wall_seconds": wall,
+            "speedup": song_seconds / wall if wall > 0 else float('inf'),
+            "scores": referee.scores,
+            "max_combos": referee.max_combos,
+            "judgements": referee.judgements,
+            "matches": self.matches(referee),
+        }
+        if judged is not None:
+            report["timeline"] = judged
+        return report
+
+    def matches(self, referee):
+        """True when the replayed outcome equals the recorded one (None if nothing was recorded)"""
+        result = self.replay.get("result")
+        if not result:
+            return None
+        return (result["scores"] == referee.scores
+                and result["max_combos"] == referee.max_combos
+                and result["judgements"] == referee.judgements)
+
+
+def print_report(path, report):
+    status = {True: "OK", False: "MISMATCH", None: "no recorded result"}[report["matches"]]
+    print(f"[Replay] {os.path.basename(path)}: {status} - {report['frames']} frames, "
+          f"{report['song_seconds']:.1f}s of song in {report['wall_seconds']:.3f}s "
+          f"({report['speedup']:.0f}x real time)")
+    for player, score in enumerate(report["scores"]):
+        counts = ", ".join(f"{rating} {count}" for rating, count in report["judgements"][player].items())
+        print(f"[Replay]   Player {player + 1}: {score} points, max combo {report['max_combos'][player]} ({counts})")
+    for song_time, player, lane, rating in report.get("timeline", ()):
+        lane_text = "-" if lane is None else lane
+        print(f"[Replay]   {song_time:8.3f}s  P{player + 1} lane {lane_text}  {rating}")
+
+
+# Command-line usage: re-run recorded sessions and check they still score the same
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Re-run recorded rhythm sessions headless")
+    parser.add_argument("replays", nargs="+", help="replay files (.replay.json.gz)")
+    parser.add_argument("--chart", default=None, help="chart .json or .bin (default: find it from the song name)")
+    parser.add_argument("--song-dir", default=None, help="where the songs live (default: next to this script)")
+    parser.add_argument("--timeline", action="store_true", help="list every judgement")
+    parser.add_argument("--json", action="store_true", help="print the reports as JSON")
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.replays:
+        try:
+            replay = load_replay(path)
+            notes = load_replay_notes(replay, args.chart, args.song_dir)
+        except (OSError, ValueError) as e:
+            print(f"[Replay] {os.path.basename(path)}: {e}")
+            failed = True
+            continue
+        report = ReplayPlayer(replay, notes).run(timeline=args.timeline)
+        failed = failed or report["matches"] is False
+        if args.json:
+            print(json.dumps(dict(report, replay=path), indent=2))
+        else:
+            print_report(path, report)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,452 @@
+# Rhythm engine - spawning, judging and scoring without Kivy
+# RhythmGame (rythym.py) draws, plays audio and reads input; the rules it
+# plays by live here so they can also run headless: Simulation drives the same
+# NoteField, SpawnSchedule and Referee from a synthetic clock, with an
+# AutoplayBot pressing every note, for regression tests and benchmarks
+# (replay.py re-drives them from a recorded session instead).
+#
+#   python rhythm_engine.py kevin-macleod-hall-of-the-mountain-king_chart.json
+#   python rhythm_engine.py chart.json --error-ms 30 --players 4 --fps 144
+
+import json
+import random
+import time
+from collections import deque
+
+import chart_format
+from rhythm_notes import NotePool, SpawnSchedule
+
+# Target buttons sit at this y - a note's head reaches it at its chart time
+TARGET_Y = 70
+
+# Calibration defaults (seconds). audio_offset moves the whole note field -
+# notes are drawn, held and judged at clock - audio_offset, so a press as a note
+# crosses the target is on time. audio_latency only applies when recording
+# charts by ear, where there are no notes to watch.
+DEFAULT_AUDIO_OFFSET = 0.0
+DEFAULT_AUDIO_LATENCY = 0.15  # Measured via sync_tester.py on the development machine
+
+# Judgement windows (seconds either side of the note time, on the note field)
+PERFECT_WINDOW = 0.045
+GREAT_WINDOW = 0.085
+GOOD_WINDOW = 0.130
+HIT_WINDOW = 0.240  # Presses further off than this don't touch the note
+
+# (max timing error, points, rating, popup color) - first match wins
+HIT_JUDGEMENTS = [
+    (PERFECT_WINDOW, 100, "PERFECT", (1, 1, 0, 1)),
+    (GREAT_WINDOW, 75, "GREAT", (0, 1, 0, 1)),
+    (GOOD_WINDOW, 50, "GOOD", (0, 0.7, 1, 1)),
+    (HIT_WINDOW, 25, "OK", (0.7, 0.7, 0.7, 1)),
+]
+
+# Hold releases use the same windows, timed from the end of the hold: {rating: combo effect}
+RELEASE_EFFECTS = {"PERFECT": 'extend', "GREAT": 'extend', "GOOD": 'extend', "OK": 'keep'}
+MISS_COLOR = (0.5, 0.5, 0.5, 1)
+RATINGS = ("PERFECT", "GREAT", "GOOD", "OK", "MISS")
+
+
+def field_time(clock_time, audio_offset):
+    """Song time on the note field for a song clock reading - what notes are drawn, held and judged at"""
+    return clock_time - audio_offset
+
+
+def judge_hit(timing_error):
+    """(points, rating, color) for a press timing_error seconds off, or None outside HIT_WINDOW"""
+    for window, points, rating, color in HIT_JUDGEMENTS:
+        if timing_error <= window:
+            return points, rating, color
+    return None
+
+
+def judge_release(timing_error):
+    """
+    (points, rating, color, combo effect) for releasing a hold note
+    timing_error seconds after its end (negative = early), judged by the same
+    windows as presses. The combo effect is 'extend', 'keep' or 'break';
+    releasing further off than HIT_WINDOW is a MISS.
+    """
+    judgement = judge_hit(abs(timing_error))
+    if judgement is None:
+        return 0, "MISS", MISS_COLOR, 'break'
+    points, rating, color = judgement
+    return points, rating, color, RELEASE_EFFECTS[rating]
+
+
+def combo_points(points, combo):
+    """Points with the combo bonus (up to +100% at a 10 combo)"""
+    return points + (points * min(combo, 10) // 10)
+
+
+def hold_start_points(points, combo):
+    """Hitting the head of a hold note is worth half, with half the combo bonus"""
+    return (points // 2) + (points * min(combo, 10) // 20)
+
+
+def fall_time(height, note_speed):
+    """Seconds a note takes from spawning (height + 10) to the target"""
+    return (height + 10 - TARGET_Y) / note_speed
+
+
+class NoteField:
+    """
+    The notes in play, one time-ordered deque per (player, lane). Chart notes
+    spawn in time order, so the next note to be missed is at the front of
+    its lane's queue and the hit candidate is among the first few.
+    """
+
+    def __init__(self, pool=None):
+        self.pool = pool if pool is not None else NotePool()
+        self.lanes = {}  # {(player, lane): deque of notes in play, earliest first}
+
+    def spawn(self, player, lane, note_time, speed, duration=0):
+        note = self.pool.acquire(lane, player, speed, duration, note_time)
+        self.lanes.setdefault((player, lane), deque()).append(note)
+        return note
+
+    def notes(self):
+        """Every note in play (a new list)"""
+        return [note for queue in self.lanes.values() for note in queue]
+
+    def count(self):
+        return sum(len(queue) for queue in self.lanes.values())
+
+    def position(self, visual_time, speed, target_y=TARGET_Y):
+        """
+        Place every note from the clock: y = target_y + (note time - visual
+        time) * speed - one pass over the pool's arrays (the field's notes are
+        the pool's active ones)
+        """
+        self.pool.place(visual_time, target_y, speed)
+
+    def hit_candidate(self, player, lane, offset, reach=float('inf')):
+        """
+        (note, |offset(note)|) for the note closest to an input in one lane,
+        or (None, inf). offset(note) is the signed distance from the input to
+        the note - a time or pixel distance, positive while the note is still
+        ahead of the input - and grows along the lane queue. Notes being held
+        and notes more than reach behind the input (missed, but not yet
+        scrolled off screen) are skipped; of the rest, only the last note
+        behind the input and the first one ahead can be closest.
+        """
+        closest_note = None
+        closest_distance = float('inf')
+        for note in self.lanes.get((player, lane), ()):
+            if not note.active or (note.is_hold_note and note.hold_started):
+                continue
+            note_offset = offset(note)
+            if note_offset < -reach:
+                continue
+            if abs(note_offset) < closest_distance:
+                closest_distance = abs(note_offset)
+                closest_note = note
+            if note_offset >= 0:
+                break  # Later notes are further ahead
+        return closest_note, closest_distance
+
+    def expired(self, bottom_y):
+        """
+        Notes whose head has fallen below bottom_y, read from the front of each
+        lane queue (started hold notes stay put at the target and are skipped)
+        """
+        below = self.pool.below(bottom_y)
+        if not below.any():
+            return []
+        held = self.pool.view('hold_started') & self.pool.view('is_hold_note')
+        expired = []
+        for queue in self.lanes.values():
+            for note in queue:
+                if held[note.slot]:
+                    continue
+                if not below[note.slot]:
+                    break
+                expired.append(note)
+        return expired
+
+    def remove(self, note):
+        """Take a note out of play and return it to the pool"""
+        queue = self.lanes.get((note.player, note.lane))
+        if queue and note in queue:
+            # Removed notes are almost always at the front, so this is cheap
+            queue.remove(note)
+        self.pool.release(note)
+
+    def clear(self):
+        for queue in self.lanes.values():
+            for note in queue:
+                self.pool.release(note)
+        self.lanes = {}
+
+
+class Referee:
+    """
+    Judges presses and hold releases against a NoteField and keeps every
+    player's score, combo and judgement counts. RhythmGame, Simulation and
+    ReplayPlayer all score through this, so a replay or a simulation plays by
+    exactly the rules the game does. Methods return what happened so the
+    caller can show it.
+    """
+
+    def __init__(self, field, num_players=1):
+        self.field = field
+        self.reset(num_players)
+
+    def reset(self, num_players=None):
+        if num_players is not None:
+            self.num_players = num_players
+        self.scores = [0] * self.num_players
+        self.combos = [0] * self.num_players
+        self.max_combos = [0] * self.num_players
+        self.judgements = [dict.fromkeys(RATINGS, 0) for _ in range(self.num_players)]
+        self.active_holds = {}  # {(player, lane): note} - hold notes being held
+
+    def _combo_changed(self, player):
+        if self.combos[player] > self.max_combos[player]:
+            self.max_combos[player] = self.combos[player]
+
+    def press(self, player, lane, hit_time):
+        """
+        Judge a press at hit_time (the input's field_time) by its distance to
+        the closest note in the lane. Returns (rating, color), or None when no
+        note was within HIT_WINDOW. Hitting a hold note's head starts the hold;
+        its rating is counted on release.
+        """
+        note, timing_error = self.field.hit_candidate(
+            player, lane, lambda n: n.time - hit_time, HIT_WINDOW)
+        judgement = judge_hit(timing_error) if note else None
+        if judgement is None:
+            return None
+        points, rating, color = judgement
+        self.combos[player] += 1
+        self._combo_changed(player)
+        if note.is_hold_note:
+            # Start holding - the note stays in play until release()
+            note.start_hold()
+            self.active_holds[(player, lane)] = note
+            self.scores[player] += hold_start_points(points, self.combos[player])
+        else:
+            note.deactivate()
+            self.field.remove(note)
+            self.scores[player] += combo_points(points, self.combos[player])
+            self.judgements[player][rating] += 1
+        return rating, color
+
+    def release(self, player, lane, release_time):
+        """
+        Judge letting go of the hold note held in a lane at release_time (the
+        input's field_time) against the note's end: (rating, color), or None
+        if none is held
+        """
+        note = self.active_holds.pop((player, lane), None)
+        if note is None:
+            return None
+        points, rating, color, combo_effect = judge_release(release_time - (note.time + note.duration))
+        if combo_effect == 'extend':
+            self.combos[player] += 1
+        elif combo_effect == 'break':
+            self.combos[player] = 0  # Too early or too late - counts as MISS
+        self._combo_changed(player)
+        self.scores[player] += combo_points(points, self.combos[player])
+        self.judgements[player][rating] += 1
+        note.deactivate()
+        self.field.remove(note)
+        return rating, color
+
+    def hold(self, song_time):
+        """Update the drawn progress of every held note"""
+        for note in self.active_holds.values():
+            note.update_hold(song_time)
+
+    def expire(self, bottom_y=0):
+        """
+        Take notes that fell past bottom_y unhit out of play, breaking the
+        combo and counting a MISS for each. Returns the players who missed.
+        """
+        missed = []
+        for note in self.field.expired(bottom_y):
+            if note.active:
+                note.deactivate()
+                self.combos[note.player] = 0
+                self.judgements[note.player]["MISS"] += 1
+                missed.append(note.player)
+                self.field.remove(note)
+        return missed
+
+
+# ========== HEADLESS SIMULATION ==========
+
+def normal_error(mean=0.0, stdev=0.02):
+    """Timing error distribution for AutoplayBot: gaussian, in seconds"""
+    return lambda rng: rng.gauss(mean, stdev)
+
+
+def uniform_error(low=-0.05, high=0.05):
+    """Timing error distribution for AutoplayBot: uniform, in seconds"""
+    return lambda rng: rng.uniform(low, high)
+
+
+class AutoplayBot:
+    """
+    Presses every note at its time plus an error drawn from timing_error
+    (default: dead on) and releases hold notes after their duration plus a
+    second draw. skip_rate leaves that fraction of notes unplayed.
+    """
+
+    def __init__(self, timing_error=None, skip_rate=0.0, seed=0):
+        self.timing_error = timing_error or (lambda rng: 0.0)
+        self.skip_rate = skip_rate
+        self.rng = random.Random(seed)
+
+    def plan(self, note_time, duration):
+        """(press_time, release_time or None) for one note, or None to skip it"""
+        if self.skip_rate and self.rng.random() < self.skip_rate:
+            return None
+        press = note_time + self.timing_error(self.rng)
+        if duration <= 0:
+            return press, None
+        return press, max(press, note_time + duration + self.timing_error(self.rng))
+
+
+class Simulation:
+    """
+    RhythmGame's spawn/judge/score loop on a synthetic clock - no window, no
+    audio device. Frames advance by 1/fps of song time as fast as the CPU
+    allows; the bot's presses are queued with their own timestamps and handled
+    on the frame they fall in, just like captured input in the real game.
+    """
+
+    def __init__(self, notes, bot=None, num_players=1, note_speed=350, height=700, fps=60):
+        self.schedule = SpawnSchedule(notes)
+        self.bot = bot if bot is not None else AutoplayBot()
+        self.num_players = num_players
+        self.note_speed = note_speed
+        self.height = height
+        self.fps = fps
+        self.field = NoteField()
+        self.field.pool.prewarm(num_players)
+
+    def run(self):
+        """Play the chart to the end and return a report dict"""
+        dt = 1.0 / self.fps
+        schedule = self.schedule
+        schedule.rewind()
+        schedule.set_fall_time(fall_time(self.height, self.note_speed))
+        field = self.field
+        field.clear()
+        referee = Referee(field, self.num_players)
+
+        inputs = []  # (event_time, order, kind, player, lane) - kept sorted, consumed from the front
+        order = 0
+        frame_times = []
+
+        wall_start = time.perf_counter()
+        frame = 0
+        song_time = 0.0
+        while not (schedule.done and field.count() == 0 and not referee.active_holds):
+            frame_start = time.perf_counter()
+            song_time = frame * dt
+
+            for note_time, lane, duration in schedule.due(song_time):
+                for player in range(self.num_players):
+                    field.spawn(player, lane, note_time, self.note_speed, duration)
+                    planned = self.bot.plan(note_time, duration)
+                    if planned is not None:
+                        press, release = planned
+                        inputs.append((press, order, 'down', player, lane))
+                        if release is not None:
+                            inputs.append((release, order + 1, 'up', player, lane))
+                        order += 2
+                inputs.sort()
+
+            # Handle every input stamped up to this frame, by its own time
+            handled = 0
+            for event_time, _, kind, player, lane in inputs:
+                if event_time > song_time:
+                    break
+                handled += 1
+                if kind == 'down':
+                    referee.press(player, lane, event_time)
+                else:
+                    referee.release(player, lane, event_time)
+            del inputs[:handled]
+
+            referee.hold(song_time)
+            field.position(song_time, self.note_speed)
+            referee.expire(0)
+
+            frame_times.append(time.perf_counter() - frame_start)
+            frame += 1
+            if frame > 10_000_000:
+                break  # Safety net - a stuck hold can't spin forever
+
+        wall = time.perf_counter() - wall_start
+        frame_times.sort()
+        n = len(frame_times)
+        return {
+            "notes": len(schedule),
+            "frames": n,
+            "song_seconds": song_time,
+            "wall_seconds": wall,
+            "speedup": song_time / wall if wall > 0 else float('inf'),
+            "scores": referee.scores,
+            "max_combos": referee.max_combos,
+            "judgements": referee.judgements,
+            "frame_ms": {
+                "mean": 1000 * sum(frame_times) / n if n else 0.0,
+                "p95": 1000 * frame_times[int(0.95 * (n - 1))] if n else 0.0,
+                "max": 1000 * frame_times[-1] if n else 0.0,
+            },
+        }
+
+
+def load_chart_notes(path, difficulty=None):
+    """Notes of a .json or .bin chart file (one difficulty tier if given)"""
+    if path.endswith(chart_format.BINARY_SUFFIX):
+        chart = chart_format.load_chart(path)
+    else:
+        with open(path, 'r') as f:
+            chart = json.load(f)
+    tiers = chart.get("difficulties") or {}
+    if difficulty in tiers:
+        return tiers[difficulty]
+    return chart["notes"]
+
+
+def print_report(report):
+    print(f"[Sim] {report['notes']} notes, {report['frames']} frames, "
+          f"{report['song_seconds']:.1f}s of song in {report['wall_seconds']:.3f}s "
+          f"({report['speedup']:.0f}x real time)")
+    frame_ms = report["frame_ms"]
+    print(f"[Sim] Frame CPU: mean {frame_ms['mean']:.3f}ms, p95 {frame_ms['p95']:.3f}ms, max {frame_ms['max']:.3f}ms")
+    for player, score in enumerate(report["scores"]):
+        counts = ", ".join(f"{rating} {count}" for rating, count in report["judgements"][player].items())
+        print(f"[Sim] Player {player + 1}: {score} points, max combo {report['max_combos'][player]} ({counts})")
+
+
+# Command-line usage: simulate a chart with the autoplay bot
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Play a chart headless with the autoplay bot")
+    parser.add_argument("chart", help="chart .json or .bin")
+    parser.add_argument("--difficulty", default=None)
+    parser.add_argument("--players", type=int, default=1)
+    parser.add_argument("--speed", type=float, default=350, help="note speed in pixels per second")
+    parser.add_argument("--height", type=float, default=700, help="window height in pixels")
+    parser.add_argument("--fps", type=float, default=60)
+    parser.add_argument("--error-ms", type=float, default=0.0, help="stdev of the bot's timing error")
+    parser.add_argument("--bias-ms", type=float, default=0.0, help="mean timing error (positive = late)")
+    parser.add_argument("--skip", type=float, default=0.0, help="fraction of notes the bot ignores")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    bot = AutoplayBot(normal_error(args.bias_ms / 1000, args.error_ms / 1000),
+                      skip_rate=args.skip, seed=args.seed)
+    sim = Simulation(load_chart_notes(args.chart, args.difficulty), bot=bot, num_players=args.players,
+                     note_speed=args.speed, height=args.height, fps=args.fps)
+    report = sim.run()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
@@ -0,0 +1,419 @@
+# Falling notes as plain data
+# Notes are lightweight objects (no Kivy widgets) whose state lives in their
+# NotePool's per-attribute arrays; RhythmGame positions, hit-tests and scores
+# them directly, and NoteRenderer in rythym.py draws every visible note in one
+# pass from the triangle geometry built here straight from those arrays.
+# Nothing in this module imports Kivy, so the same notes work in headless tools.
+
+import numpy as np
+
+import chart_format
+
+NUM_LANES = 3
+NOTE_RADIUS = 40
+CIRCLE_SEGMENTS = 24
+
+LANE_COLORS = [(1, 0.3, 0.3, 1), (0.3, 1, 0.3, 1), (0.3, 0.3, 1, 1)]
+LANE_DARK_COLORS = [(0.7, 0.2, 0.2, 1), (0.2, 0.7, 0.2, 1), (0.2, 0.2, 0.7, 1)]
+
+# Draw order - one batched mesh per layer: (layer name, rgba)
+LAYERS = (
+    [(f"tail_waiting_{lane}", LANE_DARK_COLORS[lane]) for lane in range(NUM_LANES)]
+    + [(f"tail_held_{lane}", LANE_COLORS[lane]) for lane in range(NUM_LANES)]
+    + [(f"head_{lane}", LANE_COLORS[lane]) for lane in range(NUM_LANES)]
+    + [("highlight", (1, 1, 1, 0.3)),
+       ("ring_waiting", (1, 1, 1, 0.4)),   # Dimmer when not holding
+       ("ring_held", (1, 1, 1, 0.8)),      # Bright when holding
+       ("ring_ready", (0, 1, 0, 0.9))]     # Green when ready to release
+)
+LAYER_INDEX = {name: i for i, (name, rgba) in enumerate(LAYERS)}
+
+
+# Per-note state, kept by NotePool as one preallocated array per attribute
+# (row = the note's slot) so positioning and drawing are array passes over
+# every note in play; FallingNote reads and writes its row through properties
+NOTE_COLUMNS = (
+    ('player', np.int64), ('lane', np.int64), ('time', np.float64), ('speed', np.float64),
+    ('duration', np.float64), ('x', np.float64), ('y', np.float64), ('radius', np.float64),
+    ('tail_length', np.float64), ('hold_progress', np.float64),
+    ('active', np.bool_), ('is_hold_note', np.bool_), ('hold_started', np.bool_),
+)
+
+
+def _column(name):
+    def get(note):
+        return note.pool.columns[name].item(note.slot)
+
+    def set_(note, value):
+        note.pool.columns[name][note.slot] = value
+
+    return property(get, set_)
+
+
+class FallingNote:
+    """
+    A falling note that the player must hit - supports both tap and hold notes.
+    Its state lives in row slot of its NotePool's arrays.
+    """
+
+    __slots__ = ('pool', 'slot', 'hold_completed')
+
+    player = _column('player')
+    lane = _column('lane')
+    time = _column('time')  # Song time (seconds) when the head reaches the target
+    speed = _column('speed')
+    duration = _column('duration')  # 0 = tap note, >0 = hold note duration in seconds
+    x = _column('x')  # left edge
+    y = _column('y')  # bottom edge of the note head
+    radius = _column('radius')
+    tail_length = _column('tail_length')  # Pixels of tail
+    hold_progress = _column('hold_progress')  # 0.0 to 1.0, how much of the hold is complete
+    active = _column('active')
+    is_hold_note = _column('is_hold_note')
+    hold_started = _column('hold_started')  # True when player starts holding
+
+    def __init__(self, pool, slot):
+        self.pool = pool
+        self.slot = slot
+        self.x = 0.0
+        self.y = 0.0
+        self.radius = NOTE_RADIUS
+        self.reset(0, 0, 0)
+
+    def reset(self, lane, player, speed, duration=0, time=0.0):
+        """(Re)initialize the note - pooled notes are reused through this"""
+        self.lane = lane
+        self.player = player
+        self.time = time
+        self.speed = speed
+        self.duration = duration
+        self.active = True
+        self.is_hold_note = duration > 0
+        self.hold_started = False
+        self.hold_completed = False  # True when hold is successfully completed
+        self.hold_progress = 0.0
+        self.tail_length = duration * speed if duration > 0 else 0
+
+    @property
+    def width(self):
+        return self.radius * 2
+
+    @property
+    def height(self):
+        return self.radius * 2
+
+    @property
+    def center_x(self):
+        return self.x + self.radius
+
+    @center_x.setter
+    def center_x(self, value):
+        self.x = value - self.radius
+
+    @property
+    def center_y(self):
+        return self.y + self.radius
+
+    @center_y.setter
+    def center_y(self, value):
+        self.y = value - self.radius
+
+    def place(self, song_time, target_y, speed=None):
+        """
+        Position the note from the song clock: the head sits target_y +
+        (time - song_time) * speed, so frame hitches never accumulate.
+        Passing speed rescales the note (and its hold tail) mid-song.
+        (NotePool.place does this for every note at once.)
+        """
+        if speed is not None and speed != self.speed:
+            self.speed = speed
+            self.tail_length = self.duration * speed if self.is_hold_note else 0
+        if self.active:
+            # Hold notes stop moving once the hold has started
+            if self.is_hold_note and self.hold_started:
+                return  # Stay in place while being held
+            self.y = target_y + (self.time - song_time) * self.speed
+
+    def start_hold(self):
+        """Called when player starts holding this note"""
+        if self.is_hold_note and not self.hold_started:
+            self.hold_started = True
+
+    def update_hold(self, song_time):
+        """Update hold progress from the song clock - call each frame while held"""
+        if self.is_hold_note and self.hold_started and not self.hold_completed:
+            # Progress based on song time vs the note's span (drawn, not judged)
+            # Allow progress to go past 1.0 - releases are judged by time (rhythm_engine.judge_release)
+            self.hold_progress = max(0.0, (song_time - self.time) / self.duration)
+            # Don't auto-complete - let player release manually for timing score
+        return False
+
+    def release_hold(self):
+        """Called when player releases - returns True if completed successfully"""
+        if self.is_hold_note:
+            return self.hold_completed
+        return True
+
+    def deactivate(self):
+        self.active = False
+
+
+class NotePool:
+    """
+    Recycles FallingNote objects per (player, lane) so steady-state gameplay
+    allocates nothing for new chart notes. The pool owns every note's state
+    as preallocated NOTE_COLUMNS arrays (grown by doubling); rows [0, created)
+    belong to the notes made so far, and the active ones are the notes in play.
+    """
+
+    def __init__(self, prewarm_per_lane=8, capacity=64):
+        self.prewarm_per_lane = prewarm_per_lane
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in NOTE_COLUMNS}
+        self.free = {}  # {(player, lane): [FallingNote, ...]}
+        self.created = 0  # notes allocated since the last clear() - their slots are 0..created-1
+
+    def prewarm(self, num_players, num_lanes=NUM_LANES):
+        for player in range(num_players):
+            for lane in range(num_lanes):
+                free = self.free.setdefault((player, lane), [])
+                while len(free) < self.prewarm_per_lane:
+                    free.append(self._create(lane, player))
+
+    def acquire(self, lane, player, speed, duration=0, time=0.0):
+        """Get a note ready to fall - recycled when one is free"""
+        free = self.free.get((player, lane))
+        note = free.pop() if free else self._create(lane, player)
+        note.reset(lane, player, speed, duration, time)
+        return note
+
+    def release(self, note):
+        """Return a note to its lane's free list"""
+        note.active = False
+        self.free.setdefault((note.player, note.lane), []).append(note)
+
+    def clear(self):
+        """Forget every note - only call with none in play (NoteField.clear() first)"""
+        self.free = {}
+        self.created = 0
+        for column in self.columns.values():
+            column.fill(0)
+
+    def view(self, name):
+        """A column over the notes created so far (active or free)"""
+        return self.columns[name][:self.created]
+
+    def place(self, song_time, target_y, speed):
+        """FallingNote.place(song_time, target_y, speed) for every note, as one array pass"""
+        n = self.created
+        c = self.columns
+        hold = c['is_hold_note'][:n]
+        rescale = c['speed'][:n] != speed
+        if rescale.any():
+            c['speed'][:n][rescale] = speed
+            c['tail_length'][:n][rescale] = np.where(hold[rescale], c['duration'][:n][rescale] * speed, 0.0)
+        moving = self.moving()
+        c['y'][:n][moving] = target_y + (c['time'][:n][moving] - song_time) * speed
+
+    def moving(self):
+        """Mask of the notes that fall with the clock - active and not being held"""
+        n = self.created
+        c = self.columns
+        return c['active'][:n] & ~(c['is_hold_note'][:n] & c['hold_started'][:n])
+
+    def below(self, bottom_y):
+        """Mask of the notes whose head is entirely below bottom_y"""
+        n = self.created
+        return self.columns['y'][:n] + 2 * self.columns['radius'][:n] < bottom_y
+
+    def follow_lanes(self, centers):
+        """Move every active note to its lane's x - centers[player][lane] (players without a row are left alone)"""
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, NUM_LANES)
+        players = self.view('player')
+        rows = self.view('active') & (players < len(centers))
+        self.view('x')[rows] = centers[players[rows], self.view('lane')[rows]] - self.view('radius')[rows]
+
+    def _create(self, lane, player):
+        if self.created == len(self.columns['active']):
+            self._grow()
+        note = FallingNote(self, self.created)
+        self.created += 1
+        note.lane = lane
+        note.player = player
+        note.active = False
+        return note
+
+    def _grow(self):
+        # Notes keep their slots - only the arrays behind them are replaced
+        for name, column in self.columns.items():
+            grown = np.zeros(max(1, 2 * len(column)), dtype=column.dtype)
+            grown[:len(column)] = column
+            self.columns[name] = grown
+
+
+class SpawnSchedule:
+    """
+    A chart compiled for spawning: note times, lanes, durations and hold flags
+    as sorted arrays, plus spawn times (note time - fall time). due() is a
+    searchsorted range query, so each frame costs O(notes due), and spawn
+    times are only recomputed when the fall time (screen height or speed) changes.
+    """
+
+    def __init__(self, notes):
+        array = chart_format.notes_to_array(notes)  # time-sorted NOTE_DTYPE
+        self.times = array['time'].astype(np.float64)
+        self.lanes = array['lane'].astype(np.int64)
+        self.durations = array['duration'].astype(np.float64)
+        self.holds = self.durations > 0
+        # Plain-Python copies so spawning doesn't box numpy scalars one by one
+        self._rows = list(zip(self.times.tolist(), self.lanes.tolist(), self.durations.tolist()))
+        self.fall_time = None
+        self.spawn_times = self.times
+        self.next = 0  # index of the first note not yet spawned
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def done(self):
+        return self.next >= len(self._rows)
+
+    def rewind(self):
+        self.next = 0
+
+    def set_fall_time(self, fall_time):
+        if fall_time != self.fall_time:
+            self.fall_time = fall_time
+            self.spawn_times = self.times - fall_time
+
+    def due(self, song_time):
+        """(time, lane, duration) for every unspawned note whose spawn time is <= song_time"""
+        end = int(np.searchsorted(self.spawn_times, song_time, side='right'))
+        if end <= self.next:
+            return []
+        rows = self._rows[self.next:end]
+        self.next = end
+        return rows
+
+
+# ========== BATCHED GEOMETRY ==========
+
+_ANGLES = np.linspace(0, 2 * np.pi, CIRCLE_SEGMENTS, endpoint=False)
+_UNIT_CIRCLE = np.stack([np.cos(_ANGLES), np.sin(_ANGLES)], axis=1)
+
+# Triangle templates (vertex indices within one shape)
+_DISC_TRIS = np.array([[0, 1 + i, 1 + (i + 1) % CIRCLE_SEGMENTS] for i in range(CIRCLE_SEGMENTS)]).ravel()
+_RING_TRIS = np.array([
+    [i, (i + 1) % CIRCLE_SEGMENTS, CIRCLE_SEGMENTS + i,
+     CIRCLE_SEGMENTS + i, (i + 1) % CIRCLE_SEGMENTS, CIRCLE_SEGMENTS + (i + 1) % CIRCLE_SEGMENTS]
+    for i in range(CIRCLE_SEGMENTS)
+]).ravel()
+_RECT_TRIS = np.array([0, 1, 2, 0, 2, 3])
+
+
+def _discs(cx, cy, radius):
+    """(vertices[N, 1 + segments, 2], triangle template) for filled circles"""
+    rims = np.stack([cx, cy], axis=1)[:, None, :] + _UNIT_CIRCLE[None, :, :] * np.asarray(radius)[..., None, None]
+    centers = np.stack([cx, cy], axis=1)[:, None, :]
+    return np.concatenate([centers, rims], axis=1), _DISC_TRIS
+
+
+def _rings(cx, cy, radius, thickness):
+    centers = np.stack([cx, cy], axis=1)[:, None, :]
+    inner = centers + _UNIT_CIRCLE[None] * (radius - thickness / 2)[:, None, None]
+    outer = centers + _UNIT_CIRCLE[None] * (radius + thickness / 2)[:, None, None]
+    return np.concatenate([inner, outer], axis=1), _RING_TRIS
+
+
+def _rects(x, y, width, height):
+    x0, y0 = x, y
+    x1, y1 = x + width, y + height
+    corners = np.stack([np.stack([x0, y0], 1), np.stack([x1, y0], 1),
+                        np.stack([x1, y1], 1), np.stack([x0, y1], 1)], axis=1)
+    return corners, _RECT_TRIS
+
+
+def _mesh(shapes):
+    """Merge (vertices[N, V, 2], template) pieces into flat vertex and index arrays"""
+    vertex_blocks = []
+    index_blocks = []
+    base = 0
+    for vertices, template in shapes:
+        n, per_shape = vertices.shape[0], vertices.shape[1]
+        if n == 0:
+            continue
+        offsets = base + per_shape * np.arange(n)
+        index_blocks.append((template[None, :] + offsets[:, None]).ravel())
+        vertex_blocks.append(vertices.reshape(-1, 2))
+        base += n * per_shape
+    if not vertex_blocks:
+        return np.zeros((0, 2), dtype=np.float32), np.zeros(0, dtype=np.uint16)
+    return (np.concatenate(vertex_blocks).astype(np.float32),
+            np.concatenate(index_blocks).astype(np.uint16))
+
+
+def note_arrays(pool):
+    """The drawable state of the notes in play, gathered from the pool's columns"""
+    rows = np.flatnonzero(pool.view('active'))
+
+    def column(name):
+        return pool.view(name)[rows]
+
+    radius = column('radius')
+    ring = column('is_hold_note')
+    tail = column('tail_length')
+    return {
+        "x": column('x') + radius,
+        "y": column('y'),
+        "radius": radius,
+        "lane": column('lane'),
+        "hold": ring & (tail > 0),
+        "ring": ring,
+        "started": column('hold_started'),
+        "progress": column('hold_progress'),
+        "tail": tail,
+    }
+
+
+def build_note_geometry(pool):
+    """
+    Triangle meshes for every note in play in a NotePool, one (vertices,
+    indices) pair per entry in LAYERS. Vertices are float32 (x, y) pairs; a
+    layer with nothing to draw gets empty arrays.
+    """
+    a = note_arrays(pool)
+    cx, radius = a["x"], a["radius"]
+    cy = a["y"] + radius
+    layers = [[] for _ in LAYERS]
+
+    # Hold tails (behind the note head) - shrink from the bottom up while held
+    tail_len = np.where(a["started"], np.maximum(0, a["tail"] * (1.0 - a["progress"])), a["tail"])
+    tail_width = radius * 0.8
+    for lane in range(NUM_LANES):
+        for held, prefix in ((False, "tail_waiting"), (True, "tail_held")):
+            m = a["hold"] & (a["lane"] == lane) & (a["started"] == held) & (tail_len > 0)
+            if not m.any():
+                continue
+            layer = layers[LAYER_INDEX[f"{prefix}_{lane}"]]
+            tail_x = cx[m] - tail_width[m] / 2
+            layer.append(_rects(tail_x, cy[m], tail_width[m], tail_len[m]))
+            # Rounded end cap
+            layer.append(_discs(cx[m], cy[m] + tail_len[m], tail_width[m] / 2))
+
+    for lane in range(NUM_LANES):
+        m = a["lane"] == lane
+        if m.any():
+            layers[LAYER_INDEX[f"head_{lane}"]].append(_discs(cx[m], cy[m], radius[m]))
+
+    if len(cx):
+        layers[LAYER_INDEX["highlight"]].append(_discs(cx, cy, radius * 0.7))
+
+    ready = a["ring"] & a["started"] & (a["progress"] >= 1.0)
+    held = a["ring"] & a["started"] & ~ready
+    waiting = a["ring"] & ~a["started"]
+    for mask, name, extra, thickness in ((waiting, "ring_waiting", 3, 2), (held, "ring_held", 3, 2),
+                                         (ready, "ring_ready", 5, 3)):
+        if mask.any():
+            layers[LAYER_INDEX[name]].append(
+                _rings(cx[mask], cy[mask], radius[mask] + extra, np.full(mask.sum(), float(thickness))))
+
+    return [_mesh(shapes) for shapes in layers]
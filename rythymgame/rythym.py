@@ -1,6 +1,13 @@
 # IMPORTANT: Suppress numba debug spam BEFORE any imports
+import logging
 import os
+import sys
+import time
 import warnings
+
+# Cold-start timer - reported once the menu has rendered its first frame
+_STARTUP_T0 = time.perf_counter()
+
 os.environ['NUMBA_DISABLE_JIT'] = '0'
 os.environ['NUMBA_DEBUG'] = '0'
 os.environ['NUMBA_WARNINGS'] = '0'
@@ -14,7 +21,7 @@ from kivy.uix.floatlayout import FloatLayout
 from kivy.uix.button import Button
 from kivy.uix.label import Label
 from kivy.uix.slider import Slider
-from kivy.graphics import Color, Ellipse, Line, Rectangle
+from kivy.graphics import Color, Ellipse, Line, Mesh, Rectangle
 from kivy.clock import Clock
 from kivy.config import Config
 from kivy.core.audio import SoundLoader
@@ -22,8 +29,33 @@ from kivy.core.window import Window
 import random
 import threading
 
-# Import chart generator (uses librosa/numba)
-from chart_generator import ChartGenerator, LIBROSA_AVAILABLE
+# Import chart generator (librosa/numba are only loaded on demand or by
+# warm_up_librosa() in the background, so this import is cheap)
+from chart_generator import (DIFFICULTIES, ChartGenerator, LIBROSA_AVAILABLE, select_difficulty,
+                             warm_up_librosa, librosa_status)
+import chart_format
+from chart_cleanup import DEFAULT_BPM, ONSET_TOLERANCE, quantize_notes, snap_to_onsets
+import numpy as np
+from replay import ReplayRecorder, save_replay
+from rhythm_engine import (DEFAULT_AUDIO_LATENCY, DEFAULT_AUDIO_OFFSET, MISS_COLOR, TARGET_Y, NoteField, Referee,
+                           fall_time, field_time)
+from rhythm_notes import LAYERS, NotePool, SpawnSchedule, build_note_geometry
+from song_clock import SongClock
+
+# Modules shared with the other IR-frame games live one level up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import frame_profiler
+import game_logging
+from input_capture import DOWN, KEY_DOWN, KEY_UP, UP, InputCapture
+
+# Queue-backed loggers (see game_logging.py) - warnings only unless GAME_LOG_LEVEL is set
+log = game_logging.get_logger('Game')
+calibration_log = game_logging.get_logger('Calibration')
+recording_log = game_logging.get_logger('Recording')
+test_log = game_logging.get_logger('Test')
+ui_log = game_logging.get_logger('UI')
+debug_log = game_logging.get_logger('Debug')
+startup_log = game_logging.get_logger('Startup')
 
 # Configure for touchscreen multi-touch
 Config.set('input', 'mouse', 'mouse,multitouch_on_demand')
@@ -36,136 +68,39 @@ Config.set('input', 'wm_touch', 'wm_touch')
 Config.set('input', 'wm_pen', 'wm_pen')
 
 
-class Note(Widget):
-    """A falling note that the player must hit - supports both tap and hold notes"""
-    def __init__(self, lane, player, speed, duration=0, **kwargs):
-        super(Note, self).__init__(**kwargs)
-        self.lane = lane
-        self.player = player
-        self.speed = speed
-        self.duration = duration  # 0 = tap note, >0 = hold note duration in seconds
-        self.active = True
-        self.radius = 40
-        self.size = (self.radius * 2, self.radius * 2)
-
-        # Hold note state
-        self.is_hold_note = duration > 0
-        self.hold_started = False  # True when player starts holding
-        self.hold_completed = False  # True when hold is successfully completed
-        self.hold_progress = 0.0  # 0.0 to 1.0, how much of the hold is complete
-        self.tail_length = 0  # Calculated based on duration and speed
-
-        if self.is_hold_note:
-            self.tail_length = duration * speed  # Pixels of tail
-
-        self.bind(pos=self.update_canvas)
-        self.update_canvas()
-
-    def update_canvas(self, *args):
-        self.canvas.clear()
-        if not self.active:
-            return
+class NoteRenderer(Widget):
+    """
+    Draws every falling note in one canvas: a Color + batched Mesh per layer
+    (see rhythm_notes.LAYERS), refreshed once per frame from the NotePool's
+    arrays. Frame cost stays flat as players and note density go up.
+    """
+    def __init__(self, **kwargs):
+        super(NoteRenderer, self).__init__(**kwargs)
+        self.meshes = []
         with self.canvas:
-            colors = [(1, 0.3, 0.3, 1), (0.3, 1, 0.3, 1), (0.3, 0.3, 1, 1)]
-            dark_colors = [(0.7, 0.2, 0.2, 1), (0.2, 0.7, 0.2, 1), (0.2, 0.2, 0.7, 1)]
-
-            # Draw hold tail first (behind the note head)
-            if self.is_hold_note and self.tail_length > 0:
-                tail_width = self.radius * 0.8
-                tail_x = self.center_x - tail_width / 2
-
-                # If hold is in progress, the tail shrinks from bottom up
-                if self.hold_started:
-                    # Remaining tail length decreases as hold progresses
-                    # Cap at 0 so it doesn't go negative when holding too long
-                    remaining_length = max(0, self.tail_length * (1.0 - self.hold_progress))
-
-                    # Draw remaining tail from note head upward
-                    if remaining_length > 0:
-                        Color(*colors[self.lane])
-                        Rectangle(
-                            pos=(tail_x, self.y + self.radius),
-                            size=(tail_width, remaining_length)
-                        )
-
-                        # Tail end cap (rounded top)
-                        Ellipse(
-                            pos=(tail_x, self.y + self.radius + remaining_length - tail_width / 2),
-                            size=(tail_width, tail_width)
-                        )
-                else:
-                    # Not holding yet - draw full tail
-                    Color(*dark_colors[self.lane])
-                    Rectangle(
-                        pos=(tail_x, self.y + self.radius),
-                        size=(tail_width, self.tail_length)
-                    )
-
-                    # Tail end cap (rounded top)
-                    Ellipse(
-                        pos=(tail_x, self.y + self.radius + self.tail_length - tail_width / 2),
-                        size=(tail_width, tail_width)
-                    )
-
-            # Draw note head
-            Color(*colors[self.lane])
-            Ellipse(pos=self.pos, size=self.size)
-
-            # Inner highlight
-            Color(1, 1, 1, 0.3)
-            inner_margin = self.radius * 0.3
-            Ellipse(
-                pos=(self.x + inner_margin, self.y + inner_margin),
-                size=(self.width - inner_margin * 2, self.height - inner_margin * 2)
-            )
-
-            # Hold note indicator (ring around note head)
-            if self.is_hold_note:
-                if self.hold_started:
-                    if self.hold_progress >= 1.0:
-                        # Pulse green when ready to release
-                        Color(0, 1, 0, 0.9)
-                        Line(circle=(self.center_x, self.center_y, self.radius + 5), width=3)
-                    else:
-                        Color(1, 1, 1, 0.8)  # Bright when holding
-                        Line(circle=(self.center_x, self.center_y, self.radius + 3), width=2)
-                else:
-                    Color(1, 1, 1, 0.4)  # Dimmer when not holding
-                    Line(circle=(self.center_x, self.center_y, self.radius + 3), width=2)
-
-    def move(self, dt):
-        if self.active:
-            # Hold notes stop moving once the hold has started
-            if self.is_hold_note and self.hold_started:
-                return  # Stay in place while being held
-            self.y -= self.speed * dt
-
-    def start_hold(self):
-        """Called when player starts holding this note"""
-        if self.is_hold_note and not self.hold_started:
-            self.hold_started = True
-            self.update_canvas()
-
-    def update_hold(self, dt):
-        """Update hold progress - call each frame while held"""
-        if self.is_hold_note and self.hold_started and not self.hold_completed:
-            # Progress based on time held vs duration
-            # Allow progress to go past 1.0 so we can detect "too late" releases
-            self.hold_progress += dt / self.duration
-            self.update_canvas()
-            # Don't auto-complete - let player release manually for timing score
-            return False
-        return False
-
-    def release_hold(self):
-        """Called when player releases - returns True if completed successfully"""
-        if self.is_hold_note:
-            return self.hold_completed
-        return True
-
-    def deactivate(self):
-        self.active = False
-        self.update_canvas()
+            for name, rgba in LAYERS:
+                Color(*rgba)
+                self.meshes.append(Mesh(mode='triangles'))
+        # Default mesh format is (x, y, u, v) - texture coords stay zero in these grow-only buffers
+        self.packed = [np.zeros((0, 4), dtype=np.float32) for _ in LAYERS]
+        self.vertex_counts = [0] * len(LAYERS)
+
+    @frame_profiler.timed('draw_notes')
+    def draw(self, pool):
+        """Upload the notes in play in pool - only the filled part of each layer's buffer"""
+        for i, (mesh, (vertices, indices)) in enumerate(zip(self.meshes, build_note_geometry(pool))):
+            count = len(vertices)
+            if count == 0 and self.vertex_counts[i] == 0:
+                continue  # Still empty
+            if count > len(self.packed[i]):
+                self.packed[i] = np.zeros((max(count, 2 * len(self.packed[i])), 4), dtype=np.float32)
+            packed = self.packed[i][:count]
+            packed[:, :2] = vertices
+            mesh.vertices = packed.ravel().tolist()
+            # A layer's triangles only depend on how many shapes it holds
+            if count != self.vertex_counts[i]:
+                mesh.indices = indices.tolist()
+                self.vertex_counts[i] = count
 
 
 class TargetButton(Widget):
@@ -209,34 +144,32 @@ class TargetButton(Widget):
         self.update_canvas()
 
     def on_touch_down(self, touch):
-        if self.collide_point(*touch.pos):
-            self.set_pressed(True)
-            touch.ud['button'] = self
-
-            # Handle calibration mode
-            if self.game.calibration_mode:
-                self.game.calibration_tap()
-            # Handle recording mode
-            elif self.game.recording_mode:
-                self.game.record_note(self.lane)
-            elif self.game.game_active:
-                self.game.check_hit(self.player, self.lane)
-            return True
-        return False
-
-    def on_touch_up(self, touch):
-        if touch.ud.get('button') == self:
-            self.set_pressed(False)
-
-            # Handle recording mode - record release for hold notes
-            if self.game.recording_mode:
-                self.game.record_note_release(self.lane)
-            # Handle hold note release in gameplay
-            elif self.game.game_active:
-                self.game.release_hold(self.player, self.lane)
-
-            return True
-        return False
+        # Presses are handled from the game's input queue (see RhythmGame.process_input);
+        # just keep the touch from reaching widgets underneath
+        return self.collide_point(*touch.pos)
+
+    def press(self, event_time):
+        """Touch down on this button - event_time is the captured perf_counter() stamp"""
+        self.set_pressed(True)
+
+        # Handle calibration mode
+        if self.game.calibration_mode:
+            self.game.calibration_tap()
+        # Handle recording mode
+        elif self.game.recording_mode:
+            self.game.record_note(self.lane, event_time)
+        elif self.game.game_active:
+            self.game.check_hit(self.player, self.lane, event_time)
+
+    def release(self, event_time):
+        self.set_pressed(False)
+
+        # Handle recording mode - record release for hold notes
+        if self.game.recording_mode:
+            self.game.record_note_release(self.lane, event_time)
+        # Handle hold note release in gameplay
+        elif self.game.game_active:
+            self.game.release_hold(self.player, self.lane, event_time)
 
 
 class ScorePopup(Widget):
@@ -267,13 +200,19 @@ class ScorePopup(Widget):
 
 
 class RhythmGame(Widget):
+    # Chart loading runs on a worker thread; these fire on the main thread
+    __events__ = ('on_chart_progress', 'on_chart_loaded')
+
     def __init__(self, **kwargs):
         super(RhythmGame, self).__init__(**kwargs)
-        self.notes = []
+        self.note_pool = NotePool()  # Recycled plain-data notes (see rhythm_notes)
+        self.note_field = NoteField(self.note_pool)  # Notes in play, per-lane queues (see rhythm_engine)
+        self.note_renderer = NoteRenderer()  # Draws all notes in one batched canvas
+        self.add_widget(self.note_renderer)
+        self.referee = Referee(self.note_field)  # Judging, scores and combos (see rhythm_engine)
+        self.replay_recorder = ReplayRecorder()  # Every song played is saved as a replay (see replay.py)
         self.target_buttons = []
         self.score_popups = []
-        self.scores = []
-        self.combos = []
         self.num_players = 1
         self.game_active = False
         self.game_started = False
@@ -283,29 +222,33 @@ class RhythmGame(Widget):
         # Song-based note system
         self.current_song = None
         self.song_audio = None
-        self.song_notes = []  # List of (time, lane) from chart
-        self.next_note_index = 0
+        self.song_notes = []  # Time-sorted chart_format.NOTE_DTYPE array (time, lane, duration)
+        self.song_schedule = None  # song_notes compiled for spawning (rhythm_notes.SpawnSchedule)
+        self.spawn_schedule = None  # Schedule being played - the song's or the recorded notes'
         self.song_start_time = 0
-        self.elapsed_time = 0
-
-        # Keyboard controls for testing (H=left, J=center, K=right)
-        self._keyboard = Window.request_keyboard(self._on_keyboard_closed, self)
-        self._keyboard.bind(on_key_down=self._on_key_down)
-        self._keyboard.bind(on_key_up=self._on_key_up)
+        self.elapsed_time = 0  # Song time this frame (read from song_clock)
+        self.song_time = 0  # Clock value the notes were last positioned at
+        self.song_clock = SongClock()  # Interpolated audio position (see song_clock.py)
+
+        # Touch and keyboard input (H=left, J=center, K=right) is timestamped as it
+        # arrives and handled once per frame from the queue (see process_input)
+        self.input_capture = InputCapture()
+        self.input_capture.attach(Window)
+        self._touch_buttons = {}  # {touch uid: TargetButton pressed by that touch}
         self._keys_pressed = set()
+        Clock.schedule_interval(self.process_input, 0)
 
-        # Audio sync offset (seconds) - adjust if notes are early/late
-        # Positive = notes appear higher/earlier, Negative = notes appear lower/later
-        self.audio_offset = 0.0  # Visual offset for note positions
+        # Audio sync offset (seconds) - set by calibration or the offset slider
+        # Notes are drawn, held and judged at song time - audio_offset (see field_time),
+        # so positive = notes arrive later, for players who hear the song late
+        self.audio_offset = DEFAULT_AUDIO_OFFSET
 
         # Audio latency compensation (seconds) - compensates for audio system delay
-        # Higher value = start audio earlier to compensate for playback latency
-        # Measured via sync_tester.py: ~150ms on this system
-        self.audio_latency = 0.15  # Default 150ms - measured audio buffer latency
+        # when recording charts by ear (see input_song_time); gameplay uses audio_offset
+        self.audio_latency = DEFAULT_AUDIO_LATENCY
 
         # Track if audio has started for position-based sync
         self.audio_playing = False
-        self.audio_start_elapsed = 0  # elapsed_time when audio started
 
         # Calibration mode
         self.calibration_mode = False
@@ -330,38 +273,70 @@ class RhythmGame(Widget):
         # Get the directory where this script is located
         self.script_dir = os.path.dirname(os.path.abspath(__file__))
 
-        # Chart generator
-        self.chart_generator = ChartGenerator() if LIBROSA_AVAILABLE else None
+        # Chart generator - cheap to create; cached charts load without librosa
+        self.chart_generator = ChartGenerator()
         self.chart_loading = False
         self.chart_ready = False
+        self.chart_progress = ('', 0.0)  # (stage, fraction) of the load in flight
+        self.difficulty = 'medium'  # Tier the player picked on the song menu (one of DIFFICULTIES)
+        self.loading_song = None  # (filename, difficulty) being loaded
+        self.loaded_song = None  # (filename, difficulty) the ready chart belongs to
+        self.pending_start = None  # song to start as soon as its chart is ready
+        self._chart_load_token = 0  # bumped per load so stale results are dropped
 
         # Recording mode
         self.recording_mode = False
         self.recorded_notes = []  # List of [time, lane] or [time, lane, duration] for holds
+        self.recorded_bpm = None  # Tempo detected when the recording is cleaned up
         self.recording_start_time = 0
         self.recording_key_down_times = {}  # Track when each lane key was pressed {lane: time}
 
-        # Hold note tracking during gameplay
-        self.active_holds = {}  # {(player, lane): note} - notes currently being held
-
         # Test playback mode
         self.test_playback_mode = False
-        self.test_next_note_index = 0
 
         # Bind to size changes to update layout
         self.bind(size=self.on_size_change, pos=self.on_size_change)
 
-    def _on_keyboard_closed(self):
-        """Called when keyboard is released"""
-        if self._keyboard:
-            self._keyboard.unbind(on_key_down=self._on_key_down)
-            self._keyboard.unbind(on_key_up=self._on_key_up)
-            self._keyboard = None
+    @property
+    def scores(self):
+        return self.referee.scores
+
+    @property
+    def combos(self):
+        return self.referee.combos
+
+    @property
+    def active_holds(self):
+        """{(player, lane): note} - hold notes currently being held"""
+        return self.referee.active_holds
+
+    @frame_profiler.timed('process_input')
+    def process_input(self, dt):
+        """Drain the captured input once per frame and handle it with its own timestamps"""
+        for event in self.input_capture.drain():
+            if event.kind == DOWN:
+                btn = self._button_at(event.x, event.y)
+                if btn is not None:
+                    self._touch_buttons[event.id] = btn
+                    btn.press(event.time)
+            elif event.kind == UP:
+                btn = self._touch_buttons.pop(event.id, None)
+                if btn is not None:
+                    btn.release(event.time)
+            elif event.kind == KEY_DOWN:
+                self._on_key_down(event.id, event.time)
+            elif event.kind == KEY_UP:
+                self._on_key_up(event.id, event.time)
+
+    def _button_at(self, x, y):
+        for btn_list in self.target_buttons:
+            for btn in btn_list:
+                if btn.collide_point(x, y):
+                    return btn
+        return None
 
-    def _on_key_down(self, keyboard, keycode, text, modifiers):
+    def _on_key_down(self, key, event_time):
         """Handle keyboard press - H=left(0), J=center(1), K=right(2), Space=calibration tap"""
-        key = keycode[1]  # Get the key name
-
         # Handle calibration mode - any key works as a tap
         if self.calibration_mode:
             if key in ['h', 'j', 'k', 'spacebar', 'space']:
@@ -386,17 +361,15 @@ class RhythmGame(Widget):
 
             # Handle recording mode
             if self.recording_mode:
-                self.record_note(lane)
+                self.record_note(lane, event_time)
             # Check for hit in normal game mode
             elif self.game_active:
-                self.check_hit(0, lane)
+                self.check_hit(0, lane, event_time)
 
         return True
 
-    def _on_key_up(self, keyboard, keycode):
+    def _on_key_up(self, key, event_time):
         """Handle keyboard release"""
-        key = keycode[1]
-
         key_to_lane = {'h': 0, 'j': 1, 'k': 2}
 
         if key in key_to_lane:
@@ -410,10 +383,10 @@ class RhythmGame(Widget):
 
             # Handle recording mode - record release for hold notes
             if self.recording_mode:
-                self.record_note_release(lane)
+                self.record_note_release(lane, event_time)
             # Handle hold note release in gameplay
             elif self.game_active:
-                self.release_hold(0, lane)
+                self.release_hold(0, lane, event_time)
 
         return True
 
@@ -421,7 +394,7 @@ class RhythmGame(Widget):
 
     def start_calibration(self):
         """Start audio/visual calibration mode"""
-        print("[Calibration] Starting calibration mode...")
+        calibration_log.info("Starting calibration mode...")
         self.calibration_mode = True
         self.calibration_tap_offsets = []
         self.calibration_current_tick = 0
@@ -437,9 +410,7 @@ class RhythmGame(Widget):
             self.setup_game(1)
 
         # Clear any existing notes
-        for note in self.notes:
-            self.remove_widget(note)
-        self.notes = []
+        self.clear_notes()
 
         # Start calibration after a short delay
         self.calibration_start_time = 0
@@ -480,13 +451,14 @@ class RhythmGame(Widget):
             self.calibration_tick_sound = SoundLoader.load(self.tick_sound_path)
             if self.calibration_tick_sound:
                 self.calibration_tick_sound.volume = 1.0
-                print("[Calibration] Tick sound created successfully")
+                calibration_log.info("Tick sound created successfully")
             else:
-                print("[Calibration] Warning: Could not load tick sound")
+                calibration_log.warning("Could not load tick sound")
         except Exception as e:
-            print(f"[Calibration] Error creating tick sound: {e}")
+            calibration_log.warning(f"Error creating tick sound: {e}")
             self.calibration_tick_sound = None
 
+    @frame_profiler.timed('update_calibration')
     def update_calibration(self, dt):
         """Update calibration mode - play ticks and spawn visual notes"""
         if not self.calibration_mode:
@@ -504,9 +476,9 @@ class RhythmGame(Widget):
 
             if self.calibration_start_time >= spawn_time:
                 # Spawn a note in the center lane
-                self.spawn_note_for_chart(1)
+                self.spawn_note_for_chart(1, tick_time)
                 self.calibration_notes_spawned += 1
-                print(f"[Calibration] Spawned note {self.calibration_notes_spawned}/{self.calibration_total_ticks}")
+                calibration_log.debug("Spawned note %d/%d", self.calibration_notes_spawned, self.calibration_total_ticks)
             else:
                 break
 
@@ -517,19 +489,19 @@ class RhythmGame(Widget):
             if self.calibration_start_time >= tick_time:
                 self._play_tick()
                 self.calibration_current_tick += 1
-                print(f"[Calibration] Tick {self.calibration_current_tick}/{self.calibration_total_ticks} at {tick_time:.2f}s")
+                calibration_log.debug("Tick %d/%d at %.2fs", self.calibration_current_tick,
+                                      self.calibration_total_ticks, tick_time)
             else:
                 break
 
-        # Move notes
-        for note in self.notes[:]:
-            note.move(dt)
-            if note.y + note.height < -50:
-                self.notes.remove(note)
-                self.remove_widget(note)
+        # Position notes from the calibration clock
+        self.position_notes(self.calibration_start_time)
+        for note in self.note_field.expired(-50):
+            self.recycle_note(note)
+        self.note_renderer.draw(self.note_pool)
 
         # Check if calibration is complete
-        if self.calibration_current_tick >= self.calibration_total_ticks and len(self.notes) == 0:
+        if self.calibration_current_tick >= self.calibration_total_ticks and self.note_count() == 0:
             self.finish_calibration()
 
     def _play_tick(self):
@@ -543,31 +515,22 @@ class RhythmGame(Widget):
         if not self.calibration_mode:
             return
 
-        # Find the closest note to the target
-        target_y = 70  # Target button y position
-
-        closest_note = None
-        closest_distance = float('inf')
-
-        for note in self.notes:
-            if note.active:
-                distance = abs(note.center_y - target_y)
-                if distance < closest_distance:
-                    closest_distance = distance
-                    closest_note = note
+        # Find the closest note to the target (calibration notes fall in the center lane)
+        target_y = TARGET_Y  # Target button y position
+        closest_note, closest_distance = self.note_field.hit_candidate(
+            0, 1, lambda note: note.center_y - target_y, reach=150)
 
         if closest_note and closest_distance < 150:  # Within reasonable range
             # Calculate offset: positive = tapped late, negative = tapped early
-            # Distance in pixels / speed = time offset
-            time_offset = (closest_note.center_y - target_y) / self.note_speed
+            # Distance in pixels past the target / speed = time offset
+            time_offset = (target_y - closest_note.center_y) / self.note_speed
 
             self.calibration_tap_offsets.append(time_offset)
-            print(f"[Calibration] Tap offset: {time_offset*1000:.0f}ms (note was {closest_distance:.0f}px away)")
+            calibration_log.debug("Tap offset: %.0fms (note was %.0fpx away)", time_offset * 1000, closest_distance)
 
             # Visual feedback
             closest_note.deactivate()
-            self.notes.remove(closest_note)
-            self.remove_widget(closest_note)
+            self.recycle_note(closest_note)
 
             # Show feedback
             if abs(time_offset) < 0.05:
@@ -580,7 +543,7 @@ class RhythmGame(Widget):
 
     def finish_calibration(self):
         """Finish calibration and calculate audio offset"""
-        print("[Calibration] Finishing calibration...")
+        calibration_log.info("Finishing calibration...")
         self.calibration_mode = False
 
         if self.calibration_timer:
@@ -596,23 +559,21 @@ class RhythmGame(Widget):
             # Calculate average offset
             avg_offset = sum(offsets) / len(offsets)
 
-            # The audio_offset should compensate for the measured offset
-            # If user taps late (positive offset), we need to delay audio more
-            self.audio_offset = avg_offset
+            # Taps were measured against notes drawn with the current offset, so add to it:
+            # if the user taps late (positive offset), notes are drawn and judged that much later
+            self.audio_offset += avg_offset
 
-            print(f"[Calibration] Calculated audio offset: {self.audio_offset*1000:.0f}ms")
-            print(f"[Calibration] Based on {len(self.calibration_tap_offsets)} taps")
+            calibration_log.info(f"Calculated audio offset: {self.audio_offset*1000:.0f}ms")
+            calibration_log.info(f"Based on {len(self.calibration_tap_offsets)} taps")
 
             # Store result for display
             self.calibration_result = self.audio_offset
         else:
-            print("[Calibration] Not enough taps to calibrate (need at least 3)")
+            calibration_log.warning("Not enough taps to calibrate (need at least 3)")
             self.calibration_result = None
 
         # Clean up
-        for note in self.notes[:]:
-            self.remove_widget(note)
-        self.notes = []
+        self.clear_notes()
 
         # Reset game state
         self.game_started = False
@@ -624,15 +585,12 @@ class RhythmGame(Widget):
             self.calibration_timer.cancel()
             self.calibration_timer = None
 
-        for note in self.notes[:]:
-            self.remove_widget(note)
-        self.notes = []
+        self.clear_notes()
 
     def get_note_fall_time(self):
         """Calculate how long it takes a note to fall from spawn to target"""
-        # Notes spawn at height + 10, target is at y = 70
-        fall_distance = self.height + 10 - 70
-        return fall_distance / self.note_speed
+        # Notes spawn at height + 10, target is at TARGET_Y
+        return fall_time(self.height, self.note_speed)
 
     def on_size_change(self, *args):
         """Update layout when window size changes"""
@@ -670,8 +628,7 @@ class RhythmGame(Widget):
     def setup_game(self, num_players):
         """Set up the game UI after player count is selected"""
         self.num_players = num_players
-        self.scores = [0] * num_players
-        self.combos = [0] * num_players
+        self.referee.reset(num_players)
         self.notes_spawned = 0
         self.game_ended = False
 
@@ -685,9 +642,7 @@ class RhythmGame(Widget):
             self.remove_widget(label)
         self.player_labels = []
 
-        for note in self.notes:
-            self.remove_widget(note)
-        self.notes = []
+        self.clear_notes()
 
         for popup in self.score_popups:
             self.remove_widget(popup)
@@ -730,108 +685,187 @@ class RhythmGame(Widget):
             self.player_labels.append(label)
             self.add_widget(label)
 
+        # Re-add the note renderer after the buttons so notes draw on top
+        self.remove_widget(self.note_renderer)
+        self.add_widget(self.note_renderer)
+        self.note_field.clear()
+        self.note_pool.clear()
+        self.note_pool.prewarm(num_players)
+
         self.game_started = True
 
-    def load_song(self, audio_filename, difficulty='medium'):
-        """Load a song and generate/load its note chart"""
+    def load_song(self, audio_filename, difficulty=None):
+        """
+        Load a song's audio and start loading/generating its note chart (at
+        difficulty, default the player's chosen one) on a worker thread. Returns immediately (False only if the audio can't be
+        loaded); dispatches on_chart_progress while the chart loads and
+        on_chart_loaded when it is ready, both on the main thread.
+        """
         audio_path = os.path.join(self.script_dir, audio_filename)
-        print(f"[Game] load_song called for: {audio_path}")
+        difficulty = difficulty or self.difficulty
+        log.info(f"load_song called for: {audio_path} ({difficulty})")
 
         if not os.path.exists(audio_path):
-            print(f"[Game] ERROR: Audio file not found: {audio_path}")
+            log.error(f"Audio file not found: {audio_path}")
             return False
 
         # Stop any existing audio
         if self.song_audio:
-            print("[Game] Stopping existing audio...")
+            log.info("Stopping existing audio...")
             self.song_audio.stop()
             self.song_audio.unload()
 
         # Load audio for playback
-        print("[Game] Loading audio with SoundLoader...")
+        log.info("Loading audio with SoundLoader...")
         self.song_audio = SoundLoader.load(audio_path)
         if not self.song_audio:
-            print(f"[Game] ERROR: Failed to load audio: {audio_path}")
+            log.error(f"Failed to load audio: {audio_path}")
             return False
-        print(f"[Game] Audio loaded successfully! Length: {self.song_audio.length}s, State: {self.song_audio.state}")
-
-        # Check if we have a cached chart (fast path)
-        cache_path = os.path.splitext(audio_path)[0] + "_chart.json"
-        if os.path.exists(cache_path):
-            print(f"[Game] Found cached chart: {cache_path}")
-            try:
-                import json
-                with open(cache_path, 'r') as f:
-                    chart_data = json.load(f)
-                self.current_song = chart_data
-                self.song_notes = sorted(chart_data["notes"], key=lambda x: x[0])
-                print(f"[Game] Loaded {len(self.song_notes)} notes from cache")
-                self.chart_ready = True
-                return True
-            except Exception as e:
-                print(f"[Game] Cache load failed: {e}, will regenerate")
-
-        # Generate chart (this will be slow first time, fast after due to caching)
-        print("[Game] ========================================")
-        print("[Game] GENERATING CHART - First time takes 30-60 seconds!")
-        print("[Game] Subsequent plays will load from cache instantly.")
-        print("[Game] ========================================")
-
-        if self.chart_generator:
-            try:
-                chart_data = self.chart_generator.generate_and_cache(
-                    audio_path,
-                    difficulty=difficulty
-                )
-                self.current_song = chart_data
-                self.song_notes = sorted(chart_data["notes"], key=lambda x: x[0])
-                print(f"[Game] Generated {len(self.song_notes)} notes")
-                self.chart_ready = True
-                return True
-            except Exception as e:
-                print(f"[Game] ERROR: Chart generation failed: {e}")
-                import traceback
-                traceback.print_exc()
-                self.song_notes = []
-                return False
-        else:
-            print("[Game] ERROR: No chart generator (librosa not installed)")
+        log.info(f"Audio loaded successfully! Length: {self.song_audio.length}s, State: {self.song_audio.state}")
+
+        # Any load still running for a previous song becomes stale
+        self._chart_load_token += 1
+        self.chart_loading = True
+        self.chart_ready = False
+        self.loading_song = (audio_filename, difficulty)
+        self.loaded_song = None
+        self.chart_progress = ('Loading chart', 0.0)
+
+        worker = threading.Thread(
+            target=self._load_chart_worker,
+            args=(self._chart_load_token, audio_path, difficulty),
+            name='chart-loader',
+            daemon=True
+        )
+        worker.start()
+        return True
+
+    def _load_chart_worker(self, token, audio_path, difficulty):
+        """Worker thread: read or generate the chart, posting progress to the main loop"""
+        def progress(stage, fraction):
+            Clock.schedule_once(lambda dt: self._on_chart_progress(token, stage, fraction))
+
+        chart_data = None
+        try:
+            chart_data = self._read_chart(audio_path, difficulty, progress)
+        except Exception:
+            log.exception("Chart generation failed")
+
+        Clock.schedule_once(lambda dt: self._on_chart_done(token, chart_data))
+
+    def _read_chart(self, audio_path, difficulty, progress):
+        """Load the chart for a song (runs on the chart-loader thread)
+
+        Notes come back as a time-sorted chart_format.NOTE_DTYPE array.
+        """
+        # Check for a recorded/exported chart next to the audio (fast path) -
+        # <song>_chart.bin (memory-mapped) or <song>_chart.json
+        # Generated charts live in the content-addressed chart cache instead
+        try:
+            chart_data = chart_format.load_song_chart(audio_path)
+            if chart_data is not None:
+                log.info(f"Found chart next to the audio for: {os.path.basename(audio_path)}")
+                return select_difficulty(chart_data, difficulty)
+        except Exception as e:
+            log.warning(f"Cache load failed: {e}, will regenerate")
+
+        # Load from the chart cache, or generate (slow first time, instant after)
+        log.info("========================================")
+        log.info("LOADING CHART - Generating takes 30-60 seconds the first time!")
+        log.info("Cached charts load instantly.")
+        log.info("========================================")
+        chart_data = self.chart_generator.generate_and_cache(
+            audio_path,
+            difficulty=difficulty,
+            progress=progress
+        )
+        chart_data["notes"] = chart_format.notes_to_array(chart_data["notes"])
+        return chart_data
+
+    def _on_chart_progress(self, token, stage, fraction):
+        if token != self._chart_load_token:
+            return  # A newer load_song() superseded this one
+        self.chart_progress = (stage, fraction)
+        self.dispatch('on_chart_progress', stage, fraction)
+
+    def _on_chart_done(self, token, chart_data):
+        if token != self._chart_load_token:
+            return
+        self.chart_loading = False
+        if chart_data is None:
             self.song_notes = []
-            return False
+            self.song_schedule = None
+        else:
+            self.current_song = chart_data
+            self.song_notes = chart_data["notes"]  # already time-sorted
+            self.song_schedule = SpawnSchedule(self.song_notes)
+            self.loaded_song = self.loading_song
+            self.chart_ready = True
+            log.info(f"Chart ready: {len(self.song_notes)} notes")
+
+        self.dispatch('on_chart_loaded', self.chart_ready)
+
+        # start_game() was called while the chart was still loading
+        if self.pending_start is not None:
+            song_filename, self.pending_start = self.pending_start, None
+            if self.chart_ready:
+                self.start_game(song_filename)
+            else:
+                log.error("Failed to load song!")
+
+    def on_chart_progress(self, stage, fraction):
+        pass
+
+    def on_chart_loaded(self, success):
+        pass
+
+    def is_song_loaded(self, song_filename, difficulty=None):
+        """True when the song's chart at difficulty (default the chosen one) is ready to play"""
+        song = (song_filename, difficulty or self.difficulty)
+        return self.chart_ready and self.loaded_song == song and self.song_audio is not None
+
+    def cancel_pending_start(self):
+        """Don't start the game when the chart in flight finishes loading"""
+        self.pending_start = None
 
     def start_game(self, song_filename=None):
-        print("[Game] start_game called")
+        log.info("start_game called")
         if not self.game_started:
-            print("[Game] Game not set up yet, aborting")
+            log.warning("Game not set up yet, aborting")
             return
 
         # Default to Mountain King if no song specified
         if song_filename is None:
             song_filename = "kevin-macleod-hall-of-the-mountain-king.mp3"
 
-        # Load the selected song
-        print(f"[Game] Calling load_song for: {song_filename}")
-        result = self.load_song(song_filename, difficulty='medium')
-
-        if not result:
-            print("[Game] Failed to load song!")
+        # The chart loads on a worker thread - start once it is ready
+        if not self.is_song_loaded(song_filename):
+            self.pending_start = song_filename
+            if self.chart_loading and self.loading_song == (song_filename, self.difficulty):
+                log.info("Chart still loading, game will start when it is ready")
+                return
+            log.info(f"Calling load_song for: {song_filename}")
+            if not self.load_song(song_filename):
+                self.pending_start = None
+                log.error("Failed to load song!")
             return
 
-        print(f"[Game] Song loaded! Notes: {len(self.song_notes)}")
+        log.info(f"Song loaded! Notes: {len(self.song_notes)}")
 
         # Start the game
         self.game_active = True
-        self.scores = [0] * self.num_players
-        self.combos = [0] * self.num_players
+        self.referee.reset(self.num_players)  # Scores, combos and any previous holds
         self.game_ended = False
-        self.next_note_index = 0
-        self.active_holds = {}  # Clear any previous holds
+        self.spawn_schedule = self.song_schedule
+        self.spawn_schedule.rewind()
         self.elapsed_time = 0
+        self.song_clock.start()
+        song, difficulty = self.loaded_song
+        self.replay_recorder.start(song, difficulty, self.song_notes, self.num_players, self.note_speed,
+                                   self.height, self.audio_offset, self.audio_latency)
 
         # Clear any existing notes/popups
-        for note in self.notes:
-            self.remove_widget(note)
-        self.notes = []
+        self.clear_notes()
 
         for popup in self.score_popups:
             self.remove_widget(popup)
@@ -841,7 +875,7 @@ class RhythmGame(Widget):
         fall_time = self.get_note_fall_time()
 
         # Get the first note time from the chart
-        first_note_time = self.song_notes[0][0] if self.song_notes else 0
+        first_note_time = float(self.song_notes[0]['time']) if len(self.song_notes) else 0
 
         # Start audio quickly - notes will be pre-positioned to arrive at correct times
         # Just add a tiny delay for audio system to be ready
@@ -849,50 +883,61 @@ class RhythmGame(Widget):
 
         # Reset audio sync tracking
         self.audio_playing = False
-        self.audio_start_elapsed = 0
         self.first_note_time = first_note_time  # Store for sync calculations
 
-        print(f"[Game] Note fall time: {fall_time:.2f}s")
-        print(f"[Game] First note at: {first_note_time:.3f}s")
-        print(f"[Game] Audio latency compensation: {self.audio_latency:.3f}s")
-        print(f"[Game] Calculated audio delay: {audio_delay:.3f}s")
-        print(f"[Game] Visual note offset: {self.audio_offset:.3f}s")
+        log.info(f"Note fall time: {fall_time:.2f}s")
+        log.info(f"First note at: {first_note_time:.3f}s")
+        log.info(f"Audio latency compensation: {self.audio_latency:.3f}s")
+        log.info(f"Calculated audio delay: {audio_delay:.3f}s")
+        log.info(f"Visual note offset: {self.audio_offset:.3f}s")
 
         # Start update loop immediately (notes start spawning)
-        print("[Game] Starting game loop...")
+        log.info("Starting game loop...")
         self.update_timer = Clock.schedule_interval(self.update_game, 1/60.0)
 
         # Schedule audio to start with calculated delay
         def start_audio(dt):
-            print(f"[Game] Starting audio playback at elapsed_time={self.elapsed_time:.3f}s")
+            log.info(f"Starting audio playback at song time={self.song_clock.time():.3f}s")
             if self.song_audio:
                 self.song_audio.volume = 1.0
                 self.song_audio.play()
                 self.audio_playing = True
-                self.audio_start_elapsed = self.elapsed_time
-                print(f"[Game] Audio playing!")
+                self.song_clock.audio_started()
+                log.info("Audio playing!")
             else:
-                print("[Game] ERROR: No audio loaded!")
+                log.error("No audio loaded!")
 
         Clock.schedule_once(start_audio, audio_delay)
-        print(f"[Game] Audio scheduled to start in {audio_delay:.2f}s")
-        print("[Game] Game is now ACTIVE!")
+        log.info(f"Audio scheduled to start in {audio_delay:.2f}s")
+        log.info("Game is now ACTIVE!")
 
     def stop_game(self):
         self.game_active = False
         self.audio_playing = False
-        self.active_holds = {}  # Clear any active holds
+        self.save_replay()
+        self.active_holds.clear()
         if self.song_audio:
             self.song_audio.stop()
         if self.update_timer:
             self.update_timer.cancel()
             self.update_timer = None
 
+    def save_replay(self):
+        """Save the song just played (see replay.py - `python replay.py <file>` re-runs it)"""
+        replay = self.replay_recorder.finish(self.referee, completed=self.game_ended)
+        if replay is None or not replay["events"]:
+            return
+        try:
+            path = save_replay(replay)
+            log.info(f"Replay saved: {path}")
+        except OSError as e:
+            log.warning(f"Could not save replay: {e}")
+
     # ========== RECORDING MODE ==========
 
     def start_recording(self, song_filename):
         """Start recording mode - play song and record button presses"""
-        print("[Recording] Starting recording mode...")
+        recording_log.info("Starting recording mode...")
 
         if not self.game_started:
             self.setup_game(1)
@@ -900,7 +945,7 @@ class RhythmGame(Widget):
         # Load the audio file
         audio_path = os.path.join(self.script_dir, song_filename)
         if not os.path.exists(audio_path):
-            print(f"[Recording] ERROR: Audio file not found: {audio_path}")
+            recording_log.error(f"Audio file not found: {audio_path}")
             return False
 
         # Stop any existing audio
@@ -910,16 +955,18 @@ class RhythmGame(Widget):
 
         self.song_audio = SoundLoader.load(audio_path)
         if not self.song_audio:
-            print(f"[Recording] ERROR: Failed to load audio: {audio_path}")
+            recording_log.error(f"Failed to load audio: {audio_path}")
             return False
 
-        print(f"[Recording] Audio loaded! Length: {self.song_audio.length}s")
+        recording_log.info(f"Audio loaded! Length: {self.song_audio.length}s")
 
         # Initialize recording state
         self.recording_mode = True
         self.recorded_notes = []
+        self.recorded_bpm = None
         self.recording_key_down_times = {}  # Clear any pending key presses
         self.elapsed_time = 0
+        self.song_clock.start()
         self.current_song_filename = song_filename
 
         # Start update loop
@@ -929,35 +976,53 @@ class RhythmGame(Widget):
         self.song_audio.volume = 1.0
         self.song_audio.play()
         self.audio_playing = True
+        self.song_clock.audio_started()
 
-        print("[Recording] Recording started! Press buttons to record notes.")
+        recording_log.info("Recording started! Press buttons to record notes.")
         return True
 
-    def record_note(self, lane):
+    def input_clock_time(self, event_time=None):
+        """
+        Song clock reading at an input's own perf_counter() stamp from the
+        input queue (None means now)
+        """
+        if event_time is None:
+            return self.song_clock.time()
+        return self.song_clock.time_at(event_time)
+
+    def input_song_time(self, event_time=None):
+        """
+        Song time of an input as the player heard it, for recording charts by
+        ear. When you hear a beat and press, there's latency between
+        audio.get_pos() and what you're actually hearing, so the latency is
+        subtracted from the song clock reading to get the "true" time.
+        Gameplay judges inputs on the note field's time instead (see check_hit).
+        """
+        return self.input_clock_time(event_time) - self.audio_latency
+
+    def record_note(self, lane, event_time=None):
         """Record a button press during recording mode (start of tap or hold)"""
         if not self.recording_mode:
             return
 
-        # Record the note with current elapsed time, compensating for audio latency
-        # When you hear a beat and press, there's latency between audio.get_pos() and
-        # what you're actually hearing, so subtract the latency to get the "true" time
-        note_time = max(0, self.elapsed_time - self.audio_latency)
+        # Record the note at the song time of the press, compensating for audio latency
+        note_time = max(0, self.input_song_time(event_time))
 
         # Track when this key was pressed for potential hold note
         self.recording_key_down_times[lane] = note_time
 
-        print(f"[Recording] Note DOWN: time={note_time:.3f}s, lane={lane}")
+        recording_log.debug("Note DOWN: time=%.3fs, lane=%d", note_time, lane)
 
         # Visual feedback
         self.show_score_popup(f"{note_time:.2f}s", (0, 1, 0.5, 1),
                              self.target_buttons[0][lane].center_x, 150)
 
-    def record_note_release(self, lane):
+    def record_note_release(self, lane, event_time=None):
         """Record a button release during recording mode (end of hold)"""
         if not self.recording_mode:
             return
 
-        release_time = max(0, self.elapsed_time - self.audio_latency)
+        release_time = max(0, self.input_song_time(event_time))
 
         if lane in self.recording_key_down_times:
             press_time = self.recording_key_down_times[lane]
@@ -966,35 +1031,25 @@ class RhythmGame(Widget):
             # If held for more than 0.2s, treat as a hold note
             if duration > 0.2:
                 self.recorded_notes.append([press_time, lane, round(duration, 3)])
-                print(f"[Recording] HOLD note: time={press_time:.3f}s, lane={lane}, duration={duration:.3f}s")
+                recording_log.debug("HOLD note: time=%.3fs, lane=%d, duration=%.3fs", press_time, lane, duration)
                 self.show_score_popup(f"HOLD {duration:.1f}s", (1, 0.5, 0, 1),
                                      self.target_buttons[0][lane].center_x, 180)
             else:
                 # Short press = tap note
                 self.recorded_notes.append([press_time, lane])
-                print(f"[Recording] TAP note: time={press_time:.3f}s, lane={lane}")
+                recording_log.debug("TAP note: time=%.3fs, lane=%d", press_time, lane)
 
             del self.recording_key_down_times[lane]
         else:
-            print(f"[Recording] Warning: Release without matching press for lane {lane}")
+            recording_log.warning(f"Release without matching press for lane {lane}")
 
+    @frame_profiler.timed('update_recording')
     def update_recording(self, dt):
         """Update loop for recording mode"""
         if not self.recording_mode:
             return
 
-        self.elapsed_time += dt
-
-        # Sync to audio position if available
-        if self.song_audio and self.song_audio.state == 'play':
-            audio_pos = self.song_audio.get_pos()
-            if audio_pos > 0:
-                # Sync elapsed time to audio position
-                drift = audio_pos - self.elapsed_time
-                if abs(drift) > 0.1:
-                    self.elapsed_time = audio_pos
-                elif abs(drift) > 0.01:
-                    self.elapsed_time += drift * 0.1
+        self.elapsed_time = self.sync_song_clock()
 
         # Update score popups
         for popup in self.score_popups[:]:
@@ -1008,18 +1063,18 @@ class RhythmGame(Widget):
 
     def stop_recording(self):
         """Stop recording and save the chart"""
-        print("[Recording] Stopping recording...")
+        recording_log.info("Stopping recording...")
 
         # Flush any pending hold notes (keys still held when recording stopped)
-        release_time = max(0, self.elapsed_time - self.audio_latency)
+        release_time = max(0, self.input_song_time())
         for lane, press_time in list(self.recording_key_down_times.items()):
             duration = release_time - press_time
             if duration > 0.2:
                 self.recorded_notes.append([press_time, lane, round(duration, 3)])
-                print(f"[Recording] Flushed pending HOLD: lane={lane}, duration={duration:.3f}s")
+                recording_log.info(f"Flushed pending HOLD: lane={lane}, duration={duration:.3f}s")
             else:
                 self.recorded_notes.append([press_time, lane])
-                print(f"[Recording] Flushed pending TAP: lane={lane}")
+                recording_log.info(f"Flushed pending TAP: lane={lane}")
         self.recording_key_down_times = {}
 
         self.recording_mode = False
@@ -1040,9 +1095,9 @@ class RhythmGame(Widget):
             # Save to chart file
             self.save_recorded_chart()
 
-            print(f"[Recording] Recording complete! {len(self.recorded_notes)} notes saved.")
+            recording_log.info(f"Recording complete! {len(self.recorded_notes)} notes saved.")
         else:
-            print("[Recording] No notes recorded.")
+            recording_log.info("No notes recorded.")
 
         # Clear popups
         for popup in self.score_popups[:]:
@@ -1050,59 +1105,59 @@ class RhythmGame(Widget):
         self.score_popups = []
 
     def cleanup_timing(self):
-        """Clean up the timing of recorded notes by quantizing to nearest subdivision"""
+        """Clean up the timing of recorded notes by quantizing to a detected beat grid"""
         if not self.recorded_notes:
             return
 
-        print(f"[Recording] Cleaning up timing for {len(self.recorded_notes)} notes...")
-
-        # Sort notes by time
+        recording_log.info(f"Cleaning up timing for {len(self.recorded_notes)} notes...")
         self.recorded_notes.sort(key=lambda x: x[0])
 
-        # Estimate BPM from note intervals (if enough notes)
-        if len(self.recorded_notes) >= 4:
-            intervals = []
-            for i in range(1, min(len(self.recorded_notes), 20)):
-                interval = self.recorded_notes[i][0] - self.recorded_notes[i-1][0]
-                if 0.1 < interval < 2.0:  # Reasonable interval range
-                    intervals.append(interval)
-
-            if intervals:
-                # Use median interval as the base beat
-                intervals.sort()
-                median_interval = intervals[len(intervals) // 2]
-
-                # Quantize to 1/4 of the median interval (16th note subdivision)
-                quantize_unit = median_interval / 4
-
-                print(f"[Recording] Detected beat interval: {median_interval:.3f}s, quantize unit: {quantize_unit:.3f}s")
-
-                # Quantize each note
-                for i, note in enumerate(self.recorded_notes):
-                    original_time = note[0]
-                    # Round to nearest quantize unit
-                    quantized_time = round(original_time / quantize_unit) * quantize_unit
-                    self.recorded_notes[i][0] = round(quantized_time, 3)
-
-                    if abs(original_time - quantized_time) > 0.01:
-                        print(f"[Recording] Adjusted note {i}: {original_time:.3f}s -> {quantized_time:.3f}s")
-
-        # Remove duplicate notes (same time and lane)
-        seen = set()
-        unique_notes = []
-        for note in self.recorded_notes:
-            key = (round(note[0], 2), note[1])
-            if key not in seen:
-                seen.add(key)
-                unique_notes.append(note)
-
-        self.recorded_notes = unique_notes
-        print(f"[Recording] After cleanup: {len(self.recorded_notes)} notes")
+        # Presses near an onset detected in the audio snap onto it
+        on_onset = self.snap_recording_to_onsets()
+
+        # Tempo from every note interval, then the other starts and all hold ends
+        # snapped to 16th notes and duplicates dropped in one vectorized pass (see chart_cleanup)
+        cleaned = quantize_notes(self.recorded_notes, fixed=on_onset)
+        self.recorded_notes = cleaned["notes"]
+        self.recorded_bpm = cleaned["bpm"]
+
+        if cleaned["bpm"]:
+            recording_log.info(f"Detected tempo: {cleaned['bpm']:.2f} BPM, quantize unit: {cleaned['unit']:.3f}s, "
+                               f"{cleaned['adjusted']} notes adjusted by more than 10ms")
+        recording_log.info(f"After cleanup: {len(self.recorded_notes)} notes")
+
+    def snap_recording_to_onsets(self):
+        """
+        Snap recorded presses to the onsets in the song's stored analysis
+        (only if the chart generator already analyzed it - this never
+        analyzes the audio). Returns which notes were snapped, or None.
+        """
+        audio_path = os.path.join(self.script_dir, self.current_song_filename)
+        analysis = self.chart_generator.stored_features(audio_path)
+        if analysis is None or len(analysis["onset_times"]) == 0:
+            recording_log.info("No stored onsets for this song - snapping to the beat grid only")
+            return None
+
+        self.recorded_notes, corrections = snap_to_onsets(self.recorded_notes, analysis["onset_times"])
+        snapped = ~np.isnan(corrections)
+        if recording_log.isEnabledFor(logging.DEBUG):
+            for note, correction in zip(self.recorded_notes, corrections.tolist()):
+                if correction == correction:  # not NaN
+                    recording_log.debug("Onset snap: lane %d -> %.3fs (%+.0fms)", note[1], note[0], correction * 1000)
+
+        if snapped.any():
+            moved = corrections[snapped]
+            # A consistent median shift means audio_latency is off by about that much
+            recording_log.info(f"Snapped {int(snapped.sum())}/{len(snapped)} notes to onsets: "
+                               f"median {np.median(moved) * 1000:+.0f}ms, max {np.abs(moved).max() * 1000:.0f}ms")
+        else:
+            recording_log.info(f"No recorded notes within {ONSET_TOLERANCE * 1000:.0f}ms of an onset")
+        return snapped
 
     def save_recorded_chart(self):
         """Save recorded notes to the chart file"""
         if not hasattr(self, 'current_song_filename'):
-            print("[Recording] ERROR: No song filename set")
+            recording_log.error("No song filename set")
             return
 
         import json
@@ -1115,26 +1170,32 @@ class RhythmGame(Widget):
         chart_data = {
             "name": base_name,
             "file": self.current_song_filename,
-            "bpm": 112,  # Default, could be detected
+            "bpm": self.recorded_bpm or DEFAULT_BPM,  # Detected by cleanup_timing
             "duration": self.song_audio.length if self.song_audio else 0,
             "difficulty": "custom",
             "notes": self.recorded_notes
         }
 
-        # Save to file
+        # Save to file - JSON for editing, plus the binary chart the game loads
         with open(chart_path, 'w') as f:
             json.dump(chart_data, f, indent=2)
+        bin_path = chart_format.save_chart(os.path.splitext(chart_path)[0] + chart_format.BINARY_SUFFIX, chart_data)
 
-        print(f"[Recording] Chart saved to: {chart_path}")
+        recording_log.info(f"Chart saved to: {chart_path} (+ {os.path.basename(bin_path)})")
+
+        # A chart loaded earlier for this song is now out of date
+        if self.loaded_song and self.loaded_song[0] == self.current_song_filename:
+            self.loaded_song = None
+            self.chart_ready = False
 
     # ========== TEST PLAYBACK MODE ==========
 
     def start_test_playback(self, song_filename):
         """Start test playback - plays recorded notes as falling notes with audio"""
-        print(f"[Test] Starting test playback with {len(self.recorded_notes)} notes...")
+        test_log.info(f"Starting test playback with {len(self.recorded_notes)} notes...")
 
         if not self.recorded_notes:
-            print("[Test] No notes to play!")
+            test_log.info("No notes to play!")
             return False
 
         if not self.game_started:
@@ -1143,7 +1204,7 @@ class RhythmGame(Widget):
         # Load the audio file
         audio_path = os.path.join(self.script_dir, song_filename)
         if not os.path.exists(audio_path):
-            print(f"[Test] ERROR: Audio file not found: {audio_path}")
+            test_log.error(f"Audio file not found: {audio_path}")
             return False
 
         # Stop any existing audio
@@ -1153,25 +1214,23 @@ class RhythmGame(Widget):
 
         self.song_audio = SoundLoader.load(audio_path)
         if not self.song_audio:
-            print(f"[Test] ERROR: Failed to load audio: {audio_path}")
+            test_log.error(f"Failed to load audio: {audio_path}")
             return False
 
         # Clear existing notes
-        for note in self.notes[:]:
-            self.remove_widget(note)
-        self.notes = []
+        self.clear_notes()
 
         # Initialize test playback state
         self.test_playback_mode = True
-        self.test_next_note_index = 0
 
-        # Sort recorded notes by time
+        # Sort recorded notes by time and compile them for spawning
         self.recorded_notes.sort(key=lambda x: x[0])
+        self.spawn_schedule = SpawnSchedule(self.recorded_notes)
 
-        # Start elapsed_time at 0, notes will be pre-positioned
+        # Start the song clock at 0 - audio position is attached once it plays
         fall_time = self.get_note_fall_time()
         self.elapsed_time = 0
-        self.audio_start_elapsed = 0  # Will be set when audio starts
+        self.song_clock.start()
 
         # Start update loop
         self.update_timer = Clock.schedule_interval(self.update_test_playback, 1/60.0)
@@ -1184,71 +1243,33 @@ class RhythmGame(Widget):
                 self.song_audio.volume = 1.0
                 self.song_audio.play()
                 self.audio_playing = True
-                self.audio_start_elapsed = self.elapsed_time  # Track when audio started
-                print(f"[Test] Audio started at elapsed_time={self.elapsed_time:.3f}s")
+                audio_start = self.song_clock.audio_started()
+                test_log.info(f"Audio started at song time={audio_start:.3f}s")
 
         Clock.schedule_once(start_audio, audio_delay)
 
-        print(f"[Test] Test playback started! Fall time: {fall_time:.2f}s")
+        test_log.info(f"Test playback started! Fall time: {fall_time:.2f}s")
         return True
 
+    @frame_profiler.timed('update_test_playback')
     def update_test_playback(self, dt):
         """Update loop for test playback mode"""
         if not self.test_playback_mode:
             return
 
-        self.elapsed_time += dt
-
-        # Sync to audio position (accounting for when audio started)
-        if self.song_audio and self.song_audio.state == 'play':
-            audio_pos = self.song_audio.get_pos()
-            if audio_pos > 0:
-                # Calculate expected elapsed_time based on audio position
-                expected_elapsed = self.audio_start_elapsed + audio_pos
-                drift = expected_elapsed - self.elapsed_time
-                if abs(drift) > 0.1:
-                    self.elapsed_time = expected_elapsed
-                elif abs(drift) > 0.01:
-                    self.elapsed_time += drift * 0.1
+        self.elapsed_time = self.sync_song_clock()
 
         # Spawn notes based on recorded notes
-        fall_time = self.get_note_fall_time()
-
-        while self.test_next_note_index < len(self.recorded_notes):
-            note_data = self.recorded_notes[self.test_next_note_index]
-            note_time = note_data[0]
-            note_lane = note_data[1]
-            note_duration = note_data[2] if len(note_data) > 2 else 0
-
-            # Note HEAD should arrive at target at note_time
-            spawn_time = note_time - fall_time
-
-            if self.elapsed_time >= spawn_time:
-                # Calculate how late we are spawning (for pre-positioning)
-                late_by = self.elapsed_time - spawn_time
-                self.spawn_note_for_chart(note_lane, duration=note_duration, late_by=late_by)
-                self.test_next_note_index += 1
-            else:
-                break
-
-        # Move existing notes
-        for note in self.notes[:]:
-            note.move(dt)
-
-            # Update note x position
-            if note.active and note.player < len(self.target_buttons):
-                btn = self.target_buttons[note.player][note.lane]
-                note.center_x = btn.center_x
+        self.spawn_due_notes()
 
+        # Position existing notes from the song clock
+        self.position_notes(self.elapsed_time)
+        for note in self.note_field.expired(-50):
             # Remove notes that have fallen off screen
             # For hold notes, wait until the tail has also passed
-            removal_threshold = -50
-            if note.is_hold_note:
-                removal_threshold = -50 - note.tail_length
-
-            if note.y + note.height < removal_threshold:
-                self.notes.remove(note)
-                self.remove_widget(note)
+            if note.y + note.height < -50 - note.tail_length:
+                self.recycle_note(note)
+        self.note_renderer.draw(self.note_pool)
 
         # Update popups
         for popup in self.score_popups[:]:
@@ -1257,8 +1278,8 @@ class RhythmGame(Widget):
                 self.remove_widget(popup)
 
         # Check if test is complete
-        all_spawned = self.test_next_note_index >= len(self.recorded_notes)
-        all_cleared = len(self.notes) == 0
+        all_spawned = self.spawn_schedule.done
+        all_cleared = self.note_count() == 0
         no_active_holds = len(self.active_holds) == 0
 
         if all_spawned and all_cleared and no_active_holds:
@@ -1268,7 +1289,7 @@ class RhythmGame(Widget):
 
     def stop_test_playback(self):
         """Stop test playback"""
-        print("[Test] Stopping test playback...")
+        test_log.info("Stopping test playback...")
         self.test_playback_mode = False
 
         if self.update_timer:
@@ -1281,147 +1302,109 @@ class RhythmGame(Widget):
         self.audio_playing = False
 
         # Clear notes
-        for note in self.notes[:]:
-            self.remove_widget(note)
-        self.notes = []
+        self.clear_notes()
 
-        print("[Test] Test playback stopped.")
+        test_log.info("Test playback stopped.")
 
-    def spawn_note_for_chart(self, lane, duration=0, late_by=0):
+    def sync_song_clock(self):
+        """Feed the audio position to the song clock and return the current song time"""
+        if self.audio_playing and self.song_audio and self.song_audio.state == 'play':
+            self.song_clock.sample(self.song_audio.get_pos())
+        return self.song_clock.time()
+
+    def spawn_due_notes(self):
+        """Spawn every scheduled note whose spawn time (note time - fall time) has come"""
+        # Spawn times are only recomputed when the fall time (height/speed) changes
+        self.spawn_schedule.set_fall_time(self.get_note_fall_time())
+        for note_time, lane, duration in self.spawn_schedule.due(self.elapsed_time):
+            # Note HEAD should arrive at target at note_time
+            self.spawn_note_for_chart(lane, note_time, duration=duration)
+
+    def spawn_note_for_chart(self, lane, note_time, duration=0):
         """Spawn a note for a specific lane (from song chart)
 
         Args:
             lane: Which lane (0, 1, or 2)
+            note_time: Song time (seconds) when the note HEAD reaches the target
             duration: For hold notes, how long to hold in seconds (0 = tap note)
-            late_by: How many seconds late we are spawning (for pre-positioning)
         """
         for p in range(self.num_players):
-            note = Note(lane=lane, player=p, speed=self.note_speed, duration=duration)
-            note.radius = 40
-            note.size = (note.radius * 2, note.radius * 2)
+            # Chart notes spawn in time order, so each lane queue stays sorted
+            note = self.note_field.spawn(p, lane, note_time, self.note_speed, duration)
 
             btn = self.target_buttons[p][lane]
             note.center_x = btn.center_x
+            note.place(field_time(self.song_time, self.audio_offset), TARGET_Y)
 
-            # Base spawn position - note HEAD spawns here
-            base_y = self.height + 10
+    @property
+    def notes(self):
+        """Every note in play (a new list - note_field is the source of truth)"""
+        return self.note_field.notes()
 
-            # Apply audio_offset to starting Y position
-            offset_pixels = self.audio_offset * self.note_speed
+    def note_count(self):
+        return self.note_field.count()
 
-            # If spawning late, pre-position the note as if it had already been falling
-            late_pixels = late_by * self.note_speed
+    def position_notes(self, song_time):
+        """
+        Place every note from a single song clock instead of integrating
+        per-frame movement: y = TARGET_Y + (note time - song time) * speed.
+        audio_offset shifts the notes (positive = higher/earlier).
+        """
+        self.song_time = song_time
+        self.note_field.position(field_time(song_time, self.audio_offset), self.note_speed)
+        # Follow the target button x (in case of resize)
+        self.note_pool.follow_lanes([[btn.center_x for btn in buttons] for buttons in self.target_buttons])
 
-            note.y = base_y + offset_pixels - late_pixels
+    def recycle_note(self, note):
+        """Take a note out of play and return it to the pool"""
+        self.note_field.remove(note)
 
-            self.notes.append(note)
-            self.add_widget(note)
+    def clear_notes(self):
+        """Return every note in play to the pool"""
+        self.note_field.clear()
+        self.note_renderer.draw(self.note_pool)
 
+    @frame_profiler.timed('update_game')
     def update_game(self, dt):
         if not self.game_active:
             return
 
-        # Update elapsed time
-        self.elapsed_time += dt
+        # Song time for this frame - locked to the audio position once it plays
+        self.elapsed_time = self.sync_song_clock()
+        self.replay_recorder.frame(self.elapsed_time, dt, self.height, self.audio_offset)
 
-        # Once audio is playing, we can sync to actual audio position for accuracy
-        # This prevents drift between our elapsed_time and actual playback
-        if self.audio_playing and self.song_audio and self.song_audio.state == 'play':
-            audio_pos = self.song_audio.get_pos()
-            if audio_pos > 0:  # get_pos() returns valid position
-                # Calculate what elapsed_time should be based on audio position
-                # audio_pos is the current position in the audio file
-                # We want: audio_pos = elapsed_time - audio_start_elapsed
-                expected_elapsed = self.audio_start_elapsed + audio_pos
-                # Gently sync to avoid jumps (blend towards expected)
-                drift = expected_elapsed - self.elapsed_time
-                if abs(drift) > 0.1:  # If drift is significant, snap
-                    self.elapsed_time = expected_elapsed
-                elif abs(drift) > 0.01:  # Small drift, blend
-                    self.elapsed_time += drift * 0.1
-
-        # Debug: print every 2 seconds
-        if int(self.elapsed_time) % 2 == 0 and int(self.elapsed_time * 60) % 120 == 0:
+        # Debug: log every 2 seconds (skipped entirely unless DEBUG logging is on)
+        if log.isEnabledFor(logging.DEBUG) and int(self.elapsed_time) % 2 == 0 \
+                and int(self.elapsed_time * 60) % 120 == 0:
             audio_pos = self.song_audio.get_pos() if self.song_audio else -1
-            print(f"[Game] Elapsed: {self.elapsed_time:.2f}s, Audio pos: {audio_pos:.2f}s, Notes: {self.next_note_index}/{len(self.song_notes)}, Active: {len(self.notes)}")
+            log.debug("Elapsed: %.2fs, Audio pos: %.2fs, Notes: %d/%d, Active: %d", self.elapsed_time, audio_pos,
+                      self.spawn_schedule.next, len(self.spawn_schedule), self.note_count())
 
         # Spawn notes based on song chart
         # Notes should be spawned early so they arrive at the target at the right time
-        # audio_offset is applied to note Y position at spawn time, NOT to spawn timing
+        # audio_offset is applied to note Y position (see position_notes), NOT to spawn timing
         # This ensures offset changes don't cause notes to bunch up
-        fall_time = self.get_note_fall_time()
+        self.spawn_due_notes()
 
-        while self.next_note_index < len(self.song_notes):
-            note_data = self.song_notes[self.next_note_index]
-            note_time = note_data[0]
-            note_lane = note_data[1]
-            note_duration = note_data[2] if len(note_data) > 2 else 0
+        # Update active hold notes - releasing the button or key ends a hold
+        # (release_hold), so every active hold is being held right now.
+        # Don't auto-release - let the player release for the timing score.
+        # Progress is drawn from the song clock; releases are judged by their timestamp
+        self.referee.hold(field_time(self.elapsed_time, self.audio_offset))
 
-            # Calculate when to spawn: note_time minus fall_time
-            spawn_time = note_time - fall_time
+        # Position existing notes from the song clock
+        self.position_notes(self.elapsed_time)
 
-            if self.elapsed_time >= spawn_time:
-                # Calculate how late we are spawning (for pre-positioning)
-                late_by = self.elapsed_time - spawn_time
-                self.spawn_note_for_chart(note_lane, duration=note_duration, late_by=late_by)
-                self.next_note_index += 1
-            else:
-                break  # No more notes to spawn yet
-
-        # Update active hold notes
-        for key, note in list(self.active_holds.items()):
-            player, lane = key
-            # Check if the button is still being held
-            button_held = False
-            if player < len(self.target_buttons) and lane < len(self.target_buttons[player]):
-                button_held = self.target_buttons[player][lane].pressed
-
-            # Also check keyboard for player 0
-            if player == 0:
-                key_map = {0: 'h', 1: 'j', 2: 'k'}
-                if key_map.get(lane) in self._keys_pressed:
-                    button_held = True
-
-            if button_held:
-                note.update_hold(dt)
-                # Don't auto-release - let player release for timing score
-            else:
-                # Button was released - handle in release_hold
-                pass
-
-        # Move existing notes
-        for note in self.notes[:]:
-            note.move(dt)
-
-            # Update note x position to follow button (in case of resize)
-            if note.active and note.player < len(self.target_buttons):
-                btn = self.target_buttons[note.player][note.lane]
-                note.center_x = btn.center_x
-
-            # Check for missed notes
-            if note.active and note.y + note.height < 0:
-                # Never remove notes that are actively being held
-                key = (note.player, note.lane)
-                if key in self.active_holds:
-                    continue
-
-                # Also keep hold notes that were started (safety check)
-                if note.is_hold_note and note.hold_started:
-                    continue
-
-                note.deactivate()
-                self.combos[note.player] = 0
-                # Show MISS in the player's section, above the buttons
-                section_width = self.width / self.num_players
-                popup_x = section_width * note.player + section_width / 2
-                self.show_score_popup("MISS", (0.5, 0.5, 0.5, 1), popup_x, 180)
-                # Remove missed note immediately
-                self.notes.remove(note)
-                self.remove_widget(note)
+        # Check for missed notes - only the front of each lane queue can have passed
+        # (notes being held are never in this list)
+        for player in self.referee.expire(0):
+            # Show MISS in the player's section, above the buttons
+            self.show_player_popup("MISS", MISS_COLOR, player)
+        self.note_renderer.draw(self.note_pool)
 
         # Check if song is over (all notes spawned, processed, and no active holds)
-        all_notes_spawned = self.next_note_index >= len(self.song_notes)
-        all_notes_cleared = len(self.notes) == 0
+        all_notes_spawned = self.spawn_schedule.done
+        all_notes_cleared = self.note_count() == 0
         no_active_holds = len(self.active_holds) == 0
 
         if all_notes_spawned and all_notes_cleared and no_active_holds and not self.game_ended:
@@ -1443,135 +1426,42 @@ class RhythmGame(Widget):
         winners = [i + 1 for i, s in enumerate(self.scores) if s == max_score]
         return winners, max_score
 
-    def check_hit(self, player, lane):
+    def check_hit(self, player, lane, event_time=None):
+        """
+        Judge a press by the time between the note and the input itself
+        (event_time is the captured input timestamp), on the time base the
+        notes are drawn at (field_time), so frame rate, note_speed and
+        dispatch delay don't affect the rating
+        """
         if not self.game_active:
             return
         if player >= len(self.target_buttons) or lane >= len(self.target_buttons[player]):
             return
 
-        target_btn = self.target_buttons[player][lane]
-        target_center_y = target_btn.center_y
-
-        closest_note = None
-        closest_distance = float('inf')
-
-        for note in self.notes:
-            if note.active and note.player == player and note.lane == lane:
-                # For hold notes, check if the head is in range
-                distance = abs(note.center_y - target_center_y)
-                if distance < closest_distance:
-                    closest_distance = distance
-                    closest_note = note
-
-        if closest_note:
-            hit_range = target_btn.radius + closest_note.radius
-
-            if closest_distance <= hit_range:
-                # Determine hit quality
-                if closest_distance < 15:
-                    points = 100
-                    rating = "PERFECT"
-                    color = (1, 1, 0, 1)
-                elif closest_distance < 30:
-                    points = 75
-                    rating = "GREAT"
-                    color = (0, 1, 0, 1)
-                elif closest_distance < 45:
-                    points = 50
-                    rating = "GOOD"
-                    color = (0, 0.7, 1, 1)
-                else:
-                    points = 25
-                    rating = "OK"
-                    color = (0.7, 0.7, 0.7, 1)
-
-                # Show popup in the player's section, above the buttons
-                section_width = self.width / self.num_players
-                popup_x = section_width * player + section_width / 2
-                popup_y = 180  # A little above the buttons
-
-                if closest_note.is_hold_note:
-                    # Start holding - don't remove note yet
-                    closest_note.start_hold()
-                    self.active_holds[(player, lane)] = closest_note
-
-                    # Give initial points for hitting the start
-                    self.combos[player] += 1
-                    combo_bonus = min(self.combos[player], 10)
-                    initial_points = (points // 2) + (points * combo_bonus // 20)
-                    self.scores[player] += initial_points
-
-                    self.show_score_popup(rating, color, popup_x, popup_y)
-                else:
-                    # Regular tap note - remove immediately
-                    closest_note.deactivate()
-                    if closest_note in self.notes:
-                        self.notes.remove(closest_note)
-                        self.remove_widget(closest_note)
+        clock_time = self.input_clock_time(event_time)
+        self.replay_recorder.press(player, lane, clock_time, self.audio_offset)
 
-                    self.combos[player] += 1
-                    combo_bonus = min(self.combos[player], 10)
-                    total_points = points + (points * combo_bonus // 10)
-                    self.scores[player] += total_points
+        # Hold notes are judged by their head here and start holding
+        result = self.referee.press(player, lane, field_time(clock_time, self.audio_offset))
+        if result is not None:
+            rating, color = result
+            self.show_player_popup(rating, color, player)
 
-                    self.show_score_popup(rating, color, popup_x, popup_y)
-
-    def release_hold(self, player, lane):
+    def release_hold(self, player, lane, event_time=None):
         """Handle release of a hold note with timing-based scoring"""
-        key = (player, lane)
-        if key not in self.active_holds:
+        if (player, lane) not in self.active_holds:
             return
+        clock_time = self.input_clock_time(event_time)
+        self.replay_recorder.release(player, lane, clock_time, self.audio_offset)
 
-        note = self.active_holds[key]
-        del self.active_holds[key]
-
-        # Calculate how close to perfect timing (1.0 = exactly on time)
-        # < 1.0 means early, > 1.0 means late
-        timing_error = abs(note.hold_progress - 1.0)
-
-        # Determine rating based on timing error
-        if timing_error < 0.05:  # Within 5% of perfect
-            points = 100
-            rating = "PERFECT"
-            color = (1, 1, 0, 1)
-            self.combos[player] += 1
-        elif timing_error < 0.10:  # Within 10%
-            points = 75
-            rating = "GREAT"
-            color = (0, 1, 0, 1)
-            self.combos[player] += 1
-        elif timing_error < 0.20:  # Within 20%
-            points = 50
-            rating = "GOOD"
-            color = (0, 0.7, 1, 1)
-            self.combos[player] += 1
-        elif timing_error < 0.35:  # Within 35%
-            points = 25
-            rating = "OK"
-            color = (0.7, 0.7, 0.7, 1)
-        else:
-            # Too early or too late - counts as MISS
-            points = 0
-            rating = "MISS"
-            color = (0.5, 0.5, 0.5, 1)
-            self.combos[player] = 0  # Break combo
-
-        combo_bonus = min(self.combos[player], 10)
-        total_points = points + (points * combo_bonus // 10)
-        self.scores[player] += total_points
+        # Rated by the time between the release and the end of the hold, like presses
+        rating, color = self.referee.release(player, lane, field_time(clock_time, self.audio_offset))
+        self.show_player_popup(rating, color, player)
 
-        # Show popup in the player's section, above the buttons
+    def show_player_popup(self, text, color, player):
+        """Show a popup in the player's section, a little above the buttons"""
         section_width = self.width / self.num_players
-        popup_x = section_width * player + section_width / 2
-        popup_y = 180  # A little above the buttons
-
-        self.show_score_popup(rating, color, popup_x, popup_y)
-
-        # Remove the note
-        note.deactivate()
-        if note in self.notes:
-            self.notes.remove(note)
-            self.remove_widget(note)
+        self.show_score_popup(text, color, section_width * player + section_width / 2, 180)
 
     def show_score_popup(self, text, color, x, y):
         popup = ScorePopup(text=text, color=color)
@@ -1593,6 +1483,8 @@ class RhythmGameApp(FloatLayout):
 
         self.game = RhythmGame()
         self.game.size_hint = (1, 1)  # Make game fill parent
+        self.game.bind(on_chart_progress=self.on_chart_progress,
+                       on_chart_loaded=self.on_chart_loaded)
         self.add_widget(self.game)
 
         self.player_select_label = Label(
@@ -1626,7 +1518,7 @@ class RhythmGameApp(FloatLayout):
         )
         self.calibrate_button.bind(on_release=self.start_calibration)
         self.add_widget(self.calibrate_button)
-        print("[Debug] Calibrate button created and bound")
+        debug_log.debug("Calibrate button created and bound")
 
         # Calibration status label
         self.calibration_label = Label(
@@ -1741,6 +1633,18 @@ class RhythmGameApp(FloatLayout):
         self.song_back_button.bind(on_press=self.back_to_player_select)
         self.add_widget(self.song_back_button)
 
+        # Difficulty for the song about to be picked - tap to cycle through the tiers
+        self.difficulty_button = Button(
+            text=self.difficulty_text(),
+            size_hint=(None, None),
+            size=(250, 40),
+            font_size=14,
+            opacity=0,
+            disabled=True
+        )
+        self.difficulty_button.bind(on_press=self.cycle_difficulty)
+        self.add_widget(self.difficulty_button)
+
         # Mode selection UI (for Hall of the Mountain King)
         self.mode_select_label = Label(
             text='Select Mode',
@@ -1844,6 +1748,17 @@ class RhythmGameApp(FloatLayout):
         self.start_button.bind(on_press=self.toggle_game)
         self.add_widget(self.start_button)
 
+        # Chart loading progress (shown under the start button)
+        self.chart_status_label = Label(
+            text='',
+            font_size=14,
+            color=(0.8, 0.8, 0.8, 1),
+            size_hint=(None, None),
+            size=(400, 30),
+            opacity=0
+        )
+        self.add_widget(self.chart_status_label)
+
         self.winner_label = Label(
             text='',
             font_size=28,
@@ -1885,9 +1800,51 @@ class RhythmGameApp(FloatLayout):
         self.back_to_menu_button.bind(on_press=self.go_to_menu)
         self.add_widget(self.back_to_menu_button)
 
+        # Chart engine (librosa) status - bottom left of the menu
+        self.engine_label = Label(
+            text='',
+            font_size=12,
+            color=(0.7, 0.7, 0.7, 0.8),
+            size_hint=(None, None),
+            size=(260, 25),
+            halign='left'
+        )
+        self.add_widget(self.engine_label)
+        self.engine_status_update = None
+
         self.ui_update = Clock.schedule_interval(self.update_ui, 0.1)
         self.bind(size=self.update_ui_positions, pos=self.update_ui_positions)
         Clock.schedule_once(lambda dt: self.update_ui_positions(), 0.1)
+        # Runs on the first frame, after the menu has been drawn
+        Clock.schedule_once(self.on_first_frame, 0)
+
+    def on_first_frame(self, dt):
+        """Report cold-start time, then warm up librosa without blocking the menu"""
+        startup_ms = (time.perf_counter() - _STARTUP_T0) * 1000
+        startup_log.info(f"Menu ready in {startup_ms:.0f}ms")
+
+        if LIBROSA_AVAILABLE:
+            # Give the menu a moment to settle before the import competes for the CPU
+            Clock.schedule_once(lambda dt: warm_up_librosa(), 1.0)
+            self.engine_status_update = Clock.schedule_interval(self.update_engine_status, 0.5)
+        self.update_engine_status(0)
+
+    def update_engine_status(self, dt):
+        """Poll the background librosa warm-up and show it in the menu"""
+        status = librosa_status()
+        if status == 'ready':
+            self.engine_label.text = 'Chart generator ready'
+        elif status in ('idle', 'loading'):
+            self.engine_label.text = 'Chart generator warming up...'
+        elif status == 'error':
+            self.engine_label.text = 'Chart generator failed to load'
+            startup_log.warning("Librosa failed to load - only cached charts can be played")
+        else:
+            self.engine_label.text = 'Chart generator unavailable (cached charts only)'
+
+        if status in ('ready', 'error') and self.engine_status_update:
+            self.engine_status_update.cancel()
+            self.engine_status_update = None
 
     def update_bg(self, *args):
         self.bg_rect.pos = self.pos
@@ -1897,14 +1854,21 @@ class RhythmGameApp(FloatLayout):
         # Check if touch hits calibrate button - manually trigger since button events aren't working
         if self.calibrate_button.opacity > 0 and not self.calibrate_button.disabled:
             if self.calibrate_button.collide_point(*touch.pos):
-                print(f"[Debug] Touch on calibrate button! Triggering calibration...")
+                debug_log.debug("Touch on calibrate button! Triggering calibration...")
                 self.start_calibration(self.calibrate_button)
                 return True
 
+        # Check if touch hits difficulty button
+        if self.difficulty_button.opacity > 0 and not self.difficulty_button.disabled:
+            if self.difficulty_button.collide_point(*touch.pos):
+                debug_log.debug("Touch on difficulty button!")
+                self.cycle_difficulty(self.difficulty_button)
+                return True
+
         # Check if touch hits song back button
         if self.song_back_button.opacity > 0 and not self.song_back_button.disabled:
             if self.song_back_button.collide_point(*touch.pos):
-                print(f"[Debug] Touch on back button!")
+                debug_log.debug("Touch on back button!")
                 self.back_to_player_select(self.song_back_button)
                 return True
 
@@ -1912,7 +1876,7 @@ class RhythmGameApp(FloatLayout):
         for i, btn in enumerate(self.player_buttons):
             if btn.opacity > 0 and not btn.disabled:
                 if btn.collide_point(*touch.pos):
-                    print(f"[Debug] Touch on player button {i+1}!")
+                    debug_log.debug("Touch on player button %d!", i + 1)
                     self.select_players(i + 1)
                     return True
 
@@ -1920,33 +1884,26 @@ class RhythmGameApp(FloatLayout):
         for i, btn in enumerate(self.song_buttons):
             if btn.opacity > 0 and not btn.disabled:
                 if btn.collide_point(*touch.pos):
-                    print(f"[Debug] Touch on song button!")
+                    debug_log.debug("Touch on song button!")
                     self.select_song(self.available_songs[i][0])
                     return True
 
         return super().on_touch_down(touch)
 
     def on_offset_change(self, instance, value):
-        """Called when the offset slider value changes - adjusts note visual position"""
+        """Called when the offset slider value changes - moves the notes and the judging time with them"""
         # Convert from ms to seconds
         offset_ms = int(value)
-        old_offset = self.game.audio_offset
-        new_offset = value / 1000.0
-
-        # Calculate the position change needed
-        # offset in seconds * note_speed = pixels to move
-        offset_delta = new_offset - old_offset
-        pixel_delta = offset_delta * self.game.note_speed
+        self.game.audio_offset = value / 1000.0
 
-        # Move all existing notes by the delta (positive offset = notes move up)
-        for note in self.game.notes:
-            note.y += pixel_delta
-
-        self.game.audio_offset = new_offset
+        # Notes are positioned from the clock, so re-place them at the current song time
+        # (positive offset = notes move up)
+        self.game.position_notes(self.game.song_time)
+        self.game.note_renderer.draw(self.game.note_pool)
         self.offset_label.text = f'Note\nOffset\n{offset_ms}ms'
 
     def on_latency_change(self, instance, value):
-        """Called when the audio latency slider changes - adjusts audio start timing"""
+        """Called when the audio latency slider changes - applies to notes recorded by ear"""
         latency_ms = int(value)
         self.game.audio_latency = value / 1000.0
         self.latency_label.text = f'Audio\nLatency\n{latency_ms}ms'
@@ -1977,6 +1934,11 @@ class RhythmGameApp(FloatLayout):
         self.latency_label.center_x = self.width - 105
         self.latency_label.y = self.height / 2 + 110
 
+        # Chart engine status (bottom left corner)
+        self.engine_label.text_size = self.engine_label.size
+        self.engine_label.x = 10
+        self.engine_label.y = 5
+
         # End game button (top right corner)
         self.end_game_button.x = self.width - 110
         self.end_game_button.y = self.height - 50
@@ -1990,8 +1952,11 @@ class RhythmGameApp(FloatLayout):
             btn.center_y = self.height / 2 + 60 - i * 55
 
         # Song selection back button
+        self.difficulty_button.center_x = self.width / 2
+        self.difficulty_button.center_y = self.height / 2 - 110
+
         self.song_back_button.center_x = self.width / 2
-        self.song_back_button.center_y = self.height / 2 - 120
+        self.song_back_button.center_y = self.height / 2 - 165
 
         # Mode selection positioning
         self.mode_select_label.center_x = self.width / 2
@@ -2026,6 +1991,9 @@ class RhythmGameApp(FloatLayout):
         self.start_button.center_x = self.width / 2
         self.start_button.center_y = self.height / 2 - 130
 
+        self.chart_status_label.center_x = self.width / 2
+        self.chart_status_label.center_y = self.height / 2 - 175
+
         self.winner_label.center_x = self.width / 2
         self.winner_label.center_y = self.height / 2 + 200
 
@@ -2070,11 +2038,15 @@ class RhythmGameApp(FloatLayout):
             btn.disabled = False
         self.song_back_button.opacity = 1
         self.song_back_button.disabled = False
+        self.difficulty_button.opacity = 1
+        self.difficulty_button.disabled = False
 
         self.update_ui_positions()
 
     def back_to_player_select(self, instance):
         """Go back from song selection to player selection"""
+        self.game.cancel_pending_start()
+        self.chart_status_label.opacity = 0
         # Hide song selection
         self.song_select_label.opacity = 0
         for btn in self.song_buttons:
@@ -2082,6 +2054,8 @@ class RhythmGameApp(FloatLayout):
             btn.disabled = True
         self.song_back_button.opacity = 0
         self.song_back_button.disabled = True
+        self.difficulty_button.opacity = 0
+        self.difficulty_button.disabled = True
 
         # Remove score labels
         for label in self.score_labels:
@@ -2110,9 +2084,19 @@ class RhythmGameApp(FloatLayout):
 
         self.update_ui_positions()
 
+    def difficulty_text(self):
+        return f'Difficulty: {self.game.difficulty.capitalize()}'
+
+    def cycle_difficulty(self, instance):
+        """Step to the next chart tier - songs picked from now on load at it"""
+        game = self.game
+        game.difficulty = DIFFICULTIES[(DIFFICULTIES.index(game.difficulty) + 1) % len(DIFFICULTIES)]
+        ui_log.info(f"Difficulty: {game.difficulty}")
+        self.difficulty_button.text = self.difficulty_text()
+
     def select_song(self, song_filename):
         """Called when a song is selected"""
-        print(f"[UI] Song selected: {song_filename}")
+        ui_log.info(f"Song selected: {song_filename}")
         self.selected_song = song_filename
 
         # Hide song selection
@@ -2122,6 +2106,8 @@ class RhythmGameApp(FloatLayout):
             btn.disabled = True
         self.song_back_button.opacity = 0
         self.song_back_button.disabled = True
+        self.difficulty_button.opacity = 0
+        self.difficulty_button.disabled = True
 
         # Check if this is Hall of the Mountain King - show mode selection
         if "mountain-king" in song_filename.lower():
@@ -2132,12 +2118,42 @@ class RhythmGameApp(FloatLayout):
             self.play_mode_button.opacity = 1
             self.play_mode_button.disabled = False
         else:
-            # Show start button for other songs
+            # Show start button for other songs - enabled once the chart is ready
             self.start_button.opacity = 1
-            self.start_button.disabled = False
+            self.start_button.disabled = not self.game.is_song_loaded(song_filename)
+            self.start_button.text = 'Start' if not self.start_button.disabled else 'Loading...'
+
+        # Load/generate the chart in the background while the player decides
+        if not self.game.is_song_loaded(song_filename) and not self.game.load_song(song_filename):
+            self.chart_status_label.text = 'Could not load audio'
+            self.chart_status_label.opacity = 1
 
         self.update_ui_positions()
 
+    def on_chart_progress(self, game, stage, fraction):
+        """Chart loader progress (main thread)"""
+        self.chart_status_label.text = f'{stage}... {fraction * 100:.0f}%'
+        self.chart_status_label.opacity = 1
+
+    def on_chart_loaded(self, game, success):
+        """Chart loader finished (main thread) - enable the start button"""
+        if success:
+            self.chart_status_label.text = ''
+            self.chart_status_label.opacity = 0
+            if self.start_button.opacity > 0 and not self.game.game_active:
+                self.start_button.text = 'Start'
+                self.start_button.disabled = False
+        else:
+            self.chart_status_label.text = 'Chart failed to load'
+            self.chart_status_label.opacity = 1
+            if self.start_button.opacity > 0 or self.game.pending_start is not None:
+                # Offer a retry (start_game reloads a chart that isn't ready)
+                self.end_game_button.opacity = 0
+                self.end_game_button.disabled = True
+                self.start_button.text = 'Retry'
+                self.start_button.opacity = 1
+                self.start_button.disabled = False
+
     def hide_mode_selection(self):
         """Hide mode selection UI"""
         self.mode_select_label.opacity = 0
@@ -2171,7 +2187,7 @@ class RhythmGameApp(FloatLayout):
 
     def start_record_mode(self, instance):
         """Start recording mode for Hall of the Mountain King"""
-        print("[UI] Record mode selected!")
+        ui_log.info("Record mode selected!")
 
         # Hide mode selection
         self.hide_mode_selection()
@@ -2192,7 +2208,7 @@ class RhythmGameApp(FloatLayout):
 
     def start_play_mode(self, instance):
         """Start play mode for Hall of the Mountain King"""
-        print("[UI] Play mode selected!")
+        ui_log.info("Play mode selected!")
 
         # Hide mode selection
         self.hide_mode_selection()
@@ -2231,7 +2247,7 @@ class RhythmGameApp(FloatLayout):
 
     def stop_recording_early(self, instance):
         """Stop recording and save"""
-        print("[UI] Stop & Save pressed")
+        ui_log.info("Stop & Save pressed")
         if self.game.recording_mode:
             self.game.stop_recording()
         num_notes = len(self.game.recorded_notes) if hasattr(self.game, 'recorded_notes') else 0
@@ -2239,7 +2255,7 @@ class RhythmGameApp(FloatLayout):
 
     def restart_recording(self, instance):
         """Restart recording from beginning"""
-        print("[UI] Restart pressed")
+        ui_log.info("Restart pressed")
         # Stop current recording/test without saving
         if self.game.recording_mode:
             self.game.recording_mode = False
@@ -2253,9 +2269,7 @@ class RhythmGameApp(FloatLayout):
 
         # Clear notes
         self.game.recorded_notes = []
-        for note in self.game.notes[:]:
-            self.game.remove_widget(note)
-        self.game.notes = []
+        self.game.clear_notes()
 
         # Start fresh recording
         self.recording_label.text = "RECORDING - Press H/J/K or tap buttons"
@@ -2264,7 +2278,7 @@ class RhythmGameApp(FloatLayout):
 
     def test_recorded_notes(self, instance):
         """Test playback of recorded notes"""
-        print("[UI] Test Playback pressed")
+        ui_log.info("Test Playback pressed")
         num_notes = len(self.game.recorded_notes) if hasattr(self.game, 'recorded_notes') else 0
         if num_notes == 0:
             self.recording_label.text = "No notes to test! Record some first."
@@ -2294,7 +2308,7 @@ class RhythmGameApp(FloatLayout):
 
     def back_from_recording(self, instance):
         """Go back from recording mode"""
-        print("[UI] Back pressed")
+        ui_log.info("Back pressed")
         # Stop everything
         if self.game.recording_mode:
             self.game.recording_mode = False
@@ -2307,9 +2321,7 @@ class RhythmGameApp(FloatLayout):
             self.game.stop_test_playback()
 
         # Clean up notes
-        for note in self.game.notes[:]:
-            self.game.remove_widget(note)
-        self.game.notes = []
+        self.game.clear_notes()
 
         # Hide controls
         self.hide_recording_controls()
@@ -2320,6 +2332,7 @@ class RhythmGameApp(FloatLayout):
 
     def return_to_song_selection(self):
         """Return to song selection screen"""
+        self.game.cancel_pending_start()
         self.recording_label.opacity = 0
 
         # Clean up game state
@@ -2341,12 +2354,14 @@ class RhythmGameApp(FloatLayout):
             btn.disabled = False
         self.song_back_button.opacity = 1
         self.song_back_button.disabled = False
+        self.difficulty_button.opacity = 1
+        self.difficulty_button.disabled = False
 
         self.update_ui_positions()
 
     def start_calibration(self, instance):
         """Start calibration mode"""
-        print("[UI] Calibration button pressed!")
+        ui_log.info("Calibration button pressed!")
 
         # Hide main menu elements
         self.player_select_label.opacity = 0
@@ -2359,14 +2374,14 @@ class RhythmGameApp(FloatLayout):
         self.calibration_label.opacity = 1
         self.calibration_label.size = (400, 60)
 
-        print("[UI] Starting game calibration...")
+        ui_log.info("Starting game calibration...")
 
         # Start calibration in game
         self.game.start_calibration()
 
         # Schedule check for calibration completion
         Clock.schedule_interval(self.check_calibration_complete, 0.1)
-        print("[UI] Calibration started!")
+        ui_log.info("Calibration started!")
 
     def check_calibration_complete(self, dt):
         """Check if calibration is finished and update UI"""
@@ -2465,7 +2480,7 @@ class RhythmGameApp(FloatLayout):
     def end_game_early(self, instance):
         """End the game early when the End Game button is pressed"""
         if self.game.game_active:
-            print("[UI] End Game button pressed - ending game early")
+            ui_log.info("End Game button pressed - ending game early")
             self.game.end_game()
 
             # Hide the end game button
@@ -2572,6 +2587,8 @@ class RhythmGameApp(FloatLayout):
     def go_to_menu(self, instance):
         # Stop any running game
         self.game.stop_game()
+        self.game.cancel_pending_start()
+        self.chart_status_label.opacity = 0
 
         # Stop recording if active
         if self.game.recording_mode:
@@ -2605,6 +2622,8 @@ class RhythmGameApp(FloatLayout):
             btn.disabled = True
         self.song_back_button.opacity = 0
         self.song_back_button.disabled = True
+        self.difficulty_button.opacity = 0
+        self.difficulty_button.disabled = True
         self.selected_song = None
 
         # Clear game state
@@ -2621,9 +2640,7 @@ class RhythmGameApp(FloatLayout):
             self.game.remove_widget(label)
         self.game.player_labels = []
 
-        for note in self.game.notes:
-            self.game.remove_widget(note)
-        self.game.notes = []
+        self.game.clear_notes()
 
         # Remove score labels
         for label in self.score_labels:
@@ -2652,6 +2669,7 @@ class RhythmGameApp(FloatLayout):
 
 class RhythmApp(App):
     def build(self):
+        frame_profiler.install('rythym')
         return RhythmGameApp()
 
 
@@ -0,0 +1,90 @@
+# Interpolated song clock
+# Audio backends report playback position coarsely (get_pos() often updates
+# every 20-50 ms, and some backends jitter). SongClock timestamps each new
+# position reading with time.perf_counter(), fits song_time = offset + rate *
+# perf_time over a short window of readings, and answers time() from that
+# line - smooth between readings, monotonic, and still locked to the audio.
+
+import time
+from collections import deque
+
+WINDOW_SECONDS = 2.0  # Readings older than this are dropped from the fit
+MAX_SAMPLES = 64
+MIN_FIT_SPAN = 0.5  # Seconds of readings needed before the rate is estimated
+MAX_RATE_ERROR = 0.05  # Fitted rate is clamped to 1 +/- this
+RESYNC_THRESHOLD = 0.1  # A reading this far from the model (seek, stall) restarts the fit
+
+
+class SongClock:
+    """
+    Song time in seconds, driven by perf_counter and corrected by the audio
+    position. Before the audio starts the clock simply runs from start();
+    audio_started() marks the song time the audio began at, and sample() feeds
+    get_pos() readings (relative to that point) into the fit.
+    """
+
+    def __init__(self, timer=time.perf_counter):
+        self.timer = timer
+        self.samples = deque(maxlen=MAX_SAMPLES)  # (perf_time, song_time)
+        self.start()
+
+    def start(self, song_time=0.0):
+        """(Re)start the clock at song_time with no audio attached"""
+        self.samples.clear()
+        self.audio_start = None  # Song time when the audio began playing
+        self.last_pos = None
+        self.offset = song_time - self.timer()
+        self.rate = 1.0
+        self.last_time = song_time
+
+    def audio_started(self):
+        """Record that the audio began playing now (position 0 = this song time)"""
+        self.audio_start = self.time()
+        self.last_pos = None
+        return self.audio_start
+
+    def sample(self, audio_pos, now=None):
+        """Feed a get_pos() reading; repeated (not yet updated) readings are ignored"""
+        if self.audio_start is None or audio_pos <= 0 or audio_pos == self.last_pos:
+            return
+        self.last_pos = audio_pos
+        now = self.timer() if now is None else now
+        song_time = self.audio_start + audio_pos
+
+        if abs(song_time - self._model(now)) > RESYNC_THRESHOLD:
+            # Big jump - don't let stale readings drag the fit, start again here
+            self.samples.clear()
+            self.last_time = song_time
+
+        self.samples.append((now, song_time))
+        while now - self.samples[0][0] > WINDOW_SECONDS:
+            self.samples.popleft()
+        self._fit()
+
+    def time(self, now=None):
+        """Current song time in seconds (never goes backwards between resyncs)"""
+        now = self.timer() if now is None else now
+        self.last_time = max(self.last_time, self._model(now))
+        return self.last_time
+
+    def time_at(self, perf_time):
+        """
+        Song time at a past perf_counter() timestamp (e.g. a captured input
+        event), so input can be judged by when it happened, not when it was handled
+        """
+        return self._model(perf_time)
+
+    def _model(self, now):
+        return self.offset + self.rate * now
+
+    def _fit(self):
+        n = len(self.samples)
+        mean_t = sum(t for t, _ in self.samples) / n
+        mean_s = sum(s for _, s in self.samples) / n
+        rate = 1.0
+        if self.samples[-1][0] - self.samples[0][0] >= MIN_FIT_SPAN:
+            var = sum((t - mean_t) ** 2 for t, _ in self.samples)
+            cov = sum((t - mean_t) * (s - mean_s) for t, s in self.samples)
+            rate = min(max(cov / var, 1.0 - MAX_RATE_ERROR), 1.0 + MAX_RATE_ERROR)
+        self.rate = rate
+        self.offset = mean_s - rate * mean_t
@@ -0,0 +1,98 @@
+# Content-addressed chart cache: keys and LRU eviction
+import json
+import os
+
+import pytest
+
+import chart_cache
+from chart_cache import ChartCache, content_key
+from chart_generator import ChartGenerator
+
+
+@pytest.fixture
+def audio(tmp_path):
+    path = tmp_path / 'song.mp3'
+    path.write_bytes(b'\x00\x01' * 1000)
+    return str(path)
+
+
+def test_key_is_stable(audio):
+    params = ChartGenerator(engine='numpy').cache_params()
+    assert content_key(audio, params) == content_key(audio, dict(params))
+
+
+def test_key_follows_audio_bytes_not_name(audio, tmp_path):
+    params = ChartGenerator(engine='numpy').cache_params()
+    key = content_key(audio, params)
+    copy = tmp_path / 'copy.mp3'
+    copy.write_bytes(open(audio, 'rb').read())
+    assert content_key(str(copy), params) == key
+    changed = tmp_path / 'changed.mp3'
+    changed.write_bytes(b'\x00\x02' * 1000)
+    assert content_key(str(changed), params) != key
+
+
+def test_key_follows_cache_version(audio, monkeypatch):
+    params = ChartGenerator(engine='numpy').cache_params()
+    key = content_key(audio, params)
+    monkeypatch.setattr(chart_cache, 'CACHE_VERSION', chart_cache.CACHE_VERSION + 1)
+    assert content_key(audio, params) != key
+
+
+@pytest.mark.parametrize("field", ["sr", "engine", "min_note_gap", "onset_threshold", "difficulties"])
+def test_key_follows_every_generator_param(audio, field):
+    params = ChartGenerator(engine='numpy').cache_params()
+    assert field in params
+    changed = dict(params)
+    changed[field] = ['changed'] if isinstance(params[field], list) else 'changed'
+    assert content_key(audio, changed) != content_key(audio, params)
+
+
+def test_round_trip_and_miss(tmp_path):
+    cache = ChartCache(str(tmp_path))
+    assert cache.get('missing') is None
+    chart = {"notes": [[1.0, 0], [2.0, 1, 0.5]]}
+    cache.put('abc', chart)
+    assert cache.get('abc') == chart
+
+
+def test_unreadable_entry_dropped(tmp_path):
+    cache = ChartCache(str(tmp_path))
+    with open(cache.path_for('bad'), 'w') as f:
+        f.write('{"notes": [')
+    assert cache.get('bad') is None
+    assert not os.path.exists(cache.path_for('bad'))
+
+
+def test_evicts_least_recently_used(tmp_path):
+    chart = {"notes": [[float(i), i % 3] for i in range(50)]}
+    entry_size = len(json.dumps(chart))
+    cache = ChartCache(str(tmp_path), max_bytes=3 * entry_size)
+    for age, key in enumerate(['old', 'used', 'newer']):
+        cache.put(key, chart)
+        os.utime(cache.path_for(key), (1000 + age, 1000 + age))
+    # Reading 'used' makes it the most recent, so 'old' is the one to go
+    cache.get('used')
+    cache.put('new', chart)
+    assert not os.path.exists(cache.path_for('old'))
+    for key in ['used', 'newer', 'new']:
+        assert cache.get(key) == chart
+
+
+def test_interrupted_write_leaves_nothing(tmp_path, monkeypatch):
+    cache = ChartCache(str(tmp_path))
+    cache.put('abc', {"notes": [[1.0, 0]]})
+
+    def fail(obj, f):
+        f.write('{"notes": [[1.0,')
+        raise KeyboardInterrupt
+    monkeypatch.setattr(chart_cache.json, 'dump', fail)
+    with pytest.raises(KeyboardInterrupt):
+        cache.put('abc', {"notes": [[2.0, 1]]})
+    with pytest.raises(KeyboardInterrupt):
+        cache.put('new', {"notes": [[2.0, 1]]})
+    monkeypatch.undo()
+
+    assert sorted(os.listdir(tmp_path)) == ['abc.json']
+    assert cache.get('abc') == {"notes": [[1.0, 0]]}
+    assert cache.get('new') is None
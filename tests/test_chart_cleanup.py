@@ -0,0 +1,148 @@
+# Tempo detection and beat-grid quantization of recorded notes
+import numpy as np
+import pytest
+
+from chart_cleanup import MIN_NOTES, estimate_bpm, fit_grid, interval_histogram, quantize_notes, snap_to_onsets
+
+
+def played(bpm, per_beat, count, jitter=0.01, seed=0, start=1.0):
+    """count notes every 1/per_beat beat, each pressed with gaussian jitter; (true times, pressed times)"""
+    true = start + np.arange(count) * 60.0 / bpm / per_beat
+    rng = np.random.default_rng(seed)
+    return true, true + rng.normal(0, jitter, count)
+
+
+def as_notes(times):
+    return [[float(t), i % 3] for i, t in enumerate(times)]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_jittered_eighths_keep_their_tempo(seed):
+    # Three eighths make a beat at 2/3 the tempo - its comb fills as well, but its grid misses the eighths
+    _, times = played(174, 2, 1044, seed=seed)
+    assert estimate_bpm(times) == pytest.approx(174, abs=0.5)
+
+
+@pytest.mark.parametrize("bpm, per_beat", [(174, 1), (75, 1), (120, 1), (120, 2), (140, 4)])
+def test_tempo_not_halved_or_doubled(bpm, per_beat):
+    _, times = played(bpm, per_beat, 400)
+    assert estimate_bpm(times) == pytest.approx(bpm, abs=0.5)
+
+
+def test_chords_count_once():
+    _, times = played(100, 1, 100)
+    assert estimate_bpm(np.repeat(times, 2)) == pytest.approx(100, abs=0.5)
+
+
+def test_too_few_notes():
+    assert estimate_bpm([1.0, 1.5, 2.0][:MIN_NOTES - 1]) is None
+    assert quantize_notes([[1.0, 0], [1.5, 1]])["bpm"] is None
+
+
+def test_histogram_peaks_at_the_note_spacing():
+    _, times = played(120, 2, 200, jitter=0.0)
+    histogram = interval_histogram(times)
+    assert np.argmax(histogram) * 0.005 == pytest.approx(0.25, abs=0.005)
+
+
+def test_fit_grid_recovers_step_from_a_coarse_guess():
+    true, times = played(174, 2, 1044, jitter=0.015)
+    unit, phase = fit_grid(times, 60.0 / 173.9 / 4)
+    assert unit == pytest.approx(60.0 / 174 / 4, rel=1e-4)
+    # The fitted grid is no more than a few ms off the true one anywhere in the song
+    drift = phase + np.rint((true - phase) / unit) * unit - true
+    assert np.abs(drift).max() < 0.005
+
+
+@pytest.mark.parametrize("jitter", [0.005, 0.01])
+def test_quantize_puts_jittered_notes_back(jitter):
+    true, times = played(174, 2, 1044, jitter=jitter)
+    result = quantize_notes(as_notes(times))
+    snapped = np.array([note[0] for note in result["notes"]])
+    assert len(snapped) == len(true)
+    assert result["bpm"] == pytest.approx(174, abs=0.05)
+    assert np.abs(snapped - true).max() < 0.005
+    assert result["adjusted"] > 0
+
+
+def test_quantize_snaps_starts_and_hold_ends():
+    true, _ = played(120, 2, 16, jitter=0.0)
+    notes = as_notes(true)
+    notes[1].append(0.47)
+    notes[3].append(0.02)
+    notes[6][0] += 0.015
+    result = quantize_notes(notes, bpm=120)
+    assert result["bpm"] == pytest.approx(120, abs=0.05)
+    starts = np.array([note[0] for note in result["notes"]])
+    assert starts == pytest.approx(true, abs=0.002)
+    # Hold ends land on the grid, and a hold never shrinks below one 16th step
+    assert result["notes"][1][2] == pytest.approx(0.5, abs=0.002)
+    assert result["notes"][3][2] == pytest.approx(0.125, abs=0.002)
+    assert result["adjusted"] == 1
+
+
+def test_quantize_drops_duplicates_in_a_lane():
+    true, times = played(120, 1, 16, jitter=0.0)
+    notes = as_notes(times) + [[float(times[3]) + 0.004, 0]]
+    result = quantize_notes(notes)
+    assert len(result["notes"]) == len(true)
+
+
+# ========== ONSET SNAPPING ==========
+
+def test_snaps_to_nearest_onset_either_side():
+    notes = [[1.02, 0], [2.97, 1], [5.0, 2]]
+    moved, corrections = snap_to_onsets(notes, [3.0, 1.0, 1.1, 2.9, 5.5])
+    assert moved == [[1.0, 0], [3.0, 1], [5.0, 2]]
+    assert corrections[:2] == pytest.approx([-0.02, 0.03])
+    assert np.isnan(corrections[2])
+
+
+def test_tolerance_is_inclusive():
+    notes = [[1.0, 0], [2.0, 1]]
+    moved, corrections = snap_to_onsets(notes, [1.0625, 2.0 - 0.0626], tolerance=0.0625)
+    assert moved[0][0] == pytest.approx(1.0625, abs=0.001)
+    assert corrections[0] == 0.0625
+    assert moved[1] == [2.0, 1] and np.isnan(corrections[1])
+
+
+def test_hold_keeps_its_release_time():
+    moved, _ = snap_to_onsets([[1.03, 0, 0.5], [2.0, 1, 0.01]], [1.0, 2.04])
+    assert moved[0] == [1.0, 0, 0.53]
+    # A hold can't end before it starts
+    assert moved[1] == [2.04, 1, 0.0]
+
+
+def test_input_order_kept():
+    notes = [[3.01, 0], [1.01, 1], [2.0, 2]]
+    moved, corrections = snap_to_onsets(notes, [1.0, 3.0])
+    assert [note[1] for note in moved] == [0, 1, 2]
+    assert moved[0][0] == 3.0 and moved[1][0] == 1.0
+    assert np.isnan(corrections[2])
+
+
+def test_single_onset():
+    moved, corrections = snap_to_onsets([[0.98, 0], [1.5, 1]], [1.0])
+    assert moved == [[1.0, 0], [1.5, 1]]
+    assert corrections[0] == pytest.approx(0.02) and np.isnan(corrections[1])
+
+
+def test_nothing_to_snap():
+    notes = [[1.0, 0], [2.0, 1, 0.5]]
+    moved, corrections = snap_to_onsets(notes, [])
+    assert moved == notes and np.isnan(corrections).all()
+    moved, corrections = snap_to_onsets([], [1.0, 2.0])
+    assert moved == [] and len(corrections) == 0
+
+
+def test_quantize_leaves_fixed_notes_alone():
+    true, _ = played(120, 2, 16, jitter=0.0)
+    notes = as_notes(true)
+    notes[5][0] += 0.03  # Snapped to an onset off the grid - must stay there
+    notes[9][0] += 0.03  # Not fixed - back onto the grid
+    fixed = np.zeros(len(notes), dtype=bool)
+    fixed[5] = True
+    result = quantize_notes(notes, bpm=120, fixed=fixed)
+    starts = [note[0] for note in result["notes"]]
+    assert starts[5] == pytest.approx(true[5] + 0.03, abs=0.002)
+    assert starts[9] == pytest.approx(true[9], abs=0.006)
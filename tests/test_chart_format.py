@@ -0,0 +1,131 @@
+# Binary chart format: save/load round trips and rejecting damaged files
+import json
+import random
+import struct
+
+import numpy as np
+import pytest
+
+import chart_format
+from chart_format import NOTE_DTYPE, load_chart, notes_to_array, notes_to_list, save_chart
+
+
+def reference_array(notes):
+    # The per-note loop notes_to_array replaced
+    array = np.zeros(len(notes), dtype=NOTE_DTYPE)
+    for i, note in enumerate(notes):
+        array[i] = (note[0], note[1], note[2] if len(note) > 2 else 0)
+    return array[np.argsort(array['time'], kind='stable')]
+
+
+def random_notes(seed, count, hold_rate=0.3):
+    rng = random.Random(seed)
+    notes = []
+    for _ in range(count):
+        note = [round(rng.uniform(0, 120), 3), rng.randrange(3)]
+        if rng.random() < hold_rate:
+            note.append(round(rng.uniform(0.2, 2), 3))
+        notes.append(note)
+    return notes
+
+
+@pytest.mark.parametrize("hold_rate", [0.0, 0.3, 1.0])
+def test_notes_to_array_matches_loop(hold_rate):
+    notes = random_notes(5, 500, hold_rate)
+    assert np.array_equal(notes_to_array(notes), reference_array(notes))
+
+
+def test_notes_to_array_keeps_order_of_simultaneous_notes():
+    array = notes_to_array([[2.0, 1], [1.0, 0, 0.5], [1.0, 2], [1.0, 1]])
+    assert array['lane'].tolist() == [0, 2, 1, 1]
+    assert array['duration'].tolist() == [0.5, 0, 0, 0]
+
+
+def test_notes_to_array_accepts_arrays():
+    array = notes_to_array(np.array([[1.5, 2, 0.25], [0.5, 1, 0]]))
+    assert array.tolist() == [(0.5, 1, 0.0), (1.5, 2, 0.25)]
+    assert notes_to_array(array).tolist() == array.tolist()
+    assert len(notes_to_array([])) == 0
+
+
+def tiered_chart():
+    easy = random_notes(1, 40, hold_rate=0.0)
+    hard = random_notes(2, 120)
+    return {"name": "Test", "bpm": 128, "difficulty": "hard", "notes": hard,
+            "difficulties": {"easy": easy, "hard": hard}}
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_round_trip_taps_holds_and_tiers(tmp_path, mmap):
+    chart = tiered_chart()
+    path = save_chart(str(tmp_path / 'chart.bin'), chart)
+    loaded = load_chart(path, mmap=mmap)
+    assert (loaded["name"], loaded["bpm"], loaded["difficulty"]) == ("Test", 128, "hard")
+    for name, notes in chart["difficulties"].items():
+        assert np.array_equal(loaded["difficulties"][name], notes_to_array(notes))
+    assert np.array_equal(loaded["notes"], notes_to_array(chart["notes"]))
+    assert (loaded["difficulties"]["hard"]['duration'] > 0).any()
+    # The top-level notes repeat the default tier and are stored once
+    assert struct.unpack_from('<I', open(path, 'rb').read(), 12)[0] == 160
+
+
+def test_round_trip_through_json(tmp_path):
+    chart = tiered_chart()
+    path = save_chart(str(tmp_path / 'chart.bin'), chart)
+    restored = chart_format.chart_to_json(load_chart(path))
+    for name, notes in chart["difficulties"].items():
+        assert restored["difficulties"][name] == notes_to_list(notes_to_array(notes))
+    json.dumps(restored)
+
+
+def test_round_trip_empty_chart(tmp_path):
+    path = save_chart(str(tmp_path / 'empty.bin'), {"name": "Silence", "notes": []})
+    loaded = load_chart(path)
+    assert loaded["name"] == "Silence"
+    assert len(loaded["notes"]) == 0 and loaded["notes"].dtype == NOTE_DTYPE
+    assert "difficulties" not in loaded
+
+
+def test_notes_not_in_any_tier_are_stored(tmp_path):
+    chart = tiered_chart()
+    chart["notes"] = [[0.5, 1]]
+    loaded = load_chart(save_chart(str(tmp_path / 'chart.bin'), chart))
+    assert loaded["notes"].tolist() == [(0.5, 1, 0.0)]
+
+
+def write_damaged(tmp_path, cut=None, magic=None, version=None):
+    path = save_chart(str(tmp_path / 'chart.bin'), tiered_chart())
+    data = bytearray(open(path, 'rb').read())
+    if magic is not None:
+        data[:4] = magic
+    if version is not None:
+        struct.pack_into('<H', data, 4, version)
+    if cut is not None:
+        data = data[:cut]
+    with open(path, 'wb') as f:
+        f.write(bytes(data))
+    return path
+
+
+@pytest.mark.parametrize("damage", [
+    dict(cut=0), dict(cut=10), dict(cut=20), dict(cut=-5),
+    dict(magic=b'JUNK'), dict(version=chart_format.FORMAT_VERSION + 1),
+])
+@pytest.mark.parametrize("mmap", [True, False])
+def test_damaged_files_rejected(tmp_path, damage, mmap):
+    path = write_damaged(tmp_path, **damage)
+    with pytest.raises(ValueError):
+        load_chart(path, mmap=mmap)
+
+
+def test_song_chart_falls_back_to_json(tmp_path):
+    audio = str(tmp_path / 'song.mp3')
+    bin_path, json_path = chart_format.chart_paths(audio)
+    chart = tiered_chart()
+    with open(json_path, 'w') as f:
+        json.dump(chart, f)
+    with open(bin_path, 'wb') as f:
+        f.write(b'RCHT')
+    loaded = chart_format.load_song_chart(audio)
+    assert np.array_equal(loaded["difficulties"]["easy"], notes_to_array(chart["difficulties"]["easy"]))
+    assert chart_format.load_song_chart(str(tmp_path / 'other.mp3')) is None
@@ -0,0 +1,107 @@
+# Vectorized onset-to-note conversion against the original per-onset loop
+import numpy as np
+import pytest
+
+from chart_generator import HOP_LENGTH, ChartGenerator, _min_gap_mask
+
+
+def reference_gap_mask(times, min_gap, last_time=-1):
+    keep = []
+    for t in times:
+        keep.append(t - last_time >= min_gap)
+        if keep[-1]:
+            last_time = t
+    return np.array(keep, dtype=bool)
+
+
+def reference_notes(analysis, min_note_gap, onset_threshold):
+    """The per-onset loop _notes_from_analysis replaced"""
+    sr = analysis["sr"]
+    onset_env = analysis["onset_env"]
+    onset_frames = analysis["onset_frames"]
+    spectral_centroid = analysis["spectral_centroid"]
+    centroid_33 = np.percentile(spectral_centroid, 33)
+    centroid_66 = np.percentile(spectral_centroid, 66)
+    onset_strengths = onset_env[onset_frames] if len(onset_frames) else np.array([])
+    mean_strength = np.mean(onset_strengths) if len(onset_strengths) > 0 else 0
+
+    notes = []
+    last_note_time = -1
+    for i, onset_time in enumerate(analysis["onset_times"]):
+        if onset_time - last_note_time < min_note_gap:
+            continue
+        if mean_strength > 0 and onset_strengths[i] < mean_strength * onset_threshold:
+            continue
+        frame = int(onset_time * sr) // HOP_LENGTH  # librosa.time_to_frames
+        if frame >= len(spectral_centroid):
+            continue
+        centroid = spectral_centroid[frame]
+        lane = 0 if centroid < centroid_33 else 1 if centroid < centroid_66 else 2
+        notes.append((round(onset_time, 3), lane))
+        last_note_time = onset_time
+    return notes
+
+
+def random_analysis(seed, n_onsets, sr=22050, n_frames=2000):
+    rng = np.random.default_rng(seed)
+    # Onsets on analysis frames, as librosa reports them; some past the centroid's end
+    onset_frames = np.sort(rng.choice(n_frames + 50, size=n_onsets, replace=False))
+    return {
+        "sr": sr,
+        "onset_env": rng.random(n_frames + 50) * 3,
+        "onset_frames": onset_frames,
+        "onset_times": onset_frames * HOP_LENGTH / sr,
+        "spectral_centroid": rng.random(n_frames) * 5000,
+    }
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("min_gap", [0.0, 0.05, 0.15, 0.4])
+def test_gap_mask_matches_loop(seed, min_gap):
+    times = np.sort(np.random.default_rng(seed).random(300) * 30)
+    np.testing.assert_array_equal(_min_gap_mask(times, min_gap), reference_gap_mask(times, min_gap))
+    np.testing.assert_array_equal(_min_gap_mask(times, min_gap, last_time=times[3]),
+                                  reference_gap_mask(times, min_gap, last_time=times[3]))
+
+
+def test_gap_mask_keeps_notes_exactly_min_gap_apart():
+    times = np.array([0.0, 0.25, 0.5, 0.6, 0.75, 1.0])
+    expected = reference_gap_mask(times, 0.25)
+    assert expected.tolist() == [True, True, True, False, True, True]
+    np.testing.assert_array_equal(_min_gap_mask(times, 0.25), expected)
+    # Also with gaps that aren't exact in binary
+    times = np.arange(20) * 0.15
+    np.testing.assert_array_equal(_min_gap_mask(times, 0.15), reference_gap_mask(times, 0.15))
+
+
+def test_gap_mask_empty():
+    assert _min_gap_mask([], 0.15).tolist() == []
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("min_note_gap, onset_threshold", [(0.15, 0.5), (0.05, 0.0), (0.3, 1.2), (0.0, 0.5)])
+def test_notes_match_loop(seed, min_note_gap, onset_threshold):
+    analysis = random_analysis(seed, 600)
+    generator = ChartGenerator(engine='numpy')
+    generator.min_note_gap = min_note_gap
+    generator.onset_threshold = onset_threshold
+    assert generator._notes_from_analysis(analysis) == reference_notes(analysis, min_note_gap, onset_threshold)
+
+
+def test_notes_onsets_exactly_min_gap_apart():
+    # Onsets every 16 frames at sr 32768 - exactly 0.25s, representable in binary - and a 0.25s gap
+    analysis = random_analysis(0, 10, sr=32768)
+    analysis["onset_frames"] = np.arange(0, 1950, 16)
+    analysis["onset_times"] = analysis["onset_frames"] * HOP_LENGTH / analysis["sr"]
+    generator = ChartGenerator(engine='numpy')
+    generator.min_note_gap = 0.25
+    generator.onset_threshold = 0.0
+    notes = generator._notes_from_analysis(analysis)
+    assert notes == reference_notes(analysis, generator.min_note_gap, 0.0)
+    assert len(notes) == len(analysis["onset_times"])
+
+
+def test_notes_from_no_onsets():
+    analysis = random_analysis(0, 0)
+    assert ChartGenerator(engine='numpy')._notes_from_analysis(analysis) == []
+    assert reference_notes(analysis, 0.15, 0.5) == []
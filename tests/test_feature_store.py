@@ -0,0 +1,85 @@
+# Memory-mapped per-song analysis arrays
+import os
+import threading
+
+import numpy as np
+
+from chart_cache import FeatureStore
+
+
+def features(seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "y": rng.standard_normal(22050).astype(np.float32),
+        "onset_env": rng.random(400).astype(np.float32),
+        "onset_frames": np.arange(0, 400, 7),
+        "onset_times": np.arange(0, 400, 7) * 512 / 22050,
+        "spectral_centroid": rng.random((1, 400)) * 4000,
+        "beat_frames": np.array([], dtype=np.int64),
+        "tempo": 120.0,
+        "sr": 22050,
+    }
+
+
+def test_round_trip_is_memory_mapped(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    stored = features()
+    store.save('song', stored)
+    loaded = store.load('song')
+    assert loaded["tempo"] == 120.0 and loaded["sr"] == 22050
+    for name in FeatureStore.ARRAYS:
+        np.testing.assert_array_equal(loaded[name], stored[name])
+        assert loaded[name].dtype == stored[name].dtype
+        if stored[name].size:
+            assert isinstance(loaded[name], np.memmap)
+    assert loaded["beat_frames"].size == 0
+
+
+def test_missing_key(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    assert store.load('nothing') is None
+    store.save('song', features())
+    assert store.load('other') is None
+
+
+def test_unreadable_entry_dropped(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    entry = store.save('song', features())
+    with open(os.path.join(entry, 'onset_env.npy'), 'wb') as f:
+        f.write(b'not numpy')
+    assert store.load('song') is None
+    assert not os.path.exists(entry)
+
+
+def test_second_writer_keeps_first_entry(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    store.save('song', features(seed=1))
+    # The target directory already exists - the rename fails and the loser's copy is discarded
+    store.save('song', features(seed=2))
+    np.testing.assert_array_equal(store.load('song')["y"], features(seed=1)["y"])
+    assert os.listdir(tmp_path) == ['song']
+
+
+def test_racing_writers_leave_one_complete_entry(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    start = threading.Barrier(4)
+    errors = []
+
+    def write(seed):
+        try:
+            start.wait()
+            store.save('song', features(seed))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(seed,)) for seed in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert os.listdir(tmp_path) == ['song']
+    loaded = store.load('song')
+    assert any(np.array_equal(loaded["y"], features(seed)["y"]) for seed in range(4))
+    assert sorted(os.listdir(os.path.join(tmp_path, 'song'))) == sorted(
+        [name + '.npy' for name in FeatureStore.ARRAYS] + ['meta.json'])
@@ -0,0 +1,37 @@
+# FrameProfiler recording and trace dumps (install() needs Kivy)
+import json
+import os
+
+from frame_profiler import FrameProfiler
+
+
+def profiler_with_samples():
+    profiler = FrameProfiler(enabled=True)
+    profiler.game = 'test'
+    for i in range(10):
+        profiler.record('frame', profiler.t0 + i / 60, 16.0 + i)
+    return profiler
+
+
+def test_dumps_in_one_second_do_not_overwrite(tmp_path):
+    profiler = profiler_with_samples()
+    first = profiler.dump(str(tmp_path))
+    second = profiler.dump(str(tmp_path))
+    assert first != second
+    assert str(os.getpid()) in os.path.basename(first[0])
+    assert len(list(tmp_path.iterdir())) == 4
+    with open(second[1]) as f:
+        assert json.load(f)["sections"]["frame"]["calls"] == 10
+
+
+def test_dump_once_writes_a_single_trace(tmp_path, monkeypatch):
+    monkeypatch.setenv('FRAME_PROFILE_DIR', str(tmp_path))
+    profiler = profiler_with_samples()
+    assert profiler.dump_once() is not None
+    assert profiler.dump_once() is None
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_nothing_recorded_nothing_written(tmp_path):
+    assert FrameProfiler(enabled=True).dump(str(tmp_path)) is None
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,61 @@
+# InputCapture queueing and reader threads (the Kivy hooks need a window)
+import queue
+import time
+
+import pytest
+
+from input_capture import DOWN, KEY_DOWN, UP, InputCapture, wall_to_perf
+
+
+def test_drain_returns_events_oldest_first_and_empties():
+    capture = InputCapture()
+    capture.push(DOWN, 1, 10, 20, timestamp=1.0)
+    capture.push(KEY_DOWN, 'a', timestamp=1.5)
+    capture.push(UP, 1, 12, 22, timestamp=2.0)
+    events = capture.drain()
+    assert [event.kind for event in events] == [DOWN, KEY_DOWN, UP]
+    assert events[1].x is None and events[1].time == 1.5
+    assert capture.drain() == []
+
+
+def test_push_stamps_now_by_default():
+    capture = InputCapture()
+    before = time.perf_counter()
+    capture.push(KEY_DOWN, 'a')
+    assert before <= capture.drain()[0].time <= time.perf_counter()
+
+
+def test_oldest_events_dropped_when_full():
+    capture = InputCapture(max_events=3)
+    for i in range(5):
+        capture.push(DOWN, i, timestamp=float(i))
+    assert [event.id for event in capture.drain()] == [2, 3, 4]
+
+
+def test_wall_to_perf():
+    assert wall_to_perf(time.time() - 0.25) == pytest.approx(time.perf_counter() - 0.25, abs=0.01)
+
+
+def test_reader_thread_feeds_queue_until_stopped():
+    capture = InputCapture()
+    reports = queue.Queue()
+    for report in [(DOWN, 7, 1, 2), None, (UP, 7, 3, 4)]:
+        reports.put(report)
+
+    def read_event():
+        try:
+            return reports.get(timeout=0.01)
+        except queue.Empty:
+            return None
+
+    thread = capture.start_reader(read_event)
+    deadline = time.monotonic() + 2
+    events = []
+    while len(events) < 2 and time.monotonic() < deadline:
+        events.extend(capture.drain())
+        time.sleep(0.005)
+    capture.stop()
+    thread.join(1)
+    assert not thread.is_alive()
+    assert [(event.kind, event.id, event.x, event.y) for event in events] == [(DOWN, 7, 1, 2), (UP, 7, 3, 4)]
+    assert events[0].time <= events[1].time
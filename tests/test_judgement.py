@@ -0,0 +1,156 @@
+# Millisecond-window judgement of presses and hold releases, and the song
+# clock that maps input timestamps onto song time
+import pytest
+
+from rhythm_engine import (DEFAULT_AUDIO_OFFSET, GOOD_WINDOW, GREAT_WINDOW, HIT_WINDOW, PERFECT_WINDOW, TARGET_Y,
+                           AutoplayBot, NoteField, Referee, Simulation, field_time, judge_hit, judge_release,
+                           load_chart_notes, normal_error)
+from song_clock import MAX_RATE_ERROR, SongClock
+
+CHART = 'rythymgame/kevin-macleod-hall-of-the-mountain-king_chart.json'
+
+
+@pytest.mark.parametrize("error, rating", [
+    (0.0, "PERFECT"), (PERFECT_WINDOW, "PERFECT"), (PERFECT_WINDOW + 0.001, "GREAT"),
+    (GREAT_WINDOW, "GREAT"), (GOOD_WINDOW, "GOOD"), (GOOD_WINDOW + 0.001, "OK"), (HIT_WINDOW, "OK"),
+])
+def test_hit_windows(error, rating):
+    assert judge_hit(error)[1] == rating
+
+
+def test_outside_hit_window():
+    assert judge_hit(HIT_WINDOW + 0.001) is None
+
+
+@pytest.mark.parametrize("error", [-0.02, 0.02])
+def test_release_windows_are_symmetric(error):
+    points, rating, _, effect = judge_release(error)
+    assert (points, rating, effect) == (100, "PERFECT", 'extend')
+
+
+def test_release_combo_effects():
+    assert judge_release(GOOD_WINDOW + 0.01)[1:4:2] == ("OK", 'keep')
+    assert judge_release(-(HIT_WINDOW + 0.01))[1:4:2] == ("MISS", 'break')
+    assert judge_release(HIT_WINDOW + 0.01)[1:4:2] == ("MISS", 'break')
+
+
+@pytest.mark.parametrize("audio_offset", [DEFAULT_AUDIO_OFFSET, 0.1, -0.06])
+def test_press_at_visual_crossing_is_perfect(audio_offset):
+    # Notes are drawn and judged on the same time base, so pressing as the
+    # head meets the target is on time whatever the calibration
+    field = NoteField()
+    note = field.spawn(0, 0, 2.0, 350)
+    referee = Referee(field)
+    clock_time = 2.0 + audio_offset
+    field.position(field_time(clock_time, audio_offset), 350)
+    assert note.y == pytest.approx(TARGET_Y)
+    assert referee.press(0, 0, field_time(clock_time, audio_offset))[0] == "PERFECT"
+
+
+def test_calibrated_offset_moves_judging_with_the_notes():
+    # A player who hears the song 80ms late presses 80ms after the uncalibrated
+    # crossing; calibrating audio_offset to 0.08 redraws the notes there and judges them there
+    field = NoteField()
+    field.spawn(0, 0, 2.0, 350)
+    field.spawn(0, 1, 2.0, 350)
+    referee = Referee(field)
+    assert referee.press(0, 0, field_time(2.08, DEFAULT_AUDIO_OFFSET))[0] == "GREAT"
+    assert referee.press(0, 1, field_time(2.08, 0.08))[0] == "PERFECT"
+
+
+def hold_referee():
+    field = NoteField()
+    field.spawn(0, 0, 1.0, 350, duration=1.0)
+    return Referee(field)
+
+
+def test_hold_release_judged_by_its_own_time():
+    referee = hold_referee()
+    assert referee.press(0, 0, 1.0)[0] == "PERFECT"
+    assert (0, 0) in referee.active_holds
+    # However the frames fell, a release 20ms after the end is PERFECT
+    referee.hold(1.7)
+    assert referee.release(0, 0, 2.02)[0] == "PERFECT"
+    assert referee.judgements[0]["PERFECT"] == 1
+    assert referee.combos[0] == 2
+    assert referee.field.count() == 0
+
+
+def test_early_release_is_a_miss():
+    referee = hold_referee()
+    referee.press(0, 0, 1.0)
+    assert referee.release(0, 0, 1.5)[0] == "MISS"
+    assert referee.combos[0] == 0
+
+
+def test_release_without_hold():
+    assert hold_referee().release(0, 0, 2.0) is None
+
+
+def test_hold_progress_follows_song_clock():
+    referee = hold_referee()
+    referee.press(0, 0, 1.0)
+    referee.hold(1.25)
+    assert referee.active_holds[(0, 0)].hold_progress == pytest.approx(0.25)
+
+
+def test_judgements_do_not_depend_on_frame_rate():
+    notes = load_chart_notes(CHART)
+    reports = []
+    for fps in (30, 60, 144):
+        bot = AutoplayBot(normal_error(0.0, 0.04), seed=7)
+        reports.append(Simulation(notes, bot=bot, fps=fps).run())
+    for report in reports[1:]:
+        assert report["scores"] == reports[0]["scores"]
+        assert report["judgements"] == reports[0]["judgements"]
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_clock_runs_from_start_before_audio():
+    timer = FakeTimer()
+    clock = SongClock(timer)
+    timer.now += 1.5
+    assert clock.time() == pytest.approx(1.5)
+    assert clock.time_at(100.25) == pytest.approx(0.25)
+
+
+def test_clock_fits_audio_rate_and_maps_input_stamps():
+    timer = FakeTimer()
+    clock = SongClock(timer)
+    clock.audio_started()
+    # Audio runs 2% fast, reported in coarse 40ms steps
+    for step in range(1, 40):
+        perf = 100.0 + step * 0.025
+        clock.sample(round(step * 0.025 * 1.02 / 0.04) * 0.04, now=perf)
+    assert clock.rate == pytest.approx(1.02, abs=0.005)
+    # A press stamped between readings lands on the fitted line
+    assert clock.time_at(100.5) == pytest.approx(0.5 * 1.02, abs=0.02)
+
+
+def test_clock_rate_is_clamped():
+    timer = FakeTimer()
+    clock = SongClock(timer)
+    clock.audio_started()
+    for step in range(1, 40):
+        clock.sample(step * 0.025 * 1.5, now=100.0 + step * 0.025)
+    assert clock.rate <= 1.0 + MAX_RATE_ERROR + 1e-9
+
+
+def test_clock_ignores_repeated_readings_and_never_goes_backwards():
+    timer = FakeTimer()
+    clock = SongClock(timer)
+    clock.audio_started()
+    clock.sample(0.04, now=100.04)
+    samples = len(clock.samples)
+    clock.sample(0.04, now=100.06)
+    assert len(clock.samples) == samples
+    before = clock.time(now=100.06)
+    clock.sample(0.05, now=100.061)  # Audio slightly behind the model
+    assert clock.time(now=100.062) >= before
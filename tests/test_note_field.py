@@ -0,0 +1,87 @@
+# NoteField - per-(player, lane) note queues and hit candidate lookup
+from rhythm_engine import HIT_WINDOW, TARGET_Y, NoteField, Referee, judge_hit
+
+SPEED = 350
+
+
+def field_with(times, lane=0, player=0):
+    field = NoteField()
+    for note_time in times:
+        field.spawn(player, lane, note_time, SPEED)
+    return field
+
+
+def candidate(field, hit_time, lane=0, player=0):
+    return field.hit_candidate(player, lane, lambda note: note.time - hit_time, HIT_WINDOW)
+
+
+def test_lanes_are_separate_queues():
+    field = NoteField()
+    field.spawn(0, 0, 1.0, SPEED)
+    field.spawn(0, 1, 1.0, SPEED)
+    field.spawn(1, 0, 1.0, SPEED)
+    assert field.count() == 3
+    assert len(field.lanes[(0, 0)]) == 1
+    note, _ = candidate(field, 1.0, lane=2)
+    assert note is None
+
+
+def test_picks_nearest_of_notes_either_side():
+    field = field_with([1.0, 1.2, 1.4])
+    note, error = candidate(field, 1.13)
+    assert note.time == 1.2
+    assert abs(error - 0.07) < 1e-6
+
+
+def test_skips_missed_notes_still_on_screen():
+    # Two missed notes are still scrolling off when the third is hit dead on
+    field = field_with([1.0, 1.15, 1.3])
+    referee = Referee(field)
+    field.position(1.3, SPEED)
+    referee.expire(0)
+    assert field.count() == 3  # The 1.0 note is late but not yet off screen
+
+    assert referee.press(0, 0, 1.30)[0] == "PERFECT"
+    assert [note.time for note in field.lanes[(0, 0)]] == [1.0, 1.15]
+
+
+def test_only_notes_ahead_beyond_the_window():
+    # The late note is out of reach; the next one is returned but judge_hit rejects it
+    field = field_with([1.0, 2.0])
+    note, error = candidate(field, 1.5)
+    assert note.time == 2.0
+    assert judge_hit(error) is None
+    assert Referee(field).press(0, 0, 1.5) is None
+    assert field.count() == 2
+
+
+def test_empty_lane():
+    note, error = candidate(NoteField(), 1.0)
+    assert note is None
+    assert error == float('inf')
+
+
+def test_skips_held_notes():
+    field = NoteField()
+    hold = field.spawn(0, 0, 1.0, SPEED, duration=1.0)
+    hold.start_hold()
+    field.spawn(0, 0, 1.1, SPEED)
+    note, _ = candidate(field, 1.0)
+    assert note.time == 1.1
+
+
+def test_pixel_offsets_with_reach():
+    # Calibration judges taps by pixel distance to the target instead
+    field = field_with([1.0, 1.5])
+    field.position(1.6, SPEED)  # The 1.0 note is 175px further down than the 1.5 one
+    late, near = field.lanes[(0, 0)]
+    assert late.center_y - TARGET_Y < -150
+    note, distance = field.hit_candidate(0, 0, lambda n: n.center_y - TARGET_Y, reach=150)
+    assert note is near
+    assert abs(distance - abs(near.center_y - TARGET_Y)) < 1e-6
+
+
+def test_expired_reads_front_of_lane():
+    field = field_with([1.0, 3.0])
+    field.position(2.0, SPEED)
+    assert [note.time for note in field.expired(0)] == [1.0]
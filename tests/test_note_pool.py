@@ -0,0 +1,106 @@
+# NotePool's per-note arrays: positioning and geometry as array passes
+import random
+
+import numpy as np
+import pytest
+
+from rhythm_engine import TARGET_Y, NoteField
+from rhythm_notes import LAYER_INDEX, NUM_LANES, NotePool, build_note_geometry, note_arrays
+
+SPEED = 350
+
+
+def busy_field(seed=0, count=200, players=2):
+    """A field mid-song: taps and holds, some held, some hit and returned to the pool"""
+    rng = random.Random(seed)
+    field = NoteField(NotePool(prewarm_per_lane=2, capacity=4))
+    field.pool.prewarm(players)
+    notes = []
+    for i in range(count):
+        duration = rng.choice([0, 0, 0.5, 1.5])
+        notes.append(field.spawn(rng.randrange(players), rng.randrange(NUM_LANES), i * 0.05, SPEED, duration))
+    for note in rng.sample(notes, count // 4):
+        if note.is_hold_note:
+            note.start_hold()
+            note.update_hold(rng.uniform(4.0, 7.0))
+    for note in rng.sample(notes, count // 4):
+        if not note.hold_started:
+            note.deactivate()
+            field.remove(note)
+    return field
+
+
+def reference_arrays(field):
+    # Gathered note by note, as the renderer used to
+    active = [note for note in field.notes() if note.active]
+    return {
+        "x": [note.center_x for note in active],
+        "y": [note.y for note in active],
+        "tail": [note.tail_length for note in active],
+        "progress": [note.hold_progress for note in active],
+    }
+
+
+@pytest.mark.parametrize("speed", [SPEED, 500])
+def test_place_matches_per_note_place(speed):
+    field = busy_field()
+    expected = busy_field()
+    field.position(5.0, speed)
+    for note in expected.notes():
+        note.place(5.0, TARGET_Y, speed)
+    assert [note.y for note in field.notes()] == [note.y for note in expected.notes()]
+    assert [note.tail_length for note in field.notes()] == [note.tail_length for note in expected.notes()]
+
+
+def test_held_notes_stay_put():
+    field = NoteField()
+    hold = field.spawn(0, 0, 1.0, SPEED, duration=2.0)
+    field.position(1.0, SPEED)
+    hold.start_hold()
+    field.position(2.5, SPEED)
+    assert hold.y == pytest.approx(TARGET_Y)
+
+
+def test_growing_keeps_note_state():
+    pool = NotePool(prewarm_per_lane=0, capacity=1)
+    notes = [pool.acquire(i % NUM_LANES, 0, SPEED, 0.5 * (i % 2), float(i)) for i in range(50)]
+    assert len(pool.columns['time']) >= 50
+    assert [note.time for note in notes] == [float(i) for i in range(50)]
+    assert [note.is_hold_note for note in notes] == [bool(i % 2) for i in range(50)]
+
+
+def test_released_notes_are_not_drawn_and_get_recycled():
+    field = NoteField()
+    note = field.spawn(0, 1, 1.0, SPEED)
+    field.remove(note)
+    assert all(len(vertices) == 0 for vertices, indices in build_note_geometry(field.pool))
+    assert field.spawn(0, 1, 2.0, SPEED) is note
+    assert field.pool.created == 1
+
+
+def test_follow_lanes():
+    field = busy_field(players=2)
+    centers = [[100, 200, 300], [400, 500, 600]]
+    field.pool.follow_lanes(centers[:1])  # Player 2's buttons aren't laid out yet
+    for note in field.notes():
+        if note.player == 0:
+            assert note.center_x == centers[0][note.lane]
+    field.pool.follow_lanes(centers)
+    assert all(note.center_x == centers[note.player][note.lane] for note in field.notes())
+
+
+def test_geometry_reads_the_pool():
+    field = busy_field(seed=3)
+    field.position(5.0, SPEED)
+    field.pool.follow_lanes([[100, 200, 300], [400, 500, 600]])
+    reference = reference_arrays(field)
+    arrays = note_arrays(field.pool)
+    for name, values in reference.items():
+        assert sorted(arrays[name].tolist()) == sorted(values)
+
+    layers = build_note_geometry(field.pool)
+    heads = sum(len(layers[LAYER_INDEX[f"head_{lane}"]][0]) for lane in range(NUM_LANES))
+    assert heads == len(reference["x"]) * 25  # One 24-segment disc (plus center) per note
+    for vertices, indices in layers:
+        assert vertices.dtype == np.float32
+        assert len(indices) == 0 or indices.max() < len(vertices)
@@ -0,0 +1,150 @@
+# Replays: a recorded session re-run headless must score exactly as played
+import gzip
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from replay import ReplayPlayer, ReplayRecorder, chart_hash, load_replay, load_replay_notes, save_replay
+from rhythm_engine import NoteField, Referee, fall_time, field_time, load_chart_notes
+from rhythm_notes import SpawnSchedule
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHART = os.path.join(ROOT, 'rythymgame', 'kevin-macleod-hall-of-the-mountain-king_chart.json')
+SONG = 'kevin-macleod-hall-of-the-mountain-king.mp3'
+NOTE_SPEED = 350
+
+
+def play_session(notes, seed=0, offset=0.0, hears_late=0.05):
+    """
+    Play the chart the way RhythmGame.update_game does - inputs handled before
+    each frame, on jittered frames - with a sloppy player who presses
+    hears_late after each note, moves the offset slider twice and resizes the
+    window mid-song. Returns the replay.
+    """
+    rng = random.Random(seed)
+    schedule = SpawnSchedule(notes)
+    field = NoteField()
+    referee = Referee(field, 2)
+    recorder = ReplayRecorder()
+    height = 700
+    recorder.start(SONG, 'normal', notes, 2, NOTE_SPEED, height, offset, 0.15)
+
+    inputs = []
+    for note in notes:
+        note_time, lane = note[0], note[1]
+        duration = note[2] if len(note) > 2 else 0
+        for player in range(2):
+            if rng.random() < 0.1:
+                continue
+            press = note_time + hears_late + rng.gauss(0, 0.05)
+            inputs.append((press, 'down', player, lane))
+            if duration > 0:
+                inputs.append((note_time + duration + hears_late + rng.gauss(0, 0.05), 'up', player, lane))
+    inputs.sort()
+
+    song_time = 0.0
+    end = max(note[0] + (note[2] if len(note) > 2 else 0) for note in notes) + 2
+    moves = [(12, 0.03), (20, 0.02)]
+    while song_time < end:
+        dt = rng.uniform(0.008, 0.04)
+        song_time += dt
+        if moves and song_time > moves[0][0]:
+            offset += moves.pop(0)[1]
+        if song_time > 25 and height == 700:
+            height = 600
+
+        while inputs and inputs[0][0] <= song_time:
+            clock_time, kind, player, lane = inputs.pop(0)
+            if kind == 'down':
+                recorder.press(player, lane, clock_time, offset)
+                referee.press(player, lane, field_time(clock_time, offset))
+            elif (player, lane) in referee.active_holds:
+                recorder.release(player, lane, clock_time, offset)
+                referee.release(player, lane, field_time(clock_time, offset))
+
+        recorder.frame(song_time, dt, height, offset)
+        schedule.set_fall_time(fall_time(height, NOTE_SPEED))
+        for note_time, lane, duration in schedule.due(song_time):
+            for player in range(2):
+                field.spawn(player, lane, note_time, NOTE_SPEED, duration)
+        referee.hold(field_time(song_time, offset))
+        field.position(field_time(song_time, offset), NOTE_SPEED)
+        referee.expire(0)
+    return recorder.finish(referee)
+
+
+@pytest.fixture(scope='module')
+def notes():
+    return load_chart_notes(CHART)
+
+
+def test_replay_reproduces_session(notes):
+    replay = play_session(notes)
+    report = ReplayPlayer(replay, notes).run(timeline=True)
+    assert report["matches"] is True
+    judgements = replay["result"]["judgements"][0]
+    assert judgements["MISS"] > 0 and judgements["PERFECT"] > 0
+    missed = sum(counts["MISS"] for counts in report["judgements"])
+    assert sum(rating == "MISS" for _, _, lane, rating in report["timeline"] if lane is None) <= missed
+
+
+def test_replay_judges_inputs_with_the_offset(notes):
+    # A player who hears the song 120ms late, calibrated for it: presses are
+    # judged against the notes as drawn, and the replay judges them the same way
+    replay = play_session(notes, seed=4, offset=0.12, hears_late=0.12)
+    assert replay["audio_offset"] == 0.12
+    assert ReplayPlayer(replay, notes).run()["matches"] is True
+    uncalibrated = play_session(notes, seed=4, hears_late=0.12)
+    assert replay["result"]["judgements"][0]["PERFECT"] > uncalibrated["result"]["judgements"][0]["PERFECT"]
+    # The offset in effect decides the judgements, so replaying without it can't reproduce them
+    replay["audio_offset"] = 0.0
+    assert ReplayPlayer(replay, notes).run()["matches"] is False
+
+
+def test_tampered_result_mismatches(notes):
+    replay = play_session(notes, seed=1)
+    replay["result"]["scores"][1] += 1
+    assert ReplayPlayer(replay, notes).run()["matches"] is False
+
+
+def test_save_and_load_round_trip(notes, tmp_path):
+    replay = play_session(notes, seed=2)
+    path = save_replay(replay, str(tmp_path / 'session.replay.json.gz'))
+    loaded = load_replay(path)
+    assert loaded == replay
+    assert ReplayPlayer(loaded, load_replay_notes(loaded, CHART)).run()["matches"] is True
+
+
+def test_unsupported_version_rejected(tmp_path):
+    path = save_replay({"version": 1, "chart": {}}, str(tmp_path / 'old.replay.json.gz'))
+    with pytest.raises(ValueError):
+        load_replay(path)
+
+
+def test_changed_chart_rejected(notes):
+    replay = play_session(notes[:20])
+    assert replay["chart"]["hash"] == chart_hash(notes[:20])
+    with pytest.raises(ValueError):
+        load_replay_notes(replay, CHART)
+
+
+def test_bulk_check_survives_bad_files(notes, tmp_path):
+    good = save_replay(play_session(notes, seed=3), str(tmp_path / 'good.replay.json.gz'))
+    corrupt = tmp_path / 'corrupt.replay.json.gz'
+    corrupt.write_bytes(b'not gzip')
+    truncated = tmp_path / 'truncated.replay.json.gz'
+    with gzip.open(truncated, 'wt') as f:
+        f.write('{"version": ')
+    missing = str(tmp_path / 'missing.replay.json.gz')
+
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, 'rythymgame', 'replay.py'),
+         str(corrupt), str(truncated), missing, good, '--chart', CHART],
+        capture_output=True, text=True, timeout=60)
+    assert result.returncode == 1
+    assert "good.replay.json.gz: OK" in result.stdout
+    for name in ('corrupt', 'truncated', 'missing'):
+        assert f"{name}.replay.json.gz:" in result.stdout
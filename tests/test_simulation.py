@@ -0,0 +1,51 @@
+# Headless Simulation of the game's spawn/judge/score loop
+from rhythm_engine import AutoplayBot, Simulation, load_chart_notes, normal_error
+
+CHART = 'rythymgame/kevin-macleod-hall-of-the-mountain-king_chart.json'
+
+
+def combo_count(notes):
+    # A hold adds to the combo twice (press and release) but is judged once, on release
+    return sum(2 if len(note) > 2 and note[2] > 0 else 1 for note in notes)
+
+
+def test_perfect_bot_hits_everything_perfect():
+    notes = load_chart_notes(CHART)
+    report = Simulation(notes).run()
+    judgements = report["judgements"][0]
+    assert judgements["PERFECT"] == len(notes)
+    assert judgements["MISS"] == 0
+    assert report["max_combos"][0] == combo_count(notes)
+
+
+def test_skipped_notes_are_missed():
+    notes = load_chart_notes(CHART)
+    report = Simulation(notes, bot=AutoplayBot(skip_rate=0.2, seed=3)).run()
+    judgements = report["judgements"][0]
+    assert judgements["MISS"] > 0
+    assert sum(judgements.values()) == len(notes)
+
+
+def test_every_player_is_judged():
+    notes = load_chart_notes(CHART)
+    report = Simulation(notes, num_players=2).run()
+    assert report["scores"][0] == report["scores"][1] > 0
+    assert len(report["judgements"]) == 2
+
+
+def test_report_shape():
+    notes = load_chart_notes(CHART)
+    report = Simulation(notes, fps=30).run()
+    assert report["notes"] == len(notes)
+    assert report["frames"] > 0
+    assert report["song_seconds"] >= max(note[0] for note in notes)
+    assert set(report["frame_ms"]) == {"mean", "p95", "max"}
+
+
+def test_same_seed_same_result():
+    notes = load_chart_notes(CHART)
+    runs = [Simulation(notes, bot=AutoplayBot(normal_error(0.01, 0.05), skip_rate=0.05, seed=seed)).run()
+            for seed in (11, 11, 12)]
+    assert runs[0]["scores"] == runs[1]["scores"]
+    assert runs[0]["judgements"] == runs[1]["judgements"]
+    assert runs[0]["judgements"] != runs[2]["judgements"]